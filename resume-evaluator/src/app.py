@@ -6,9 +6,17 @@ import gradio as gr
 import pandas as pd
 
 from .config import config
-from .preprocessing.input_data_processing import process_input
+from .models.input_models import CandidateEvaluationWeights
+from .preprocessing.input_data_processing import (
+    estimate_evaluation,
+    rerank_run,
+    submit_evaluation,
+    submit_resume,
+)
 from .utils.helper import format_job_description_analysis, set_and_verify_api_key
+from .utils.job_queue import get_job_queue
 from .utils.logger import get_logger
+from .utils.workspace import list_unfinished_runs
 
 logger = get_logger(__name__)
 
@@ -24,12 +32,17 @@ def create_gradio_app():
         # add a state to store the eval_results
         eval_results = gr.State()
         api_key_status = gr.State()
+        # the evaluation runs in the background, the results view polls it by run id
+        run_id_state = gr.State()
+        shown_version = gr.State(0)
+        # the weights the user re-ranked a run with, applied to its later results
+        rerank_weights = gr.State()
+        poll_timer = gr.Timer(config.UI_UPDATE_INTERVAL, active=False)
 
         # INITIAL VIEW
         with gr.Group() as initial_view:
             with gr.Row():
                 with gr.Column(scale=2):
-
                     ## sidebar (20% of the screen)
                     # model selection section
                     api_key = gr.Textbox(label="API Key", type="password")
@@ -61,8 +74,15 @@ def create_gradio_app():
                         minimum=0, maximum=100, value=10, step=1, label="Education"
                     )
 
-                with gr.Column(scale=8):
+                    # the model calls stop once the run has spent its budget
+                    budget = gr.Number(
+                        label="Budget (USD)",
+                        value=config.RUN_BUDGET_USD,
+                        minimum=0,
+                        info="Leave empty for no limit",
+                    )
 
+                with gr.Column(scale=8):
                     ## Main content (80% of the screen)
                     # job description section
                     jd_text_input = gr.TextArea(
@@ -94,10 +114,25 @@ def create_gradio_app():
 
                     with gr.Row():
                         submit_btn = gr.Button("Evaluate")
+                        estimate_btn = gr.Button("Estimate cost")
                         reset_btn = gr.Button("Reset")
 
+                    # pre-flight token and cost estimate of the inputs
+                    cost_estimate_display = gr.Markdown()
+
+                    # finish a run interrupted by a restart or a provider outage
+                    with gr.Accordion("Resume an interrupted run", open=False):
+                        with gr.Row():
+                            resume_run_id = gr.Dropdown(
+                                label="Run",
+                                info="Select the interface of the run and enter its API key",
+                            )
+                            resume_btn = gr.Button("Resume")
+
         # RESULTS VIEW (INITIALLY HIDDEN)
         with gr.Group(visible=False) as results_view:
+            # per-phase progress of the evaluation
+            progress_display = gr.Markdown()
 
             with gr.Row():
                 # applicant summary
@@ -106,6 +141,27 @@ def create_gradio_app():
                 no_count = gr.Number(label="No")
                 kiv_count = gr.Number(label="KIV")
 
+            # re-rank the candidates with new weights, without re-running the evaluation
+            with gr.Accordion("Adjust Weights (Total must be 100)", open=False):
+                with gr.Row():
+                    results_technical_skills = gr.Slider(
+                        minimum=0,
+                        maximum=100,
+                        value=60,
+                        step=1,
+                        label="Technical Skills",
+                    )
+                    results_soft_skills = gr.Slider(
+                        minimum=0, maximum=100, value=10, step=1, label="Soft Skills"
+                    )
+                    results_experience = gr.Slider(
+                        minimum=0, maximum=100, value=20, step=1, label="Experience"
+                    )
+                    results_education = gr.Slider(
+                        minimum=0, maximum=100, value=10, step=1, label="Education"
+                    )
+                reweight_btn = gr.Button("Apply Weights")
+
             with gr.Row(equal_height=True):
                 with gr.Column():
                     # suitability filter
@@ -162,10 +218,14 @@ def create_gradio_app():
                 10,  # soft_skills
                 20,  # experience
                 10,  # education
+                config.RUN_BUDGET_USD,  # budget
+                "",  # cost_estimate_display
             ]
 
         # Event handlers: process results
-        def process_results(results_df: Union[pd.DataFrame, List[dict]]):
+        def process_results(
+            results_df: Union[pd.DataFrame, List[dict]], keep_selection: bool = False
+        ):
 
             logger.info("Processing results...")
 
@@ -225,9 +285,15 @@ def create_gradio_app():
                     yes,
                     no,
                     kiv,
-                    gr.Dropdown(
-                        choices=top_candidates_list,
-                        value=top_candidates_list[0] if top_candidates_list else None,
+                    (
+                        gr.update(choices=top_candidates_list)
+                        if keep_selection
+                        else gr.Dropdown(
+                            choices=top_candidates_list,
+                            value=(
+                                top_candidates_list[0] if top_candidates_list else None
+                            ),
+                        )
                     ),
                     job_description,
                     job_analysis_markdown,
@@ -249,6 +315,111 @@ def create_gradio_app():
                     error_msg,  # Debug output
                 ]
 
+        # Event handlers: queue the evaluation and poll its partial results
+        def show_queued_run(run_id):
+            return [
+                run_id,
+                gr.update(visible=False),  # hide initial view
+                gr.update(visible=True),  # show results
+                get_job_queue().get(run_id).message,
+                gr.Timer(active=True),
+                0,  # no results shown yet
+                None,  # ranked by the weights of the evaluation
+            ]
+
+        def keep_initial_view(message):
+            gr.Warning(message)
+            return [
+                None,
+                gr.update(visible=True),  # Keep initial view visible
+                gr.update(visible=False),  # Keep results view hidden
+                message,
+                gr.Timer(active=False),
+                0,
+                None,
+            ]
+
+        def start_evaluation(*inputs):
+            try:
+                return show_queued_run(submit_evaluation(*inputs))
+            except ValueError as e:
+                logger.error(f"start_evaluation: Error validating input: {str(e)}")
+                return keep_initial_view(f"Error validating input: {str(e)}")
+
+        def start_resumed_evaluation(run_id, api_key, budget):
+            if not run_id:
+                return keep_initial_view("Error: select a run to resume")
+            return show_queued_run(submit_resume(run_id, api_key, budget))
+
+        def show_cost_estimate(*inputs):
+            try:
+                return estimate_evaluation(*inputs)
+            except Exception as e:
+                logger.error(f"show_cost_estimate: Error estimating the cost: {str(e)}")
+                gr.Warning(f"Error estimating the cost: {str(e)}")
+                return ""
+
+        def poll_evaluation(run_id, version, weights):
+            job = get_job_queue().get(run_id) if run_id else None
+            if job is None:
+                return [*[gr.update()] * 11, gr.Timer(active=False), version]
+
+            timer = gr.Timer(active=not job.finished)
+            if job.status == "failed" and job.results.empty:
+                gr.Warning(job.message)
+                return [
+                    gr.update(visible=True),  # Keep initial view visible
+                    gr.update(visible=False),  # Keep results view hidden
+                    *[gr.update()] * 8,
+                    job.message,
+                    timer,
+                    version,
+                ]
+
+            # only redraw when the results changed since the last poll
+            if job.version == version:
+                return [*[gr.update()] * 10, job.message, timer, version]
+
+            # keep the ranking of the weights the user re-ranked with
+            results_df = job.results
+            if weights is not None and not results_df.empty:
+                results_df = rerank_run(run_id, results_df, weights)
+
+            # only select the top candidate the first time, keep the user's choice afterwards
+            return [
+                *process_results(results_df, keep_selection=version > 0),
+                job.message,
+                timer,
+                job.version,
+            ]
+
+        # Event handlers: recompute the fit scores from the stored sub-scores
+        def reweight_results(
+            run_id, results_df, technical_skills, soft_skills, experience, education
+        ):
+            if not run_id or results_df is None or results_df.empty:
+                return [gr.update()] * 11
+
+            try:
+                weights = CandidateEvaluationWeights(
+                    technical_skills=technical_skills,
+                    soft_skills=soft_skills,
+                    experience=experience,
+                    education=education,
+                )
+            except ValueError as e:
+                logger.error(f"reweight_results: Error validating weights: {str(e)}")
+                gr.Warning(f"Error validating weights: {str(e)}")
+                return [gr.update()] * 11
+
+            logger.info(f"Re-ranking {len(results_df)} results with weights: {weights}")
+            return [
+                *process_results(
+                    rerank_run(run_id, results_df, weights), keep_selection=True
+                ),
+                weights,
+            ]
+
         def update_candidate_list(suitability, results_df):
             if results_df is None or results_df.empty:
                 return gr.Dropdown(choices=[], value=None)
@@ -334,29 +505,113 @@ def create_gradio_app():
             outputs=[additional_text, file_upload],
         )
 
-        submit_btn.click(
+        evaluation_inputs = [
+            jd_text_input,
+            additional_text,
+            file_upload,
+            input_type,
+            api_key,
+            interface,
+            model,
+            technical_skills,
+            soft_skills,
+            experience,
+            education,
+            budget,
+        ]
+
+        estimate_btn.click(
+            fn=show_cost_estimate,
+            inputs=evaluation_inputs,
+            outputs=cost_estimate_display,
+        )
+
+        submit_event = submit_btn.click(
             fn=set_and_verify_api_key,
             inputs=[api_key, interface],
             outputs=api_key_status,
-        ).success(
-            fn=process_input,
+        )
+
+        # start the results view from the weights of the evaluation
+        submit_event.success(
+            fn=lambda *weights: weights,
+            inputs=[technical_skills, soft_skills, experience, education],
+            outputs=[
+                results_technical_skills,
+                results_soft_skills,
+                results_experience,
+                results_education,
+            ],
+        )
+
+        submit_event.success(
+            fn=start_evaluation,
+            inputs=evaluation_inputs,
+            outputs=[
+                run_id_state,
+                initial_view,
+                results_view,
+                progress_display,
+                poll_timer,
+                shown_version,
+                rerank_weights,
+            ],
+        )
+
+        demo.load(
+            fn=lambda: gr.update(choices=list_unfinished_runs()),
+            outputs=[resume_run_id],
+        )
+
+        resume_event = resume_btn.click(
+            fn=set_and_verify_api_key,
+            inputs=[api_key, interface],
+            outputs=api_key_status,
+        )
+        resume_event.success(
+            fn=start_resumed_evaluation,
+            inputs=[resume_run_id, api_key, budget],
+            outputs=[
+                run_id_state,
+                initial_view,
+                results_view,
+                progress_display,
+                poll_timer,
+                shown_version,
+                rerank_weights,
+            ],
+        )
+
+        poll_timer.tick(
+            fn=poll_evaluation,
+            inputs=[run_id_state, shown_version, rerank_weights],
+            outputs=[
+                initial_view,
+                results_view,
+                total_applicants,
+                yes_count,
+                no_count,
+                kiv_count,
+                top_candidates,
+                jd_display,
+                job_analysis_display,
+                eval_results,
+                progress_display,
+                poll_timer,
+                shown_version,
+            ],
+        )
+
+        reweight_btn.click(
+            fn=reweight_results,
             inputs=[
-                jd_text_input,
-                additional_text,
-                file_upload,
-                input_type,
-                api_key,
-                interface,
-                model,
-                technical_skills,
-                soft_skills,
-                experience,
-                education,
+                run_id_state,
+                eval_results,
+                results_technical_skills,
+                results_soft_skills,
+                results_experience,
+                results_education,
             ],
-            outputs=eval_results,
-        ).then(
-            fn=process_results,
-            inputs=[eval_results],
             outputs=[
                 initial_view,
                 results_view,
@@ -368,7 +623,12 @@ def create_gradio_app():
                 jd_display,
                 job_analysis_display,
                 eval_results,
+                rerank_weights,
             ],
+        ).then(
+            fn=display_score_comparison,
+            inputs=[top_candidates, eval_results],
+            outputs=[score_comparison],
         )
 
         reset_btn.click(
@@ -386,6 +646,8 @@ def create_gradio_app():
                 soft_skills,
                 experience,
                 education,
+                budget,
+                cost_estimate_display,
             ],
         )
 
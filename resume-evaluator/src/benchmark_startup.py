@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# ------------------------------
+# cold start benchmark
+# ------------------------------
+
+PACKAGE = __package__ or "resume-evaluator.src"
+ENTRY_POINTS = ["cli", "app", "evaluators.chains", "config"]
+
+IMPORT_TIME_PATTERN = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import(module: str) -> List[Tuple[str, int, int, int]]:
+    """(module, nesting level, self us, cumulative us) of the imports of a module
+    in a fresh interpreter, as reported by python -X importtime"""
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import importlib; importlib.import_module({module!r})",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{process.stderr}")
+
+    imports = []
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            level = len(indent) // 2
+            imports.append((name, level, int(self_us), int(cumulative_us)))
+    return imports
+
+
+def import_time_report(module: str, top: int = 10, repeat: int = 3) -> Dict:
+    """best of repeat cold imports of a module, with its slowest dependencies"""
+
+    def total_us(imports):
+        # the top-level entries include the interpreter startup and the parents
+        # of the module, which importlib imports first
+        top_level = min(level for _, level, _, _ in imports)
+        return sum(
+            cumulative_us
+            for _, level, _, cumulative_us in imports
+            if level == top_level
+        )
+
+    runs = [measure_import(module) for _ in range(repeat)]
+    best = min(runs, key=total_us)
+    slowest = sorted(best, key=lambda entry: entry[3], reverse=True)
+    return {
+        "module": module,
+        "total_ms": total_us(best) / 1000,
+        "slowest": [
+            (name, cumulative_us / 1000)
+            for name, _, _, cumulative_us in slowest[:top]
+            if name != module
+        ],
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(f"{report['module']}: {report['total_ms']:.0f} ms")
+    for name, cumulative_ms in report["slowest"]:
+        print(f"  {cumulative_ms:8.0f} ms  {name}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure the cold import time of the entry points."
+    )
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        default=ENTRY_POINTS,
+        help=f"modules relative to the package, defaults to {ENTRY_POINTS}",
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="number of slowest imports to list"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="keep the best run")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    for module in args.modules:
+        print_report(
+            import_time_report(f"{PACKAGE}.{module}", top=args.top, repeat=args.repeat)
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from .config import config
+from .models.input_models import CandidateEvaluationWeights, InputModel
+from .preprocessing.input_data_processing import (
+    estimate_input_cost,
+    iter_pdf_dir,
+    resume_run,
+    stream_evaluation,
+)
+from .preprocessing.parsers.pdf_parser import content_id, file_sha256, parse_pdf
+from .utils.estimate_cost import CostEstimate
+from .utils.logger import get_logger
+from .utils.workspace import RunWorkspace
+
+logger = get_logger(__name__)
+
+# ------------------------------
+# headless batch evaluation
+# ------------------------------
+
+
+def in_shard(cv_id: str, shard_index: int, shard_count: int) -> bool:
+    """whether a cv belongs to a shard, the cv ids are hex content hashes"""
+    return int(cv_id, 16) % shard_count == shard_index
+
+
+def shard_pdfs(pdf_dir: Path, shard_index: int, shard_count: int) -> List[Path]:
+    """the pdfs of a shard, assigned by the hash of their content so that every
+    process agrees without coordination"""
+    return [
+        pdf
+        for pdf in sorted(pdf_dir.glob("*.pdf"))
+        if in_shard(content_id(file_sha256(pdf)), shard_index, shard_count)
+    ]
+
+
+def read_job_description(path: Path) -> str:
+    if path.suffix.lower() == ".pdf":
+        return " ".join(page or "" for page in parse_pdf(path))
+    return path.read_text(encoding="utf-8")
+
+
+def print_progress(updates, output_path: Optional[Path] = None) -> bool:
+    """print the progress messages of a run, returns whether it succeeded"""
+    last_message = None
+    eval_results = None
+    for eval_results, message in updates:
+        if message.startswith("Error"):
+            print(message, file=sys.stderr)
+            return False
+        if message != last_message:
+            print(message, flush=True)
+            last_message = message
+
+    if output_path is not None and eval_results is not None:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        eval_results.to_csv(output_path, index=False)
+        print(f"Results saved to {output_path}")
+    return True
+
+
+def preflight_check(input_data: InputModel, estimates: List[CostEstimate]) -> bool:
+    """print the estimated cost of the run, returns whether it fits the budget"""
+    for estimate in estimates:
+        print(
+            f"  {estimate.model_name}: {estimate.calls} calls, "
+            f"{estimate.input_tokens} input + {estimate.output_tokens} output tokens, "
+            f"${estimate.cost:.4f}"
+        )
+
+    total = sum(estimate.cost for estimate in estimates)
+    budget = input_data.budget or config.RUN_BUDGET_USD
+    print(f"Estimated cost: ${total:.4f}" + (f" of ${budget:.2f}" if budget else ""))
+    if budget is not None and total > budget:
+        print(
+            "Error: the estimated cost exceeds the budget, resume the run "
+            "with a larger --budget to start it",
+            file=sys.stderr,
+        )
+        return False
+    return True
+
+
+def evaluate_job(args: argparse.Namespace, job_path: Path, pdfs: List[Path]) -> bool:
+    """evaluate the pdfs against one job description in a new run workspace"""
+    try:
+        input_data = InputModel(
+            text_input=read_job_description(job_path),
+            input_type="File",
+            api_key=args.api_key or "",
+            interface=args.interface,
+            model=args.model,
+            weights=CandidateEvaluationWeights(
+                technical_skills=args.weights[0],
+                soft_skills=args.weights[1],
+                experience=args.weights[2],
+                education=args.weights[3],
+            ),
+            budget=args.budget,
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error reading {job_path}: {str(e)}", file=sys.stderr)
+        return False
+
+    run_id = RunWorkspace.new_run_id()
+    if args.shard_count > 1:
+        run_id += f"-shard{args.shard_index}of{args.shard_count}"
+    workspace = RunWorkspace.create(run_id)
+    workspace.write_manifest(
+        run_id=workspace.run_id,
+        status="running",
+        created_at=time.time(),
+        input=input_data.model_dump(exclude={"api_key"}),
+        job_file=str(job_path),
+        shard=[args.shard_index, args.shard_count],
+    )
+    print(f"Run {workspace.run_id}: {job_path.name}, {len(pdfs)} CVs")
+
+    # the pipeline parses the files saved in the workspace, as for a resumed run
+    for pdf in pdfs:
+        shutil.copy(pdf, workspace.pdf_dir)
+
+    output_path = None
+    if args.output_dir is not None:
+        output_path = Path(args.output_dir) / f"{workspace.run_id}.csv"
+    try:
+        # the parsed texts are cached, the run does not parse the pdfs again
+        cv_texts = [cv_text for _, cv_text in iter_pdf_dir(workspace.pdf_dir)]
+        estimates = estimate_input_cost(input_data, cv_texts)
+        if not preflight_check(input_data, estimates):
+            workspace.write_manifest(status="budget_exceeded")
+            return False
+        # the run reuses the estimate rather than making its own
+        return print_progress(
+            stream_evaluation(input_data, None, workspace, cost_estimates=estimates),
+            output_path,
+        )
+    finally:
+        workspace.close()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Evaluate a directory of resumes against job descriptions."
+    )
+    parser.add_argument("--pdf-dir", type=Path, help="directory of resume pdfs")
+    parser.add_argument(
+        "--jd",
+        type=Path,
+        nargs="+",
+        default=[],
+        help="job description files (text or pdf), one run per file",
+    )
+    parser.add_argument("--interface", default="Groq")
+    parser.add_argument("--model", default="llama3-70b-8192")
+    parser.add_argument(
+        "--api-key", default=None, help="defaults to the <INTERFACE>_API_KEY variable"
+    )
+    parser.add_argument(
+        "--weights",
+        type=int,
+        nargs=4,
+        default=[60, 10, 20, 10],
+        metavar=("TECHNICAL", "SOFT", "EXPERIENCE", "EDUCATION"),
+    )
+    parser.add_argument("--shard-index", type=int, default=0)
+    parser.add_argument("--shard-count", type=int, default=1)
+    parser.add_argument(
+        "--output-dir", type=Path, default=None, help="copy the results csv here"
+    )
+    parser.add_argument(
+        "--resume", metavar="RUN_ID", default=None, help="resume an interrupted run"
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help="cost cap of each run in usd, defaults to RUN_BUDGET_USD",
+    )
+
+    args = parser.parse_args(argv)
+    if not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be between 0 and --shard-count - 1")
+    if args.resume is None and (args.pdf_dir is None or not args.jd):
+        parser.error("--pdf-dir and --jd are required unless resuming a run")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    if args.resume is not None:
+        output_path = None
+        if args.output_dir is not None:
+            output_path = Path(args.output_dir) / f"{args.resume}.csv"
+        ok = print_progress(
+            resume_run(args.resume, args.api_key or "", args.budget), output_path
+        )
+        return 0 if ok else 1
+
+    pdfs = shard_pdfs(args.pdf_dir, args.shard_index, args.shard_count)
+    logger.info(
+        f"Shard {args.shard_index}/{args.shard_count}: "
+        f"{len(pdfs)} CVs from {args.pdf_dir}"
+    )
+
+    ok = True
+    for job_path in args.jd:
+        ok = evaluate_job(args, job_path, pdfs) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
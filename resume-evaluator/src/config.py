@@ -1,6 +1,6 @@
 import logging
-import shutil
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -8,19 +8,148 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Config(BaseSettings):
     TITLE: str = "✏️ Resume Evaluator"
     BASE_DIR: Path = Path("./resume-evaluator").resolve()
-    PDF_UPLOAD_FOLDER: Path = BASE_DIR / "data/input/pdf"
     OUTPUT_DIR: Path = BASE_DIR / "data/output"
-    CSV_OUTPUT_DIR: Path = OUTPUT_DIR / "csv"
-    JOBS_OUTPUT_DIR: Path = OUTPUT_DIR / "jobs"
-    CV_OUTPUT_DIR: Path = OUTPUT_DIR / "cv"
+    RUNS_DIR: Path = OUTPUT_DIR / "runs"
+    CACHE_DIR: Path = OUTPUT_DIR / "cache"
     ENV_PATH: Path = BASE_DIR / ".env"
     LOG_FILE: Path = BASE_DIR / "logs/evaluation_log.txt"
     LOG_LEVEL: str = "INFO"
-    SLEEP_TIME: float = 2.1  # add a small delay to avoid rate limiting
+    UI_UPDATE_INTERVAL: float = 1.0  # seconds between partial results in the ui
+
+    # retention policy of the run workspaces, applied by a background thread
+    RUN_RETENTION_MAX_AGE_DAYS: float = 7
+    RUN_RETENTION_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    RUN_CLEANUP_INTERVAL_SECONDS: float = 3600
+
+    # evaluations run in the background on a pool of workers, the ui polls them
+    JOB_QUEUE_WORKERS: int = 2
+    JOB_QUEUE_MAX_FINISHED_JOBS: int = 100
+
+    # chat model clients are pooled per interface, model and api key, and share
+    # keep-alive http connections (http/2 when the h2 package is installed)
+    CLIENT_POOL_ENABLED: bool = True
+    CLIENT_POOL_MAX_SIZE: int = 32
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 64
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 32
+    HTTP_KEEPALIVE_EXPIRY: float = 120.0
+    HTTP_TIMEOUT: float = 120.0
+    # a verified api key is not checked again against the provider within the ttl
+    API_KEY_VERIFY_TTL_SECONDS: float = 600
+    # maximum number of in-flight LLM requests per interface
+    MAX_CONCURRENCY: Dict[str, int] = {
+        "groq": 4,
+        "openai": 8,
+        "anthropic": 4,
+        "ollama": 1,
+        # pairs scored at once in ensemble mode, each model is bounded by its interface
+        "ensemble": 8,
+        # pairs screened at once in cascade mode, each model is bounded by its interface
+        "cascade": 8,
+    }
+    DEFAULT_MAX_CONCURRENCY: int = 2
+
+    # requests/minute and tokens/minute budgets per interface (or "interface/model")
+    RATE_LIMITS: Dict[str, Dict[str, Optional[int]]] = {
+        "groq": {"requests_per_minute": 30, "tokens_per_minute": 6000},
+        "openai": {"requests_per_minute": 500, "tokens_per_minute": 30000},
+        "anthropic": {"requests_per_minute": 50, "tokens_per_minute": 40000},
+        "ollama": {"requests_per_minute": None, "tokens_per_minute": None},
+    }
+    RATE_LIMIT_MAX_RETRIES: int = 3
+
+    # re-invocations of a pair whose output cannot be parsed or repaired
+    PARSE_MAX_RETRIES: int = 2
+
+    # bind the result schemas to the model (tool calling) instead of describing them
+    # in the prompt, for the interfaces that support it
+    STRUCTURED_OUTPUT_ENABLED: bool = False
+    STRUCTURED_OUTPUT_INTERFACES: List[str] = ["openai", "anthropic", "groq"]
+
+    # content-addressed cache of llm results
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # rows buffered before a part file is appended to a run's parquet score table
+    SCORE_TABLE_FLUSH_ROWS: int = 500
+    # score tables kept open in memory, so that re-ranking a run reads no file
+    SCORE_TABLE_CACHE_SIZE: int = 16
+
+    # provider-side caching of the job-specific system prompt
+    PROMPT_CACHE_ENABLED: bool = True
+
+    # pdf parsing on a process pool, None workers means one per cpu
+    PDF_PARSER_MAX_WORKERS: Optional[int] = None
+    PDF_PARSER_TIMEOUT: float = 30.0
+    PDF_MAX_FILE_SIZE_BYTES: int = 10 * 1024 * 1024
+    PDF_MAX_PAGES: int = 20
 
     TEMPERATURE: float = 0.0
     MAX_TOKENS: int = 8192
 
+    # context window per model, used to pack several short cvs into one request
+    CONTEXT_WINDOWS: Dict[str, int] = {
+        "llama3-70b-8192": 8192,
+        "gpt-3.5-turbo": 16385,
+        "gpt-4": 8192,
+    }
+    DEFAULT_CONTEXT_WINDOW: int = 8192
+
+    # usd per million (input, output) tokens per "interface/model", or per
+    # interface for the local ones, DEFAULT_MODEL_PRICE for the others
+    MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+        "groq/llama3-70b-8192": (0.59, 0.79),
+        "groq/llama3-8b-8192": (0.05, 0.08),
+        "openai/gpt-3.5-turbo": (0.50, 1.50),
+        "openai/gpt-4": (30.0, 60.0),
+        "anthropic/claude-3-5-sonnet-20240620": (3.0, 15.0),
+        "anthropic/claude-3-haiku-20240307": (0.25, 1.25),
+        "ollama": (0.0, 0.0),
+    }
+    DEFAULT_MODEL_PRICE: Tuple[float, float] = (5.0, 15.0)
+    # anthropic bills the prompt cache reads and writes apart from the input
+    # tokens, as a factor of the input price
+    CACHE_READ_PRICE_FACTOR: float = 0.1
+    CACHE_WRITE_PRICE_FACTOR: float = 1.25
+    # output tokens assumed for a job analysis in the pre-flight cost estimate,
+    # a cv evaluation is assumed to take CV_BATCH_OUTPUT_TOKENS_PER_CV
+    COST_ESTIMATE_JD_OUTPUT_TOKENS: int = 800
+    # a run whose estimated cost exceeds its budget (usd) is not started, and its
+    # model calls stop before their actual cost would exceed it
+    RUN_BUDGET_USD: Optional[float] = None
+    CV_BATCH_SCORING: bool = False
+    CV_BATCH_MAX_SIZE: int = 5
+    CV_BATCH_MAX_CV_TOKENS: int = 1500  # longer cvs are always scored on their own
+    CV_BATCH_OUTPUT_TOKENS_PER_CV: int = 600
+
+    # "llm" scores the cvs with the model, "local" with the skill matcher (no api
+    # calls for the cvs, the job description is still analyzed by the model)
+    CV_SCORING_MODE: str = "llm"
+
+    # ensemble mode: (interface, model) pairs scoring every cv alongside the selected
+    # model, concurrently. Scores are aggregated with "mean" or "median", suitability
+    # by majority vote. With ENSEMBLE_EARLY_EXIT_AGREEMENT, the remaining models are
+    # cancelled once that many models agree on the suitability.
+    ENSEMBLE_MODELS: List[Tuple[str, str]] = []
+    ENSEMBLE_AGGREGATION: str = "mean"
+    ENSEMBLE_EARLY_EXIT_AGREEMENT: Optional[int] = None
+
+    # cascade mode: CASCADE_SCREENING_MODEL, an (interface, model) pair, scores every
+    # cv and the selected model only re-scores the results in CASCADE_ESCALATE_ON:
+    # "kiv" suitability, a "boundary" recalibrated overall score within
+    # CASCADE_BOUNDARY_MARGIN of CASCADE_BOUNDARY_SCORE, or an "invalid" result
+    CASCADE_ENABLED: bool = False
+    CASCADE_SCREENING_MODEL: Tuple[str, str] = ("groq", "llama3-8b-8192")
+    CASCADE_ESCALATE_ON: List[str] = ["kiv", "boundary", "invalid"]
+    CASCADE_BOUNDARY_SCORE: float = 60.0
+    CASCADE_BOUNDARY_MARGIN: float = 10.0
+
+    # keyword pre-screening of the job-cv pairs before llm scoring, keeps the
+    # PRESCREEN_TOP_K best cvs per job (all if None) scoring at least PRESCREEN_MIN_SCORE
+    PRESCREEN_ENABLED: bool = False
+    PRESCREEN_TOP_K: Optional[int] = None
+    PRESCREEN_MIN_SCORE: float = 0.0
+
     GROQ_URL: str = "https://api.groq.com/openai/v1/models"
     OPENAI_URL: str = "https://api.openai.com/v1/models"
     ANTHROPIC_URL: str = "https://api.anthropic.com/v1/models"
@@ -32,21 +161,13 @@ class Config(BaseSettings):
         allow_extra="allow",
     )
 
-    def __init__(self, **data):
-        super().__init__(**data)
-        self.setup_directories()
-
     def setup_directories(self):
-        """Create necessary directories, removing existing ones if they exist."""
+        """Create necessary directories, existing data is kept."""
         directories = [
-            self.PDF_UPLOAD_FOLDER,
-            self.JOBS_OUTPUT_DIR,
-            self.CV_OUTPUT_DIR,
-            self.CSV_OUTPUT_DIR,
+            self.RUNS_DIR,
+            self.CACHE_DIR,
         ]
         for directory in directories:
-            if directory.exists():
-                shutil.rmtree(directory)
             directory.mkdir(parents=True, exist_ok=True)
 
     def setup_logging(self):
@@ -0,0 +1,172 @@
+import asyncio
+import contextlib
+import json
+from typing import Dict, List, Optional, Tuple, Union
+
+from langchain_core.runnables import RunnableSequence
+from pydantic import ValidationError
+
+from ..config import config
+from ..evaluators.two_stage_evaluators import atwo_stage_eval_cv
+from ..models.output_models import CVEvaluation
+from ..prompts.two_stage_eval_cv_batch import TWO_STAGE_EVAL_CV_BATCH_PROMPT
+from ..utils.estimate_cost import count_tokens
+from ..utils.logger import get_logger
+from ..utils.results_store import ResultsStore
+
+logger = get_logger(__name__)
+
+
+def format_resumes(cv_tuples: List[Tuple[str, str]]) -> str:
+    """format the resumes of a batch for the {resumes} slot of the batch prompt"""
+    return "\n\n".join(
+        f'<resume cv_id="{cv_id}">\n{cv}\n</resume>' for cv_id, cv in cv_tuples
+    )
+
+
+def parse_batch_result(batch_result: Union[list, dict]) -> Dict[str, dict]:
+    """map the batch output to {cv_id: result}, dropping malformed entries"""
+    if isinstance(batch_result, dict):
+        # either {"results": [...]} or {cv_id: result}
+        if isinstance(batch_result.get("results"), list):
+            batch_result = batch_result["results"]
+        else:
+            batch_result = [
+                {"cv_id": cv_id, **result}
+                for cv_id, result in batch_result.items()
+                if isinstance(result, dict)
+            ]
+
+    results = {}
+    for result in batch_result or []:
+        if not isinstance(result, dict):
+            continue
+        try:
+            result = CVEvaluation.model_validate(result).model_dump()
+        except ValidationError as e:
+            logger.warning(f"Dropping a malformed batch entry: {str(e)}")
+            continue
+        cv_id = str(result.get("cv_id", ""))
+        if cv_id:
+            results[cv_id] = {k: v for k, v in result.items() if k != "cv_id"}
+    return results
+
+
+def get_batch_token_budget(model_id: str, job_data: List[Tuple[str, dict]]) -> int:
+    """tokens left for the resumes and their outputs once the batch prompt and the largest job are in"""
+    context_window = config.CONTEXT_WINDOWS.get(model_id, config.DEFAULT_CONTEXT_WINDOW)
+    job_tokens = max(
+        (
+            count_tokens(json.dumps(job_requirements))
+            for _, job_requirements in job_data
+        ),
+        default=0,
+    )
+    return context_window - count_tokens(TWO_STAGE_EVAL_CV_BATCH_PROMPT) - job_tokens
+
+
+class CVBatcher:
+    """pack short cvs into batches that fit the model's context window"""
+
+    def __init__(
+        self,
+        token_budget: int,
+        output_tokens_per_cv: int,
+        max_batch_size: int,
+        max_cv_tokens: int,
+    ) -> None:
+        self.token_budget = token_budget
+        self.output_tokens_per_cv = output_tokens_per_cv
+        self.max_batch_size = max_batch_size
+        self.max_cv_tokens = max_cv_tokens
+
+        self._batch = []
+        self._batch_tokens = 0
+
+    def add(self, cv_tuple: Tuple[str, str]) -> List[List[Tuple[str, str]]]:
+        """add a cv, returns the batches that are ready to be dispatched"""
+        tokens = count_tokens(cv_tuple[1]) + self.output_tokens_per_cv
+
+        # long cvs are scored on their own
+        if tokens - self.output_tokens_per_cv > self.max_cv_tokens:
+            return [[cv_tuple]]
+
+        ready = []
+        if self._batch and (
+            self._batch_tokens + tokens > self.token_budget
+            or len(self._batch) >= self.max_batch_size
+        ):
+            ready = self.flush()
+
+        self._batch.append(cv_tuple)
+        self._batch_tokens += tokens
+        return ready
+
+    def flush(self) -> List[List[Tuple[str, str]]]:
+        """return the pending batch, if any"""
+        batch, self._batch, self._batch_tokens = self._batch, [], 0
+        return [batch] if batch else []
+
+
+async def atwo_stage_eval_cv_batch(
+    batch_model_tuples: List[Tuple[str, RunnableSequence]],
+    model_tuples: List[Tuple[str, RunnableSequence]],
+    job_tuple: Tuple[str, str],
+    cv_tuples: List[Tuple[str, str]],
+    store: ResultsStore,
+    semaphores: Optional[Dict[str, asyncio.Semaphore]] = None,
+) -> Dict[str, Optional[Dict[str, dict]]]:
+    """score several cvs against a job in one request per model.
+
+    Resumes missing from a model's batch output, or from a batch that failed
+    to parse, are re-scored with single-cv calls of model_tuples.
+    Returns {cv_id: model_results}.
+    """
+
+    semaphores = semaphores or {}
+
+    if isinstance(batch_model_tuples, Tuple):
+        batch_model_tuples = [batch_model_tuples]
+    if isinstance(model_tuples, Tuple):
+        model_tuples = [model_tuples]
+
+    job_id, job_requirements = job_tuple
+    results = {cv_id: {} for cv_id, _ in cv_tuples}
+
+    logger.info(f"Start batch evaluation of {len(cv_tuples)} CVs for job_id: {job_id}")
+
+    for model_name, grader in batch_model_tuples:
+        try:
+            async with semaphores.get(model_name, contextlib.nullcontext()):
+                batch_result = await grader.ainvoke(
+                    {
+                        "job_requirements": job_requirements,
+                        "resumes": format_resumes(cv_tuples),
+                    }
+                )
+        except Exception as e:
+            logger.error(
+                f"Batch evaluation with {model_name} failed for job_id: {job_id}. Error: {str(e)}"
+            )
+            continue
+
+        for cv_id, result in parse_batch_result(batch_result).items():
+            if cv_id in results:
+                results[cv_id][model_name] = result
+                await asyncio.to_thread(
+                    store.save_cv_result, job_id, cv_id, model_name, result
+                )
+
+    async def fall_back(cv_tuple):
+        cv_id = cv_tuple[0]
+        missing = [(m, g) for m, g in model_tuples if m not in results[cv_id]]
+        if missing:
+            logger.warning(f"Falling back to single-cv evaluation for cv_id: {cv_id}")
+            model_results = await atwo_stage_eval_cv(
+                missing, job_tuple, cv_tuple, store, semaphores
+            )
+            results[cv_id].update(model_results or {})
+
+    await asyncio.gather(*(fall_back(cv_tuple) for cv_tuple in cv_tuples))
+
+    return {cv_id: model_results or None for cv_id, model_results in results.items()}
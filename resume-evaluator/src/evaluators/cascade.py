@@ -0,0 +1,146 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from ..evaluators.post_analysis import is_valid_result
+from ..models.input_models import CandidateEvaluationWeights
+from ..utils.async_utils import get_semaphore
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ESCALATION_REASONS = ("kiv", "boundary", "invalid")
+
+
+def overall_score(result: dict, weights: CandidateEvaluationWeights) -> Optional[float]:
+    """weighted recalibrated overall score of a result, as in add_fit_scores"""
+    scores = result.get("recalibrated_scores") or {}
+    total = 0.0
+    for skill, weight in weights.model_dump().items():
+        score = scores.get(skill)
+        if not isinstance(score, (int, float)):
+            return None
+        total += score * weight
+    return total / 100.0
+
+
+class CascadeGrader(Runnable[Dict[str, Any], dict]):
+    """score with a cheap model, re-score the uncertain results with a strong one.
+
+    A result is escalated for the reasons in escalate_on: "kiv" suitability,
+    a "boundary" recalibrated overall score within boundary_margin of
+    boundary_score, or an "invalid" (unparseable or incomplete) result.
+    """
+
+    def __init__(
+        self,
+        screening_tuple: Tuple[str, Runnable],
+        strong_tuple: Tuple[str, Runnable],
+        weights: CandidateEvaluationWeights,
+        escalate_on: List[str] = ESCALATION_REASONS,
+        boundary_score: float = 60.0,
+        boundary_margin: float = 10.0,
+    ) -> None:
+        unknown = set(escalate_on) - set(ESCALATION_REASONS)
+        if unknown:
+            raise ValueError(f"Invalid escalation reasons: {sorted(unknown)}")
+
+        self.screening_tuple = screening_tuple
+        self.strong_tuple = strong_tuple
+        self.weights = weights
+        self.escalate_on = set(escalate_on)
+        self.boundary_score = boundary_score
+        self.boundary_margin = boundary_margin
+
+        self.scored = 0
+        self.escalated = 0
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalated / self.scored if self.scored else 0.0
+
+    def escalation_reason(self, result: Optional[dict]) -> Optional[str]:
+        """why a screening result needs the strong model, None if it does not"""
+        if result is None or not is_valid_result(result):
+            return "invalid" if "invalid" in self.escalate_on else None
+
+        suitability = str(result["assessment"].get("suitability", "")).lower()
+        if "kiv" in self.escalate_on and suitability == "kiv":
+            return "kiv"
+
+        score = overall_score(result, self.weights)
+        if "boundary" in self.escalate_on:
+            if score is None:
+                return "boundary"
+            if abs(score - self.boundary_score) <= self.boundary_margin:
+                return "boundary"
+        return None
+
+    def _screen_error(self, e: Exception) -> None:
+        screening_name = self.screening_tuple[0]
+        logger.error(
+            f"Cascade screening model {screening_name} failed. Error: {str(e)}"
+        )
+        if "invalid" not in self.escalate_on:
+            raise e
+
+    def _finish(
+        self, screening_result: Optional[dict], result: dict, reason: Optional[str]
+    ) -> dict:
+        if not isinstance(result, dict):
+            return result
+        result = dict(result)
+        result["cascade"] = {
+            "screening_model": self.screening_tuple[0],
+            "escalated": reason is not None,
+            "reason": reason,
+            "screening_result": screening_result if reason is not None else None,
+        }
+        return result
+
+    def _count(self, reason: Optional[str]) -> None:
+        self.scored += 1
+        if reason is not None:
+            self.escalated += 1
+            logger.info(
+                f"Escalated to {self.strong_tuple[0]} ({reason}), "
+                f"escalation rate {self.escalated}/{self.scored}"
+            )
+
+    def invoke(
+        self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs
+    ) -> dict:
+        screening_result = None
+        try:
+            screening_result = self.screening_tuple[1].invoke(input, config, **kwargs)
+        except Exception as e:
+            self._screen_error(e)
+
+        reason = self.escalation_reason(screening_result)
+        result = screening_result
+        if reason is not None:
+            result = self.strong_tuple[1].invoke(input, config, **kwargs)
+        self._count(reason)
+        return self._finish(screening_result, result, reason)
+
+    async def ainvoke(
+        self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs
+    ) -> dict:
+        async def evaluate(model_tuple):
+            # bounded per interface, the model names are "interface/model_id"
+            model_name, grader = model_tuple
+            async with get_semaphore(model_name.split("/")[0]):
+                return await grader.ainvoke(input, config, **kwargs)
+
+        screening_result = None
+        try:
+            screening_result = await evaluate(self.screening_tuple)
+        except Exception as e:
+            self._screen_error(e)
+
+        reason = self.escalation_reason(screening_result)
+        result = screening_result
+        if reason is not None:
+            result = await evaluate(self.strong_tuple)
+        self._count(reason)
+        return self._finish(screening_result, result, reason)
@@ -1,21 +1,81 @@
+import importlib
 import os
-from typing import Tuple
+from functools import lru_cache
+from typing import Optional, Tuple, Type
 
-from langchain_anthropic import ChatAnthropic
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.prompts import PromptTemplate
+from langchain_core.exceptions import OutputParserException
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
+from langchain_core.runnables import RunnableLambda
 from langchain_core.runnables.base import RunnableSequence
-from langchain_groq import ChatGroq
-from langchain_ollama import ChatOllama
-from langchain_openai import ChatOpenAI
 
 from ..config import config
-from ..prompts.two_stage_eval_cv import TWO_STAGE_EVAL_CV_PROMPT
-from ..prompts.two_stage_eval_jd import TWO_STAGE_EVAL_JD_PROMPT
+from ..evaluators.cascade import CascadeGrader
+from ..evaluators.ensemble import EnsembleGrader
+from ..evaluators.output_parsers import (
+    TolerantJsonOutputParser,
+    get_json_schema,
+    validate_output,
+)
+from ..evaluators.skill_matcher import SkillMatchGrader
+from ..models.input_models import CandidateEvaluationWeights
+from ..models.output_models import CVBatchEvaluation, CVEvaluation, JobAnalysis
+from ..prompts.two_stage_eval_cv import (
+    TWO_STAGE_EVAL_CV_HUMAN_PROMPT,
+    TWO_STAGE_EVAL_CV_STRUCTURED_SYSTEM_PROMPT,
+    TWO_STAGE_EVAL_CV_SYSTEM_PROMPT,
+)
+from ..prompts.two_stage_eval_cv_batch import (
+    TWO_STAGE_EVAL_CV_BATCH_HUMAN_PROMPT,
+    TWO_STAGE_EVAL_CV_BATCH_STRUCTURED_SYSTEM_PROMPT,
+    TWO_STAGE_EVAL_CV_BATCH_SYSTEM_PROMPT,
+)
+from ..prompts.two_stage_eval_jd import (
+    TWO_STAGE_EVAL_JD_PROMPT,
+    TWO_STAGE_EVAL_JD_STRUCTURED_PROMPT,
+)
+from ..utils.cache import CachedGrader, get_result_cache
+from ..utils.client_pool import (
+    HTTP_CLIENT_INTERFACES,
+    get_http_clients,
+    get_model_pool,
+    key_fingerprint,
+)
 from ..utils.logger import get_logger
+from ..utils.prompt_cache import (
+    ANTHROPIC_PROMPT_CACHING_HEADERS,
+    PromptCacheCallbackHandler,
+    mark_system_cacheable,
+)
+from ..utils.rate_limiter import (
+    RateLimitCallbackHandler,
+    get_rate_limiter,
+    get_retryable_errors,
+)
 
 logger = get_logger(__name__)
 
+# interfaces whose sdk client retries failed requests by itself
+SDK_RETRY_INTERFACES = ("groq", "openai", "anthropic")
+
+# (module, class) of the chat model of each interface, imported on first use
+# since a run only needs one or two of the provider sdks
+MODEL_PROVIDERS = {
+    "groq": ("langchain_groq", "ChatGroq"),
+    "openai": ("langchain_openai", "ChatOpenAI"),
+    "anthropic": ("langchain_anthropic", "ChatAnthropic"),
+    "ollama": ("langchain_ollama", "ChatOllama"),
+}
+
+
+def get_model_class(model_text: str) -> Type[BaseChatModel]:
+    """import the chat model class of an interface"""
+    provider = MODEL_PROVIDERS.get(model_text.lower())
+    if provider is None:
+        raise ValueError(f"Invalid model text: {model_text}")
+    module_name, class_name = provider
+    return getattr(importlib.import_module(module_name), class_name)
+
 
 def get_model(
     model_text: str,
@@ -26,35 +86,130 @@ def get_model(
 ) -> Tuple[str, RunnableSequence]:
     """get model based on the input data"""
 
-    model_classes = {
-        "groq": ChatGroq,
-        "openai": ChatOpenAI,
-        "anthropic": ChatAnthropic,
-        "ollama": ChatOllama,
-    }
-
     model_text = model_text.lower()
-    model_class = model_classes.get(model_text)
+    model_class = get_model_class(model_text)
 
-    if model_class is None:
-        raise ValueError(f"Invalid model text: {model_text}")
+    # the key of the run, or the one set for the interface in the environment
+    api_key = api_key or os.environ.get(f"{model_text.upper()}_API_KEY")
+
+    def create_model() -> BaseChatModel:
+        return build_model(
+            model_class, model_text, model_id, temperature, max_tokens, api_key
+        )
+
+    if not config.CLIENT_POOL_ENABLED:
+        return create_model()
+
+    # the chains of all the pairs and runs share the client and its connections
+    key = (model_text, model_id, temperature, max_tokens, key_fingerprint(api_key))
+    return get_model_pool().get_or_create(key, create_model)
+
+
+def build_model(
+    model_class: Type[BaseChatModel],
+    model_text: str,
+    model_id: str,
+    temperature: float,
+    max_tokens: int,
+    api_key: Optional[str],
+) -> BaseChatModel:
+    """create a chat model with its rate limiter, callbacks and http clients"""
+
+    callbacks = [PromptCacheCallbackHandler(f"{model_text}/{model_id}")]
+    model_kwargs = {}
 
-    # use the api key from the environment variables
-    api_key = os.environ.get(f"{model_text.upper()}_API_KEY")
+    # shared limiter per interface (or model), acquired and fed back by the
+    # callback handler
+    rate_limiter = get_rate_limiter(model_text, model_id)
+    if rate_limiter is not None:
+        callbacks.append(RateLimitCallbackHandler(rate_limiter))
+        if model_text == "openai":
+            model_kwargs["include_response_headers"] = True
+
+    # the chains retry, a retrying sdk client would multiply the attempts
+    if model_text in SDK_RETRY_INTERFACES:
+        model_kwargs["max_retries"] = 0
+
+    if model_text == "anthropic" and config.PROMPT_CACHE_ENABLED:
+        model_kwargs["default_headers"] = ANTHROPIC_PROMPT_CACHING_HEADERS
+
+    if model_text in HTTP_CLIENT_INTERFACES and config.CLIENT_POOL_ENABLED:
+        http_client, http_async_client = get_http_clients()
+        model_kwargs["http_client"] = http_client
+        model_kwargs["http_async_client"] = http_async_client
 
     model = model_class(
-        model=model_id, temperature=temperature, max_tokens=max_tokens, api_key=api_key
+        model=model_id,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        api_key=api_key,
+        callbacks=callbacks,
+        **model_kwargs,
     )
 
     return model
 
 
+def get_prompt_template(prompt) -> str:
+    """the raw template text of a prompt, used in the result cache key"""
+    if isinstance(prompt, ChatPromptTemplate):
+        return "\n".join(message.prompt.template for message in prompt.messages)
+    return prompt.template
+
+
+@lru_cache(maxsize=None)
+def get_eval_prompt(eval_type: str, structured_output: bool = False):
+    """prompt template of an eval type, built once and shared by the chains"""
+
+    # the structured prompts leave out the json schema, it is bound to the model
+    if structured_output:
+        jd_prompt = TWO_STAGE_EVAL_JD_STRUCTURED_PROMPT
+        cv_system_prompt = TWO_STAGE_EVAL_CV_STRUCTURED_SYSTEM_PROMPT
+        cv_batch_system_prompt = TWO_STAGE_EVAL_CV_BATCH_STRUCTURED_SYSTEM_PROMPT
+    else:
+        jd_prompt = TWO_STAGE_EVAL_JD_PROMPT
+        cv_system_prompt = TWO_STAGE_EVAL_CV_SYSTEM_PROMPT
+        cv_batch_system_prompt = TWO_STAGE_EVAL_CV_BATCH_SYSTEM_PROMPT
+
+    if eval_type == "jd":
+        return PromptTemplate(input_variables=["job_description"], template=jd_prompt)
+    # the job-specific system prompt is a stable prefix shared by all the
+    # resumes of a job, which providers can serve from their prompt cache
+    if eval_type == "cv":
+        return ChatPromptTemplate.from_messages(
+            [
+                ("system", cv_system_prompt),
+                ("human", TWO_STAGE_EVAL_CV_HUMAN_PROMPT),
+            ]
+        )
+    if eval_type == "cv_batch":
+        return ChatPromptTemplate.from_messages(
+            [
+                ("system", cv_batch_system_prompt),
+                ("human", TWO_STAGE_EVAL_CV_BATCH_HUMAN_PROMPT),
+            ]
+        )
+    raise ValueError("Invalid type")
+
+
 def get_eval_chain(
-    model_text: str, model_id: str, api_key: str = None, eval_type: str = "jd"
+    model_text: str,
+    model_id: str,
+    api_key: str = None,
+    eval_type: str = "jd",
+    structured_output: Optional[bool] = None,
 ):
 
     model_text = model_text.lower()
 
+    if structured_output is None:
+        structured_output = config.STRUCTURED_OUTPUT_ENABLED
+    if structured_output and model_text not in config.STRUCTURED_OUTPUT_INTERFACES:
+        logger.warning(
+            f"Structured output is not supported for {model_text}, using json prompts"
+        )
+        structured_output = False
+
     model = get_model(
         model_text=model_text,
         model_id=model_id,
@@ -63,25 +218,151 @@ def get_eval_chain(
         api_key=api_key,
     )
 
-    eval_prompts = {
-        "jd": PromptTemplate(
-            input_variables=["job_description"], template=TWO_STAGE_EVAL_JD_PROMPT
-        ),
-        "cv": PromptTemplate(
-            input_variables=["job_requirements", "resume"],
-            template=TWO_STAGE_EVAL_CV_PROMPT,
-        ),
+    output_schemas = {
+        "jd": JobAnalysis,
+        "cv": CVEvaluation,
+        "cv_batch": CVBatchEvaluation,
     }
 
-    eval_prompt = eval_prompts.get(eval_type)
+    eval_prompt = get_eval_prompt(eval_type, structured_output)
 
-    if eval_prompt is None:
-        raise ValueError("Invalid type")
+    if structured_output:
+        # tool calling, the output is a dict of the schema instead of free text
+        model = model.with_structured_output(get_json_schema(output_schemas[eval_type]))
 
-    grader = eval_prompt | model | JsonOutputParser()
+    # retry on 429 without a fixed wait, the rate limiter blocks until the backoff
+    # passes, and on connection and server errors
+    model = model.with_retry(
+        retry_if_exception_type=get_retryable_errors(),
+        stop_after_attempt=config.RATE_LIMIT_MAX_RETRIES + 1,
+        wait_exponential_jitter=False,
+    )
+
+    prompt = eval_prompt
+    if (
+        isinstance(eval_prompt, ChatPromptTemplate)
+        and model_text == "anthropic"
+        and config.PROMPT_CACHE_ENABLED
+    ):
+        # anthropic only caches up to an explicit breakpoint, openai caches
+        # the longest matching prefix by itself
+        prompt = eval_prompt | RunnableLambda(mark_system_cacheable)
+
+    # the batch entries are validated one by one in parse_batch_result
+    result_model = CVEvaluation if eval_type == "cv" else None
+    if structured_output:
+        if eval_type == "jd":
+            result_model = JobAnalysis
+        output_parser = RunnableLambda(
+            lambda result: validate_output(result, result_model)
+        )
+    else:
+        output_parser = TolerantJsonOutputParser(result_model=result_model)
+
+    # only the pair whose output is still invalid after repair is invoked again
+    grader = (prompt | model | output_parser).with_retry(
+        retry_if_exception_type=(OutputParserException,),
+        stop_after_attempt=config.PARSE_MAX_RETRIES + 1,
+        wait_exponential_jitter=False,
+    )
+
+    if config.LLM_CACHE_ENABLED:
+        grader = CachedGrader(
+            grader,
+            cache=get_result_cache(),
+            prompt_template=get_prompt_template(eval_prompt),
+            model_id=f"{model_text}/{model_id}",
+            temperature=config.TEMPERATURE,
+        )
 
     logger.info(
-        f"The eval_chain has been created. Model: {model_text}, Eval Type: {eval_type}"
+        f"The eval_chain has been created. Model: {model_text}, "
+        f"Eval Type: {eval_type}, Structured output: {structured_output}"
     )
 
     return (model_text, grader)
+
+
+def get_skill_match_chain() -> Tuple[str, SkillMatchGrader]:
+    """get the local skill-matching cv grader, a fast mode without api calls"""
+    logger.info("The skill matching eval_chain has been created.")
+    return ("local", SkillMatchGrader())
+
+
+def get_ensemble_chain(
+    model_text: str, model_id: str, api_key: str = None
+) -> Tuple[str, EnsembleGrader]:
+    """get a cv grader scoring with the selected model and config.ENSEMBLE_MODELS"""
+
+    models = [(model_text.lower(), model_id)]
+    for interface, ensemble_model_id in config.ENSEMBLE_MODELS:
+        if (interface.lower(), ensemble_model_id) not in models:
+            models.append((interface.lower(), ensemble_model_id))
+
+    # the api key of the run is for its own interface, the other interfaces
+    # use their key from the environment
+    model_tuples = [
+        (
+            f"{interface}/{ensemble_model_id}",
+            get_eval_chain(
+                interface,
+                ensemble_model_id,
+                api_key if interface == model_text.lower() else None,
+                eval_type="cv",
+            )[1],
+        )
+        for interface, ensemble_model_id in models
+    ]
+
+    logger.info(f"The ensemble eval_chain has been created. Models: {models}")
+
+    return (
+        "ensemble",
+        EnsembleGrader(
+            model_tuples,
+            aggregation=config.ENSEMBLE_AGGREGATION,
+            early_exit_agreement=config.ENSEMBLE_EARLY_EXIT_AGREEMENT,
+        ),
+    )
+
+
+def get_cascade_chain(
+    model_text: str,
+    model_id: str,
+    weights: CandidateEvaluationWeights,
+    api_key: str = None,
+) -> Tuple[str, CascadeGrader]:
+    """get a cv grader screening with config.CASCADE_SCREENING_MODEL and escalating
+    the uncertain results to the selected model"""
+
+    screening_interface, screening_model_id = config.CASCADE_SCREENING_MODEL
+    screening_api_key = (
+        api_key if screening_interface.lower() == model_text.lower() else None
+    )
+    screening_tuple = (
+        f"{screening_interface.lower()}/{screening_model_id}",
+        get_eval_chain(
+            screening_interface, screening_model_id, screening_api_key, "cv"
+        )[1],
+    )
+    strong_tuple = (
+        f"{model_text.lower()}/{model_id}",
+        get_eval_chain(model_text, model_id, api_key, eval_type="cv")[1],
+    )
+
+    logger.info(
+        f"The cascade eval_chain has been created. Screening: {screening_tuple[0]}, "
+        f"escalation: {strong_tuple[0]} on {config.CASCADE_ESCALATE_ON}"
+    )
+
+    return (
+        "cascade",
+        CascadeGrader(
+            screening_tuple,
+            strong_tuple,
+            weights,
+            escalate_on=config.CASCADE_ESCALATE_ON,
+            boundary_score=config.CASCADE_BOUNDARY_SCORE,
+            boundary_margin=config.CASCADE_BOUNDARY_MARGIN,
+        ),
+    )
@@ -0,0 +1,202 @@
+import asyncio
+import statistics
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from ..utils.async_utils import get_semaphore
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCORE_SECTIONS = (("resume_evaluation", "original_scores"), ("recalibrated_scores",))
+AGGREGATIONS = {"mean": statistics.fmean, "median": statistics.median}
+
+
+def _get(result: dict, path: Tuple[str, ...]) -> Any:
+    for key in path:
+        result = result.get(key) if isinstance(result, dict) else None
+    return result
+
+
+def _union(values: List[list]) -> list:
+    return list(dict.fromkeys(v for value in values for v in (value or [])))
+
+
+def majority_vote(votes: List[str]) -> str:
+    """the most common suitability, a tie is kept as "kiv" for a recruiter to review"""
+    counts = Counter(votes).most_common()
+    if not counts:
+        return ""
+    if len(counts) > 1 and counts[0][1] == counts[1][1]:
+        return "kiv"
+    return counts[0][0]
+
+
+def aggregate_results(
+    model_results: Dict[str, dict], aggregation: str = "mean"
+) -> dict:
+    """combine the results of several models into one result of the same schema.
+
+    Scores are aggregated with the mean or median, suitability by majority
+    vote, skills are the union over the models.
+    """
+    aggregate = AGGREGATIONS[aggregation]
+    results = list(model_results.values())
+
+    def scores(path):
+        skills = dict.fromkeys(k for r in results for k in (_get(r, path) or {}))
+        aggregated = {}
+        for skill in skills:
+            values = [
+                v
+                for r in results
+                if isinstance(v := (_get(r, path) or {}).get(skill), (int, float))
+            ]
+            aggregated[skill] = round(aggregate(values), 1) if values else None
+        return aggregated
+
+    suitability = majority_vote(
+        [_get(r, ("assessment", "suitability")) for r in results]
+    )
+
+    def assessments(key):
+        return "\n".join(
+            f"[{name}] {text}"
+            for name, result in model_results.items()
+            if (text := _get(result, ("assessment", key)))
+        )
+
+    return {
+        "resume_evaluation": {
+            "original_scores": scores(SCORE_SECTIONS[0]),
+            "missing_skills": _union(
+                [_get(r, ("resume_evaluation", "missing_skills")) for r in results]
+            ),
+        },
+        "deeper_analysis": {
+            "inferred_experience": _union(
+                [_get(r, ("deeper_analysis", "inferred_experience")) for r in results]
+            )
+        },
+        "recalibrated_scores": scores(SCORE_SECTIONS[1]),
+        "assessment": {
+            "suitability": suitability,
+            "strengths": assessments("strengths"),
+            "concerns": assessments("concerns"),
+        },
+    }
+
+
+class EnsembleGrader(Runnable[Dict[str, Any], dict]):
+    """score with several models concurrently and aggregate their results.
+
+    With early_exit_agreement, the models still running are cancelled once
+    that many models agree on the suitability.
+    """
+
+    def __init__(
+        self,
+        model_tuples: List[Tuple[str, Runnable]],
+        aggregation: str = "mean",
+        early_exit_agreement: Optional[int] = None,
+    ) -> None:
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Invalid aggregation: {aggregation}")
+
+        self.model_tuples = model_tuples
+        self.aggregation = aggregation
+        self.early_exit_agreement = early_exit_agreement
+
+    def invoke(
+        self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs
+    ) -> dict:
+        model_results, latencies = {}, {}
+        for model_name, grader in self.model_tuples:
+            start = time.monotonic()
+            try:
+                model_results[model_name] = grader.invoke(input, config, **kwargs)
+            except Exception as e:
+                logger.error(f"Ensemble model {model_name} failed. Error: {str(e)}")
+            latencies[model_name] = time.monotonic() - start
+        return self._aggregate(model_results, latencies, early_exit=False)
+
+    async def ainvoke(
+        self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs
+    ) -> dict:
+        async def evaluate(model_name, grader):
+            # bounded per interface, the model names are "interface/model_id"
+            async with get_semaphore(model_name.split("/")[0]):
+                start = time.monotonic()
+                try:
+                    result = await grader.ainvoke(input, config, **kwargs)
+                except Exception as e:
+                    logger.error(f"Ensemble model {model_name} failed. Error: {str(e)}")
+                    result = None
+                return model_name, result, time.monotonic() - start
+
+        tasks = [
+            asyncio.create_task(evaluate(model_name, grader))
+            for model_name, grader in self.model_tuples
+        ]
+        model_results, latencies = {}, {}
+        early_exit = False
+        try:
+            for task in asyncio.as_completed(tasks):
+                model_name, result, latency = await task
+                latencies[model_name] = latency
+                if result is not None:
+                    model_results[model_name] = result
+
+                votes = Counter(
+                    _get(r, ("assessment", "suitability"))
+                    for r in model_results.values()
+                )
+                if (
+                    self.early_exit_agreement
+                    and len(latencies) < len(tasks)
+                    and votes
+                    and votes.most_common(1)[0][1] >= self.early_exit_agreement
+                ):
+                    early_exit = True
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return self._aggregate(model_results, latencies, early_exit)
+
+    def _aggregate(
+        self,
+        model_results: Dict[str, dict],
+        latencies: Dict[str, float],
+        early_exit: bool,
+    ) -> dict:
+        if not model_results:
+            raise RuntimeError("All ensemble models failed.")
+
+        result = aggregate_results(model_results, self.aggregation)
+        votes = Counter(
+            _get(r, ("assessment", "suitability")) for r in model_results.values()
+        )
+        result["ensemble"] = {
+            "aggregation": self.aggregation,
+            "votes": dict(votes),
+            "early_exit": early_exit,
+            "models": {
+                model_name: {
+                    "latency_seconds": round(latencies[model_name], 3),
+                    "result": model_results.get(model_name),
+                }
+                for model_name in latencies
+            },
+        }
+
+        logger.info(
+            f"Ensemble of {len(model_results)}/{len(self.model_tuples)} models: "
+            f"votes {dict(votes)}, latencies "
+            f"{ {name: round(latency, 2) for name, latency in latencies.items()} }"
+        )
+        return result
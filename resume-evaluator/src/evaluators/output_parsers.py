@@ -0,0 +1,111 @@
+import json
+import re
+from typing import Any, Optional, Type
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import BaseOutputParser
+from langchain_core.utils.json_schema import dereference_refs
+from pydantic import BaseModel, ValidationError
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FENCED_BLOCK_PATTERN = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)```", re.S)
+TRAILING_COMMA_PATTERN = re.compile(r",(\s*[}\]])")
+# single-quoted keys and values, e.g. {'suitability': 'yes'}
+SINGLE_QUOTED_PATTERN = re.compile(r"(?<=[{\[,:\s])'((?:[^'\\\n]|\\.)*)'(?=\s*[:,}\]])")
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+def extract_json_text(text: str) -> str:
+    """the json part of a model output, from a fenced block or the outermost brackets"""
+    match = FENCED_BLOCK_PATTERN.search(text)
+    if match:
+        text = match.group(1)
+
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return text.strip()
+    start = min(starts)
+    end = text.rfind("}" if text[start] == "{" else "]")
+    return text[start : end + 1] if end > start else text[start:]
+
+
+def _outside_strings(text: str, repair) -> str:
+    """apply repair to the parts of the text that are not double-quoted strings"""
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', text)
+    return "".join(part if i % 2 else repair(part) for i, part in enumerate(parts))
+
+
+def repair_json(text: str) -> str:
+    """fix the usual llm json mistakes: smart and single quotes, python literals and
+    trailing commas"""
+    text = text.translate(SMART_QUOTES)
+    text = _outside_strings(
+        text,
+        lambda part: SINGLE_QUOTED_PATTERN.sub(
+            lambda m: json.dumps(m.group(1).replace("\\'", "'")), part
+        ),
+    )
+    text = _outside_strings(
+        text,
+        lambda part: re.sub(
+            r"\b(True|False|None)\b", lambda m: PYTHON_LITERALS[m.group(1)], part
+        ),
+    )
+    text = _outside_strings(text, lambda part: TRAILING_COMMA_PATTERN.sub(r"\1", part))
+    return text
+
+
+def parse_json(text: str) -> Any:
+    """parse a model output as json, repairing it if needed"""
+    json_text = extract_json_text(text)
+    try:
+        return json.loads(json_text)
+    except json.JSONDecodeError:
+        pass
+
+    try:
+        result = json.loads(repair_json(json_text))
+    except json.JSONDecodeError as e:
+        raise OutputParserException(
+            f"Invalid json output: {str(e)}", llm_output=text
+        ) from e
+    logger.warning("Repaired a malformed json output.")
+    return result
+
+
+def validate_output(result: Any, result_model: Optional[Type[BaseModel]]) -> Any:
+    """validate a parsed output against result_model, returned as a plain dict"""
+    if result_model is None:
+        return result
+
+    try:
+        return result_model.model_validate(result).model_dump()
+    except ValidationError as e:
+        raise OutputParserException(
+            f"Output does not match {result_model.__name__}: {str(e)}",
+            llm_output=str(result),
+        ) from e
+
+
+def get_json_schema(result_model: Type[BaseModel]) -> dict:
+    """inlined json schema of a result model, to bind as a tool for structured output"""
+    schema = dereference_refs(result_model.model_json_schema())
+    schema.pop("$defs", None)
+    return schema
+
+
+class TolerantJsonOutputParser(BaseOutputParser[Any]):
+    """json output parser that repairs malformed json, validated by result_model"""
+
+    result_model: Optional[Type[BaseModel]] = None
+
+    def parse(self, text: str) -> Any:
+        return validate_output(parse_json(text), self.result_model)
+
+    @property
+    def _type(self) -> str:
+        return "tolerant_json"
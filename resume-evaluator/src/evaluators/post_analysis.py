@@ -1,90 +1,158 @@
-import json
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict
+from typing import List, Optional, Union
 
 import pandas as pd
-from tqdm import tqdm
 
+from ..config import config
+from ..models.input_models import CandidateEvaluationWeights
 from ..utils.logger import get_logger
+from ..utils.results_store import ResultsStore
+from ..utils.score_table import ScoreTable
 
 logger = get_logger(__name__)
 
 
-def resume_evaluation(eval_results_folder: str) -> pd.DataFrame:
+SKILLS = ("technical_skills", "soft_skills", "experience", "education")
+
+# results table column -> path of the value in a cv evaluation result
+RESULT_COLUMNS = {
+    f"{score_type}_{skill}": f"{section}.{skill}"
+    for score_type, section in (
+        ("original", "resume_evaluation.original_scores"),
+        ("recalibrated", "recalibrated_scores"),
+    )
+    for skill in SKILLS
+}
+RESULT_COLUMNS.update(
+    {
+        "inferred_experience": "deeper_analysis.inferred_experience",
+        "suitability": "assessment.suitability",
+        "strengths": "assessment.strengths",
+        "concerns": "assessment.concerns",
+    }
+)
+SCORE_COLUMNS = [
+    f"{score_type}_{skill}"
+    for score_type in ("original", "recalibrated")
+    for skill in SKILLS
+]
+SCORE_TABLE_COLUMNS = ["job_id", "cv_id", "model_name", *RESULT_COLUMNS]
+# the texts shown with the results, not kept in the score table
+TEXT_COLUMNS = ["job_text", "cv_text", "job_analysis"]
+
+REQUIRED_SECTIONS = ("resume_evaluation", "recalibrated_scores", "assessment")
+
+
+def _join(value):
+    return ", ".join(map(str, value)) if isinstance(value, list) else value
+
+
+def flatten_result(job_id: str, cv_id: str, model_name: str, result: dict) -> dict:
+    """flatten a cv evaluation result into a row of the results table"""
+    row = {"job_id": job_id, "cv_id": cv_id, "model_name": model_name}
+    for column, path in RESULT_COLUMNS.items():
+        *sections, key = path.split(".")
+        value = result
+        for section in sections:
+            value = value[section]
+        row[column] = value.get(key, None)
+    row["inferred_experience"] = _join(row["inferred_experience"] or [])
+    return row
+
+
+def normalize_results(records: List[dict]) -> pd.DataFrame:
+    """build the results table from {job_id, cv_id, model_name, result} records in one pass"""
+    columns = SCORE_TABLE_COLUMNS
+    if not records:
+        return pd.DataFrame(columns=columns)
+
+    df = pd.json_normalize(records)
+    df = df.rename(
+        columns={f"result.{path}": column for column, path in RESULT_COLUMNS.items()}
+    ).reindex(columns=columns)
+    df["inferred_experience"] = df["inferred_experience"].map(_join)
+    return df
+
+
+def is_valid_result(result) -> bool:
+    return isinstance(result, dict) and all(
+        isinstance(result.get(k), dict) for k in REQUIRED_SECTIONS
+    )
+
+
+_score_tables: "OrderedDict[Path, ScoreTable]" = OrderedDict()
+_score_tables_lock = threading.Lock()
+
+
+def open_score_table(path: Union[str, Path]) -> ScoreTable:
+    """the persistent table of the flattened results of a run.
+
+    The writer and the readers of a run share one table, the least recently
+    used tables beyond config.SCORE_TABLE_CACHE_SIZE are read from disk again.
+    """
+    path = Path(path).resolve()
+    with _score_tables_lock:
+        score_table = _score_tables.get(path)
+        if score_table is None:
+            score_table = ScoreTable(
+                path,
+                columns=SCORE_TABLE_COLUMNS,
+                numeric_columns=SCORE_COLUMNS,
+                flush_rows=config.SCORE_TABLE_FLUSH_ROWS,
+            )
+            _score_tables[path] = score_table
+        _score_tables.move_to_end(path)
+        while len(_score_tables) > config.SCORE_TABLE_CACHE_SIZE:
+            _score_tables.popitem(last=False)
+        return score_table
+
+
+def resume_evaluation(
+    store: ResultsStore, job_id: Optional[str] = None
+) -> pd.DataFrame:
+    """the results table of all the cv results in the store, or of a single job"""
 
     logger.info("Start resume evaluation.")
 
-    results = []
-    errors = []
-
-    for file in tqdm(
-        Path(eval_results_folder).glob("*.json"),
-        total=len(list(Path(eval_results_folder).glob("*.json"))),
-        desc="Evaluating results",
-    ):
-        try:
-            file_name = file.stem
-            job_id, cv_id, model_name = file_name.split("_")
-            with open(file, "r") as f:
-                result = json.load(f)
-
-            data = {
-                "job_id": job_id,
-                "cv_id": cv_id,
-                "model_name": model_name,
-                "original_technical_skills": result["resume_evaluation"][
-                    "original_scores"
-                ].get("technical_skills", None),
-                "original_soft_skills": result["resume_evaluation"][
-                    "original_scores"
-                ].get("soft_skills", None),
-                "original_experience": result["resume_evaluation"][
-                    "original_scores"
-                ].get("experience", None),
-                "original_education": result["resume_evaluation"][
-                    "original_scores"
-                ].get("education", None),
-                "recalibrated_technical_skills": result["recalibrated_scores"].get(
-                    "technical_skills", None
-                ),
-                "recalibrated_soft_skills": result["recalibrated_scores"].get(
-                    "soft_skills", None
-                ),
-                "recalibrated_experience": result["recalibrated_scores"].get(
-                    "experience", None
-                ),
-                "recalibrated_education": result["recalibrated_scores"].get(
-                    "education", None
-                ),
-                "inferred_experience": ", ".join(
-                    result["deeper_analysis"].get("inferred_experience", [])
-                ),
-                "suitability": result["assessment"].get("suitability", None),
-                "strengths": result["assessment"].get("strengths", None),
-                "concerns": result["assessment"].get("concerns", None),
-            }
-
-            results.append(data)
-        except Exception as e:
-            errors.append({"file": str(file), "error": str(e)})
-            logger.error(f"Error processing {file}: {e}")
-
-    # Convert results to a DataFrame
-    df = pd.DataFrame(results)
+    records = []
+    for record in store.get_cv_results(job_id=job_id):
+        if is_valid_result(record["result"]):
+            records.append(record)
+        else:
+            logger.error(
+                f"Error processing {record['job_id']}_{record['cv_id']}_{record['model_name']}: "
+                f"missing one of {REQUIRED_SECTIONS}"
+            )
 
-    return df
+    return normalize_results(records)
 
 
 def calculate_fit_scores(
-    eval_results_folder: str, weights: Dict[str, float]
+    store: ResultsStore,
+    weights: CandidateEvaluationWeights,
+    score_table: Optional[ScoreTable] = None,
 ) -> pd.DataFrame:
+    """fit scores of all the results, read from the score table when one is given"""
 
     logger.info(
         f"""Calculating fit scores based on the weights. "technical_skills": {weights.technical_skills}, 
         "soft_skills": {weights.soft_skills}, "experience": {weights.experience}, "education": {weights.education}."""
     )
 
-    df = resume_evaluation(eval_results_folder)
+    if score_table is not None:
+        df = score_table.read()
+    else:
+        df = resume_evaluation(store)
+
+    return add_fit_scores(df, weights)
+
+
+def add_fit_scores(
+    df: pd.DataFrame, weights: CandidateEvaluationWeights
+) -> pd.DataFrame:
+    """add the weighted original and recalibrated overall scores to the results table"""
 
     weights = {
         "technical_skills": weights.technical_skills,
@@ -104,3 +172,31 @@ def calculate_fit_scores(
         )
 
     return df
+
+
+def read_results(
+    score_table: ScoreTable,
+    weights: CandidateEvaluationWeights,
+    texts: pd.DataFrame,
+) -> pd.DataFrame:
+    """the results table of a run, the fit scores computed from its score table
+    and the texts of each job-cv pair joined back"""
+    df = add_fit_scores(score_table.read(), weights)
+    texts = texts.reindex(columns=["job_id", "cv_id", *TEXT_COLUMNS]).astype(
+        {"job_id": "string", "cv_id": "string"}
+    )
+    return df.merge(texts, on=["job_id", "cv_id"], how="left")
+
+
+def score_result(
+    job_id: str,
+    cv_id: str,
+    model_name: str,
+    result: dict,
+    weights: CandidateEvaluationWeights,
+) -> dict:
+    """flatten a single cv evaluation result and add its fit scores"""
+    df = add_fit_scores(
+        pd.DataFrame([flatten_result(job_id, cv_id, model_name, result)]), weights
+    )
+    return df.iloc[0].to_dict()
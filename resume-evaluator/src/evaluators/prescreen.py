@@ -0,0 +1,125 @@
+import re
+from collections import Counter
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# keep skill tokens such as c++, c#, node.js or .net in one piece
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#.]*[a-z0-9+#]")
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def job_query(job_requirements: dict) -> List[str]:
+    """query terms of an analyzed job, the essential skills are counted twice"""
+    technical_skills = job_requirements.get("technical_skills") or {}
+
+    terms = []
+    for skill in technical_skills.get("essential") or []:
+        terms += tokenize(skill) * 2
+    for skill in technical_skills.get("advantageous") or []:
+        terms += tokenize(skill)
+    for skill in job_requirements.get("soft_skills") or []:
+        terms += tokenize(skill)
+    return terms
+
+
+def bm25_similarity(queries: List[List[str]], documents: List[List[str]]) -> np.ndarray:
+    """cosine similarity between the idf-weighted queries and the bm25-weighted documents.
+
+    Only the query vocabulary is indexed, returns a (queries x documents)
+    matrix of scores between 0 and 1.
+    """
+    vocabulary = {term: i for i, term in enumerate(sorted(set().union(*queries)))}
+    if not vocabulary or not documents:
+        return np.zeros((len(queries), len(documents)))
+
+    tf = np.zeros((len(documents), len(vocabulary)))
+    for row, document in enumerate(documents):
+        for term, count in Counter(document).items():
+            if term in vocabulary:
+                tf[row, vocabulary[term]] = count
+
+    lengths = np.array([len(document) for document in documents], dtype=float)
+    avg_length = lengths.mean() or 1.0
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((len(documents) - df + 0.5) / (df + 0.5))
+
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length)
+    doc_weights = idf * tf * (BM25_K1 + 1) / (tf + norm[:, None])
+
+    query_weights = np.zeros((len(queries), len(vocabulary)))
+    for row, query in enumerate(queries):
+        for term, count in Counter(query).items():
+            query_weights[row, vocabulary[term]] = count
+    query_weights *= idf
+
+    scores = query_weights @ doc_weights.T
+    denominator = np.outer(
+        np.linalg.norm(query_weights, axis=1), np.linalg.norm(doc_weights, axis=1)
+    )
+    return np.divide(
+        scores, denominator, out=np.zeros_like(scores), where=denominator > 0
+    )
+
+
+def select_pairs(
+    scores: np.ndarray, top_k: Optional[int] = None, min_score: float = 0.0
+) -> np.ndarray:
+    """boolean mask of the pairs that pass, the top_k cvs per job scoring at least min_score"""
+    mask = scores >= min_score
+    if top_k is not None and top_k < scores.shape[1]:
+        # rank of each cv within its job, ties keep the upload order
+        ranks = np.argsort(np.argsort(-scores, axis=1, kind="stable"), axis=1)
+        mask &= ranks < top_k
+    return mask
+
+
+def prescreen_pairs(
+    job_data: List[Tuple[str, dict]],
+    cv_data: List[Tuple[str, str]],
+    top_k: Optional[int] = None,
+    min_score: float = 0.0,
+) -> Tuple[Set[Tuple[str, str]], pd.DataFrame]:
+    """rank the cvs of each job by keyword relevance before llm scoring.
+
+    Returns the (job_id, cv_id) pairs to score and the table of all the
+    pre-screening scores.
+    """
+    scores = bm25_similarity(
+        [job_query(job_requirements) for _, job_requirements in job_data],
+        [tokenize(cv_text) for _, cv_text in cv_data],
+    )
+    mask = select_pairs(scores, top_k, min_score)
+
+    job_ids = [job_id for job_id, _ in job_data]
+    cv_ids = [cv_id for cv_id, _ in cv_data]
+    pairs = {
+        (job_ids[job_index], cv_ids[cv_index])
+        for job_index, cv_index in zip(*np.nonzero(mask))
+    }
+
+    prescreen_scores = pd.DataFrame(
+        {
+            "job_id": np.repeat(job_ids, len(cv_ids)),
+            "cv_id": np.tile(cv_ids, len(job_ids)),
+            "prescreen_score": scores.ravel(),
+            "selected": mask.ravel(),
+        }
+    )
+
+    logger.info(
+        f"Pre-screening kept {len(pairs)} of {scores.size} job-cv pairs "
+        f"(top_k: {top_k}, min_score: {min_score})"
+    )
+    return pairs, prescreen_scores
@@ -0,0 +1,362 @@
+import datetime
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# canonical skill -> other spellings of the same skill, each tool is a skill of
+# its own so that a job asking for one tool does not accept another
+SKILL_ALIASES: Dict[str, List[str]] = {
+    "python": ["python3"],
+    "javascript": ["js", "ecmascript"],
+    "node.js": ["nodejs", "node js"],
+    "react": ["react.js", "reactjs"],
+    "angular": ["angularjs", "angular.js"],
+    "vue": ["vue.js", "vuejs"],
+    "c++": ["cpp"],
+    "c#": ["csharp", "c sharp"],
+    ".net": ["dotnet"],
+    "asp.net": ["aspnet"],
+    "golang": ["go lang"],
+    "postgresql": ["postgres"],
+    "t-sql": ["tsql"],
+    "pl/sql": ["plsql"],
+    "mongodb": ["mongo"],
+    "aws": ["amazon web services"],
+    "gcp": ["google cloud", "google cloud platform"],
+    "azure": ["microsoft azure"],
+    "kubernetes": ["k8s"],
+    "ci/cd": ["cicd", "continuous integration", "continuous delivery"],
+    "machine learning": ["ml"],
+    "deep learning": ["neural networks"],
+    "artificial intelligence": ["ai"],
+    "natural language processing": ["nlp"],
+    "large language models": ["llm", "llms"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "pytorch": ["torch"],
+    "spark": ["pyspark", "apache spark"],
+    "power bi": ["powerbi"],
+    "data visualization": ["data visualisation"],
+    "statistics": ["statistical analysis", "statistical modeling"],
+    "rest api": ["restful", "api development"],
+    "communication": ["communicator", "communicating", "communicated"],
+    "teamwork": ["team player", "collaboration", "collaborative"],
+    "leadership": ["mentored", "mentoring"],
+    "problem solving": ["problem-solving", "troubleshooting"],
+}
+
+# broader skill -> tools that show it, a resume with the tool has the skill but
+# not the other way around
+SKILL_TOOLS: Dict[str, List[str]] = {
+    "sql": ["mysql", "postgresql", "sqlite", "t-sql", "pl/sql"],
+    "nosql": ["mongodb", "cassandra", "dynamodb"],
+    ".net": ["asp.net"],
+    "data visualization": ["tableau", "power bi"],
+    "git": ["github", "gitlab"],
+    "agile": ["scrum", "kanban"],
+}
+
+# words that carry no skill on their own, e.g. "strong", "experience with"
+GENERIC_WORDS = {
+    "a", "ability", "an", "and", "any", "at", "background", "basic", "be",
+    "demonstrated", "e.g", "etc", "excellent", "experience", "experienced", "expertise",
+    "familiar", "familiarity", "for", "frameworks", "good", "hands", "in", "including",
+    "knowledge", "least", "like", "of", "on", "or", "plus", "preferred", "proficiency",
+    "proficient", "proven", "skill", "skills", "solid", "strong", "such", "the", "to",
+    "tools", "understanding", "using", "verbal", "with", "working", "written", "year",
+    "years",
+}  # fmt: skip
+
+DEGREE_LEVELS: List[Tuple[int, re.Pattern]] = [
+    (4, re.compile(r"\b(?:ph\.?\s?d|doctorate|doctoral|d\.phil)\b")),
+    (3, re.compile(r"\b(?:master'?s?|m\.?sc|mba|m\.?eng|postgraduate)\b")),
+    (2, re.compile(r"\b(?:bachelor'?s?|b\.?sc|b\.?eng|undergrad\w*|degree)\b")),
+    (1, re.compile(r"\b(?:diploma|associate'?s?|certificate)\b")),
+]  # fmt: skip
+
+LEVEL_YEARS = {
+    "intern": 0,
+    "entry": 0,
+    "graduate": 0,
+    "junior": 1,
+    "mid": 3,
+    "intermediate": 3,
+    "senior": 5,
+    "lead": 7,
+    "staff": 7,
+    "principal": 8,
+}
+
+YEARS_PATTERN = re.compile(r"(?<!\d)(\d{1,2})\s*\+?\s*(?:years?|yrs?)")
+DATE_RANGE_PATTERN = re.compile(
+    r"((?:19|20)\d{2})\s*(?:-|–|—|to)\s*((?:19|20)\d{2}|present|current|now|date)"
+)
+
+_ALIAS_TO_SKILL = {
+    alias: skill
+    for skill in [*SKILL_ALIASES, *SKILL_TOOLS, *sum(SKILL_TOOLS.values(), [])]
+    for alias in [skill, *SKILL_ALIASES.get(skill, [])]
+}
+
+
+def _skill_variants(skill: str) -> List[str]:
+    """the spellings of a skill and of the tools that show it"""
+    variants = [skill, *SKILL_ALIASES.get(skill, [])]
+    for tool in SKILL_TOOLS.get(skill, []):
+        variants += [tool, *SKILL_ALIASES.get(tool, [])]
+    return variants
+
+
+def _term_pattern(variants: List[str], stem: bool = False) -> str:
+    """alternation of the variants, bounded so "java" does not match "javascript" """
+    alternation = "|".join(
+        re.escape(variant) for variant in sorted(set(variants), key=len, reverse=True)
+    )
+    end = r"[a-z]*" if stem else r"(?![a-z0-9+#]|\.[a-z0-9])"
+    # a dotted name is one word, "js" is not found in "react.js"
+    return rf"(?<![a-z0-9+#])(?<![a-z0-9]\.)(?:{alternation}){end}"
+
+
+# every known skill and alias, to find the skills named in a job requirement
+_KNOWN_SKILLS_PATTERN = re.compile(_term_pattern(list(_ALIAS_TO_SKILL)))
+
+PARENTHESES_PATTERN = re.compile(r"\((.*?)\)")
+
+
+def _word_pattern(word: str) -> str:
+    """a plain word, loosely stemmed so that "communication" matches "communicating" """
+    if len(word) > 5:
+        return _term_pattern([word[: max(5, len(word) - 3)]], stem=True)
+    return _term_pattern([word])
+
+
+def _text_patterns(text: str) -> Tuple[List[str], List[str]]:
+    """the patterns of the known skills and of the other words of a text"""
+    skill_patterns = []
+    for match in _KNOWN_SKILLS_PATTERN.finditer(text):
+        canonical = _ALIAS_TO_SKILL[match.group(0)]
+        skill_patterns.append(_term_pattern(_skill_variants(canonical)))
+
+    # the words that are not a known skill, e.g. "airflow" in "python and airflow"
+    word_patterns = []
+    remainder = _KNOWN_SKILLS_PATTERN.sub(" ", text)
+    for word in re.findall(r"[a-z0-9+#][a-z0-9+#.\-]*", remainder):
+        word = word.strip(".-")
+        if word and word not in GENERIC_WORDS and not word.isdigit():
+            word_patterns.append(_word_pattern(word))
+    return skill_patterns, word_patterns
+
+
+@lru_cache(maxsize=4096)
+def compile_skill(skill: str) -> Tuple[Tuple[re.Pattern, ...], bool]:
+    """compile a job requirement into the patterns to look for in a resume.
+
+    Returns the patterns and whether any of them is enough (a requirement such
+    as "AWS or GCP") rather than all of them. Skills listed in parentheses,
+    as in "cloud platforms (AWS, GCP, Azure)", are alternatives: one pattern
+    matching any of them, which replaces the words they are examples of.
+    """
+    text = skill.lower()
+    groups = PARENTHESES_PATTERN.findall(text)
+    text = PARENTHESES_PATTERN.sub(" ", text)
+    any_of = bool(re.search(r"\bor\b|/", re.sub(r"ci/cd|pl/sql", "", text)))
+
+    skill_patterns, word_patterns = _text_patterns(text)
+
+    # parentheses without a known skill are a note, e.g. "(3+ years)"
+    listed_patterns = []
+    for group in groups:
+        group_skill_patterns, group_word_patterns = _text_patterns(group)
+        if group_skill_patterns:
+            listed_patterns.append(
+                "|".join(
+                    f"(?:{pattern})"
+                    for pattern in group_skill_patterns + group_word_patterns
+                )
+            )
+    if listed_patterns:
+        word_patterns = []
+
+    patterns = skill_patterns + word_patterns + listed_patterns
+    return tuple(re.compile(pattern) for pattern in dict.fromkeys(patterns)), any_of
+
+
+def has_skill(skill: str, resume: str) -> bool:
+    """whether the lowercased resume shows the skill"""
+    patterns, any_of = compile_skill(skill)
+    if not patterns:
+        return False
+    found = (pattern.search(resume) for pattern in patterns)
+    return any(found) if any_of else all(found)
+
+
+def required_years(level_of_exp: str) -> Optional[int]:
+    """years of experience asked for by the job, None if not stated"""
+    text = str(level_of_exp or "").lower()
+    years = [int(y) for y in YEARS_PATTERN.findall(text)]
+    if years:
+        return min(years)
+    levels = [y for level, y in LEVEL_YEARS.items() if re.search(rf"\b{level}", text)]
+    return min(levels) if levels else None
+
+
+def candidate_years(resume: str) -> int:
+    """years of experience in the lowercased resume, stated or from employment dates"""
+    current_year = datetime.date.today().year
+    periods = []
+    for start, end in DATE_RANGE_PATTERN.findall(resume):
+        end = int(end) if end.isdigit() else current_year
+        if int(start) <= end <= current_year:
+            periods.append((int(start), end))
+
+    # merge overlapping periods
+    dated_years = 0
+    last_end = None
+    for start, end in sorted(periods):
+        if last_end is not None and start < last_end:
+            start = last_end
+        dated_years += max(0, end - start)
+        last_end = max(end, last_end or end)
+
+    stated_years = [int(y) for y in YEARS_PATTERN.findall(resume)]
+    return max([dated_years, *stated_years])
+
+
+def degree_level(text: str) -> Optional[int]:
+    """highest degree level found in the text, None if there is none"""
+    levels = [level for level, pattern in DEGREE_LEVELS if pattern.search(text)]
+    return max(levels) if levels else None
+
+
+def _fraction(matched: List[str], skills: List[str]) -> Optional[float]:
+    return len(matched) / len(skills) if skills else None
+
+
+def score_resume(job_requirements: Union[dict, str], resume: str) -> dict:
+    """score a resume against the job requirements without an llm.
+
+    The result has the schema of the cv prompt, the recalibrated scores are
+    the original ones since nothing is inferred.
+    """
+    if isinstance(job_requirements, str):
+        job_requirements = json.loads(job_requirements)
+    resume = resume.lower()
+
+    technical_skills = job_requirements.get("technical_skills") or {}
+    essential = [s for s in technical_skills.get("essential") or [] if s]
+    advantageous = [s for s in technical_skills.get("advantageous") or [] if s]
+    soft_skills = [s for s in job_requirements.get("soft_skills") or [] if s]
+
+    matched_essential = [s for s in essential if has_skill(s, resume)]
+    matched_advantageous = [s for s in advantageous if has_skill(s, resume)]
+    matched_soft_skills = [s for s in soft_skills if has_skill(s, resume)]
+    missing_skills = [s for s in essential if s not in matched_essential]
+
+    # essential skills weigh 80% of the technical score when both lists are given
+    essential_fraction = _fraction(matched_essential, essential)
+    advantageous_fraction = _fraction(matched_advantageous, advantageous)
+    if essential_fraction is not None and advantageous_fraction is not None:
+        technical_score = 0.8 * essential_fraction + 0.2 * advantageous_fraction
+    elif essential_fraction is not None:
+        technical_score = essential_fraction
+    elif advantageous_fraction is not None:
+        technical_score = advantageous_fraction
+    else:
+        technical_score = 1.0
+
+    soft_skills_fraction = _fraction(matched_soft_skills, soft_skills)
+    soft_skills_score = 1.0 if soft_skills_fraction is None else soft_skills_fraction
+
+    years_required = required_years(job_requirements.get("level_of_exp"))
+    years = candidate_years(resume)
+    if not years_required:
+        experience_score = 1.0 if years else 0.5
+    else:
+        experience_score = min(1.0, years / years_required)
+
+    # education is a threshold, the lowest degree accepted by the job
+    required_levels = [
+        degree_level(str(education).lower())
+        for education in job_requirements.get("education") or []
+    ]
+    education_required = min(
+        (level for level in required_levels if level is not None), default=None
+    )
+    education = degree_level(resume)
+    if education_required is None or (education or 0) >= education_required:
+        education_score = 1.0
+    elif education is None:
+        education_score = 0.3
+    else:
+        education_score = 0.5
+
+    scores = {
+        "technical_skills": round(100 * technical_score),
+        "soft_skills": round(100 * soft_skills_score),
+        "experience": round(100 * experience_score),
+        "education": round(100 * education_score),
+    }
+
+    # an unstated degree is left for the recruiter to check rather than ruled out
+    if (
+        scores["technical_skills"] < 70
+        or (education is not None and education_score < 1.0)
+        or len(missing_skills) > 2
+    ):
+        suitability = "no"
+    elif missing_skills or education_score < 1.0:
+        suitability = "kiv"
+    else:
+        suitability = "yes"
+
+    matched = matched_essential + matched_advantageous + matched_soft_skills
+    concerns = []
+    if missing_skills:
+        concerns.append(f"Missing essential skills: {', '.join(missing_skills)}.")
+    if years_required and years < years_required:
+        concerns.append(
+            f"About {years} of the {years_required} years of experience required."
+        )
+    if education is None and education_score < 1.0:
+        concerns.append("No degree found in the resume.")
+    elif education_score < 1.0:
+        concerns.append("Education below the job requirement.")
+
+    return {
+        "resume_evaluation": {
+            "original_scores": scores,
+            "missing_skills": missing_skills,
+        },
+        "deeper_analysis": {"inferred_experience": []},
+        "recalibrated_scores": dict(scores),
+        "assessment": {
+            "suitability": suitability,
+            "strengths": (
+                f"Matches {', '.join(matched)}."
+                if matched
+                else "No matching skills found."
+            ),
+            "concerns": " ".join(concerns) or "None found by skill matching.",
+        },
+    }
+
+
+class SkillMatchGrader(Runnable[Dict[str, Any], dict]):
+    """drop-in replacement of the cv grader that scores by skill matching"""
+
+    def invoke(
+        self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs
+    ) -> dict:
+        return score_resume(input["job_requirements"], input["resume"])
+
+    async def ainvoke(
+        self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs
+    ) -> dict:
+        # milliseconds of cpu, not worth a thread hop
+        return self.invoke(input, config, **kwargs)
@@ -1,13 +1,12 @@
-import json
-import os
-import time
-from typing import List, Tuple, Union
+import asyncio
+import contextlib
+from typing import Dict, List, Optional, Tuple, Union
 
 import pandas as pd
 from langchain_core.runnables import RunnableSequence
 
-from ..config import config
 from ..utils.logger import get_logger
+from ..utils.results_store import ResultsStore
 
 logger = get_logger(__name__)
 
@@ -15,7 +14,7 @@ logger = get_logger(__name__)
 def two_stage_eval_jd(
     model_tuples: List[Tuple[str, RunnableSequence]],
     job_tuple: Tuple[str, str],
-    output_dir: str,
+    store: ResultsStore,
 ) -> Union[pd.DataFrame, None]:
     model_results = {}
 
@@ -32,11 +31,8 @@ def two_stage_eval_jd(
             model_results[model_name] = result
 
             # save model result
-            json_file = os.path.join(output_dir, f"{job_id}_{model_name}.json")
-            with open(json_file, "w") as f:
-                json.dump(result, f, indent=4)
-                logger.info(f"Saved {model_name} result for job_id: {job_id}")
-            time.sleep(config.SLEEP_TIME)  # Add a small delay to avoid rate limiting
+            store.save_job_result(job_id, model_name, result)
+            logger.info(f"Saved {model_name} result for job_id: {job_id}")
 
         except Exception as e:
             error_msg = f"Error with {model_name} for job_id: {job_id}. Error: {str(e)}"
@@ -54,7 +50,7 @@ def two_stage_eval_cv(
     model_tuples: List[Tuple[str, RunnableSequence]],
     job_tuple: Tuple[str, str],
     cv_tuple: Tuple[str, str],
-    output_dir: str,
+    store: ResultsStore,
 ) -> Union[pd.DataFrame, None]:
 
     logger.info(f"Start two-stage evaluation for job description.")
@@ -73,10 +69,7 @@ def two_stage_eval_cv(
             model_results[model_name] = result
 
             # save model result
-            json_file = os.path.join(output_dir, f"{job_id}_{cv_id}_{model_name}.json")
-            with open(json_file, "w") as f:
-                json.dump(result, f, indent=4)
-            time.sleep(2.1)  # Add a small delay to avoid rate limiting
+            store.save_cv_result(job_id, cv_id, model_name, result)
 
         except Exception as e:
             error_msg = f"Error with {model_name} for job_id: {job_id}. Error: {str(e)}"
@@ -88,3 +81,51 @@ def two_stage_eval_cv(
         logger.error(error_msg)
         print(error_msg)
         return None
+
+
+async def atwo_stage_eval_cv(
+    model_tuples: List[Tuple[str, RunnableSequence]],
+    job_tuple: Tuple[str, str],
+    cv_tuple: Tuple[str, str],
+    store: ResultsStore,
+    semaphores: Optional[Dict[str, asyncio.Semaphore]] = None,
+) -> Union[Dict[str, dict], None]:
+    """async version of two_stage_eval_cv, bounded by a semaphore per interface"""
+
+    logger.info("Start async two-stage evaluation for job-cv pair.")
+
+    model_results = {}
+    semaphores = semaphores or {}
+
+    if isinstance(model_tuples, Tuple):
+        model_tuples = [model_tuples]
+
+    job_id, job_requirements = job_tuple
+    cv_id, cv = cv_tuple
+
+    async def evaluate(model_name, grader):
+        try:
+            async with semaphores.get(model_name, contextlib.nullcontext()):
+                result = await grader.ainvoke(
+                    {"job_requirements": job_requirements, "resume": cv}
+                )
+            model_results[model_name] = result
+            await asyncio.to_thread(
+                store.save_cv_result, job_id, cv_id, model_name, result
+            )
+
+        except Exception as e:
+            logger.error(
+                f"Error with {model_name} for job_id: {job_id}. Error: {str(e)}"
+            )
+
+    # the models of a pair are independent, wait for the slowest rather than the sum
+    await asyncio.gather(
+        *(evaluate(model_name, grader) for model_name, grader in model_tuples)
+    )
+
+    if not model_results:
+        logger.error(f"All models failed for job_id: {job_id}, cv_id: {cv_id}.")
+        return None
+
+    return model_results
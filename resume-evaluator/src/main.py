@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 from .app import create_gradio_app
+from .config import config
+from .utils.workspace import start_background_cleanup
 
 
 if __name__ == "__main__":
+    config.setup_directories()
+    start_background_cleanup()
     demo = create_gradio_app()
     demo.launch()
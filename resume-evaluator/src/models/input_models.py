@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Literal
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field, model_validator
 
@@ -27,3 +27,5 @@ class InputModel(BaseModel):
     interface: Literal["Groq", "OpenAI", "Anthropic"]
     model: Literal["llama3-70b-8192", "gpt-3.5-turbo", "gpt-4"]
     weights: CandidateEvaluationWeights
+    # usd, config.RUN_BUDGET_USD if not given
+    budget: Optional[float] = Field(default=None, gt=0)
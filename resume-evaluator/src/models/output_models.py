@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from typing import Any, List, Literal
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+
+class TechnicalSkills(BaseModel):
+    essential: List[str] = []
+    advantageous: List[str] = []
+
+
+class JobAnalysis(BaseModel):
+    """requirements extracted from a job description"""
+
+    model_config = ConfigDict(extra="allow")
+
+    technical_skills: TechnicalSkills = TechnicalSkills()
+    soft_skills: List[str] = []
+    level_of_exp: str = ""
+    education: List[str] = []
+
+
+class Scores(BaseModel):
+    technical_skills: float = Field(ge=0, le=100)
+    soft_skills: float = Field(ge=0, le=100)
+    experience: float = Field(ge=0, le=100)
+    education: float = Field(ge=0, le=100)
+
+
+class ResumeEvaluation(BaseModel):
+    original_scores: Scores
+    missing_skills: List[Any] = []
+
+
+class DeeperAnalysis(BaseModel):
+    inferred_experience: List[Any] = []
+
+
+class Assessment(BaseModel):
+    suitability: Literal["yes", "no", "kiv"]
+    strengths: str = ""
+    concerns: str = ""
+
+    @field_validator("suitability", mode="before")
+    @classmethod
+    def normalize_suitability(cls, value: Any) -> Any:
+        return value.strip().lower() if isinstance(value, str) else value
+
+    @field_validator("strengths", "concerns", mode="before")
+    @classmethod
+    def join_lists(cls, value: Any) -> Any:
+        if isinstance(value, list):
+            return " ".join(str(item) for item in value)
+        return "" if value is None else value
+
+
+class CVEvaluation(BaseModel):
+    """evaluation of a resume against the job requirements"""
+
+    # keeps the keys outside the schema, such as the cv_id of a batch entry
+    model_config = ConfigDict(extra="allow")
+
+    resume_evaluation: ResumeEvaluation
+    deeper_analysis: DeeperAnalysis = DeeperAnalysis()
+    recalibrated_scores: Scores
+    assessment: Assessment
+
+
+class CVBatchEntry(CVEvaluation):
+    cv_id: str
+
+
+class CVBatchEvaluation(BaseModel):
+    """evaluations of the resumes, one per resume"""
+
+    results: List[CVBatchEntry]
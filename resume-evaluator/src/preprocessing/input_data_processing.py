@@ -1,23 +1,111 @@
-import os
-from typing import List, Tuple
-from uuid import uuid4
+from __future__ import annotations
+
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-import gradio as gr
 import pandas as pd
 from langchain_core.runnables.base import RunnableSequence
 
 from ..config import config
-from ..evaluators.chains import get_eval_chain
-from ..evaluators.post_analysis import calculate_fit_scores
+from ..evaluators.batch_evaluators import CVBatcher, get_batch_token_budget
+from ..evaluators.cascade import CascadeGrader
+from ..evaluators.chains import (
+    get_cascade_chain,
+    get_ensemble_chain,
+    get_eval_chain,
+    get_skill_match_chain,
+)
+from ..evaluators.post_analysis import (
+    TEXT_COLUMNS,
+    open_score_table,
+    read_results,
+    score_result,
+)
+from ..evaluators.prescreen import prescreen_pairs
 from ..models.input_models import CandidateEvaluationWeights, InputModel
-from ..preprocessing.parsers.pdf_parser import process_pdfs
-from ..utils.helper import read_job_data, save_upload_file
+from ..preprocessing.parsers.pdf_parser import iter_pdfs
+from ..utils.async_utils import aiter_sync, iter_async
+from ..utils.cache import get_parsed_text_cache, get_result_cache, text_id
+from ..utils.estimate_cost import CostEstimate, estimate_run_cost
+from ..utils.helper import (
+    format_cost_estimate,
+    read_job_data,
+    read_job_tuples,
+    save_upload_file,
+)
+from ..utils.job_queue import get_job_queue
 from ..utils.logger import get_logger
-from ..utils.process_jobs import process_all_jobs, process_all_pairs
+from ..utils.process_jobs import astream_all_pairs, process_all_jobs
+from ..utils.results_store import ResultsStore
+from ..utils.usage_tracker import UsageTracker, usage_tracker_var
+from ..utils.workspace import RunWorkspace
+
+if TYPE_CHECKING:
+    import gradio as gr
 
 logger = get_logger(__name__)
 
 
+def validate_input(
+    text_input,
+    additional_text,
+    input_type,
+    api_key,
+    interface,
+    model,
+    technical_skills,
+    soft_skills,
+    experience,
+    education,
+    budget=None,
+) -> InputModel:
+    """validate the ui inputs, raises a ValueError"""
+
+    weights = CandidateEvaluationWeights(
+        technical_skills=technical_skills,
+        soft_skills=soft_skills,
+        experience=experience,
+        education=education,
+    )
+    return InputModel(
+        text_input=text_input,
+        additional_text=additional_text,
+        input_type=input_type,
+        api_key=api_key,
+        interface=interface,
+        model=model,
+        weights=weights,
+        # an empty or zero budget in the ui means no cap
+        budget=budget or None,
+    )
+
+
+def create_run(input_data: InputModel) -> RunWorkspace:
+    """create the workspace and the manifest of a new run"""
+    workspace = RunWorkspace.create()
+    workspace.write_manifest(
+        run_id=workspace.run_id,
+        status="running",
+        created_at=time.time(),
+        input=input_data.model_dump(exclude={"api_key"}),
+    )
+    return workspace
+
+
 def process_input(
     text_input,
     additional_text,
@@ -30,131 +118,703 @@ def process_input(
     soft_skills,
     experience,
     education,
-):
+    budget=None,
+) -> Iterator[Tuple[pd.DataFrame, str]]:
+    """yield (partial results, progress message) while the evaluation runs"""
 
     try:
-
         logger.info("Starting processing input data.")
-
-        # Validate input
-        weights = CandidateEvaluationWeights(
-            technical_skills=technical_skills,
-            soft_skills=soft_skills,
-            experience=experience,
-            education=education,
-        )
-        input_data = InputModel(
-            text_input=text_input,
-            additional_text=additional_text,
-            input_type=input_type,
-            api_key=api_key,
-            interface=interface,
-            model=model,
-            weights=weights,
+        input_data = validate_input(
+            text_input,
+            additional_text,
+            input_type,
+            api_key,
+            interface,
+            model,
+            technical_skills,
+            soft_skills,
+            experience,
+            education,
+            budget,
         )
     except ValueError as e:
         logger.error(f"process_input: Error validating input: {str(e)}")
-        return pd.DataFrame()
+        yield pd.DataFrame(), f"Error validating input: {str(e)}"
+        return
 
-    # JD EVALUATION
+    workspace = create_run(input_data)
+    try:
+        yield from stream_evaluation(input_data, file_upload, workspace)
+    finally:
+        workspace.close()
 
-    # get jd eval chain
-    logger.info("Starting JD evaluation.")
-    jd_grader_tuple = get_eval_chain(
-        input_data.interface,
-        input_data.model,
-        os.getenv("GROQ_API_KEY"),
-        eval_type="jd",
+
+def submit_evaluation(
+    text_input,
+    additional_text,
+    file_upload,
+    input_type,
+    api_key,
+    interface,
+    model,
+    technical_skills,
+    soft_skills,
+    experience,
+    education,
+    budget=None,
+) -> str:
+    """queue an evaluation in its own run workspace, returns the run id to poll.
+
+    The uploads are copied into the workspace right away, the worker parses
+    them from there as for a resumed run. Raises a ValueError on invalid input.
+    """
+
+    logger.info("Submitting input data.")
+    input_data = validate_input(
+        text_input,
+        additional_text,
+        input_type,
+        api_key,
+        interface,
+        model,
+        technical_skills,
+        soft_skills,
+        experience,
+        education,
+        budget,
     )
-    process_job_description(input_data, jd_grader_tuple)
 
-    logger.info("Starting CV evaluation.")
+    workspace = create_run(input_data)
+    if input_data.input_type == "File":
+        for file in file_upload or []:
+            if file.name.endswith(".pdf"):
+                save_upload_file(file, workspace.pdf_dir)
 
-    cv_data = process_cv_data(input_data, file_upload)
-    job_data = read_job_data()
-    job_tuples = pd.read_csv(f"{config.CSV_OUTPUT_DIR}/job_tuples.csv")
-    cv_grader_tuple = get_eval_chain(
-        input_data.interface,
-        input_data.model,
-        os.getenv("GROQ_API_KEY"),
-        eval_type="cv",
+    def run():
+        try:
+            yield from stream_evaluation(input_data, None, workspace)
+        finally:
+            workspace.close()
+
+    get_job_queue().submit(workspace.run_id, run)
+    return workspace.run_id
+
+
+def submit_resume(
+    run_id: str, api_key: str = "", budget: Optional[float] = None
+) -> str:
+    """queue the resumption of an interrupted run, returns its run id"""
+    get_job_queue().submit(run_id, lambda: resume_run(run_id, api_key, budget))
+    return run_id
+
+
+def resume_run(
+    run_id: str, api_key: str = "", budget: Optional[float] = None
+) -> Iterator[Tuple[pd.DataFrame, str]]:
+    """finish an interrupted run, only the job-cv pairs not done yet are scored again.
+
+    A budget replaces the one of the run, e.g. to finish a run stopped by its
+    budget.
+    """
+
+    try:
+        workspace = RunWorkspace.resume(run_id)
+        manifest_input = workspace.read_manifest()["input"]
+        if budget:
+            manifest_input["budget"] = budget
+        input_data = InputModel(**manifest_input, api_key=api_key or "")
+    except (KeyError, ValueError) as e:
+        logger.error(f"resume_run: Error resuming run {run_id}: {str(e)}")
+        yield pd.DataFrame(), f"Error resuming run {run_id}: {str(e)}"
+        return
+
+    workspace.write_manifest(
+        status="running", input=input_data.model_dump(exclude={"api_key"})
     )
-    evaluate_cv(cv_grader_tuple, job_data, cv_data)
+    try:
+        yield from stream_evaluation(input_data, None, workspace, resume=True)
+    finally:
+        workspace.close()
+
+
+@dataclass
+class EvaluationProgress:
+    """per-phase progress of an evaluation run"""
+
+    total_cvs: int = 0
+    parsed_cvs: int = 0
+    total_jobs: int = 0
+    scored_pairs: int = 0
+    failed_pairs: int = 0
+    screened_out_pairs: int = 0
+    escalated_pairs: int = 0
+    done: bool = False
+    # actual usage of the run, and its estimate once the cvs are parsed
+    usage: Optional[UsageTracker] = None
+    cost_estimates: List[CostEstimate] = field(default_factory=list)
+    # the estimate exceeded the budget, no cv was scored
+    budget_refused: bool = False
+
+    @property
+    def estimated_cost(self) -> float:
+        return sum(estimate.cost for estimate in self.cost_estimates)
+
+    @property
+    def budget_exceeded(self) -> bool:
+        return self.budget_refused or (
+            self.usage is not None and self.usage.budget_exceeded
+        )
+
+    def describe_cost(self) -> str:
+        if self.usage is None:
+            return ""
+        message = f" Cost: ${self.usage.cost:.4f}"
+        if self.cost_estimates:
+            message += f" (estimated ${self.estimated_cost:.4f})"
+        if self.usage.budget is not None:
+            message += f" of ${self.usage.budget:.2f}"
+        if self.budget_refused:
+            message += (
+                ", the estimate exceeds the budget, resume the run with a larger "
+                "budget to start it"
+            )
+        elif self.usage.budget_exceeded:
+            message += ", budget reached, resume the run to score the rest"
+        return message + "."
+
+    def describe(self) -> str:
+        if self.done:
+            message = f"Done. Scored {self.scored_pairs} job-cv pairs"
+            if self.failed_pairs:
+                message += f", {self.failed_pairs} failed"
+            if self.screened_out_pairs:
+                message += f", {self.screened_out_pairs} screened out"
+            if self.escalated_pairs:
+                message += (
+                    f", {self.escalated_pairs} escalated to the stronger model "
+                    f"({self.escalated_pairs / max(self.scored_pairs, 1):.0%})"
+                )
+            return message + "." + self.describe_cost()
+
+        message = f"Parsed {self.parsed_cvs}/{self.total_cvs} CVs. "
+        if not self.total_jobs:
+            return message + "Analyzing the job description..." + self.describe_cost()
+        return (
+            message
+            + f"Scored {self.scored_pairs}/{self.total_jobs * self.parsed_cvs - self.screened_out_pairs} job-cv pairs."
+            + self.describe_cost()
+        )
+
+
+def count_cvs(
+    input_data: InputModel,
+    file_upload: List[gr.FileData],
+    workspace: Optional[RunWorkspace] = None,
+) -> int:
+    if input_data.input_type == "File":
+        if not file_upload and workspace is not None:
+            # a resumed run parses the files saved in its workspace
+            return len(list(workspace.pdf_dir.glob("*.pdf")))
+        return len(file_upload or [])
+    return 1 if input_data.additional_text else 0
+
+
+def get_cv_model_names(input_data: InputModel) -> List[str]:
+    """the "interface/model" names scoring the cvs, chosen as in astream_evaluation"""
+    model_name = f"{input_data.interface.lower()}/{input_data.model}"
+    if config.CV_SCORING_MODE == "local":
+        return []
+    if config.CASCADE_ENABLED:
+        # an upper bound, as if every pair was escalated
+        interface, screening_model = config.CASCADE_SCREENING_MODEL
+        return [f"{interface.lower()}/{screening_model}", model_name]
+    model_names = [model_name]
+    for interface, ensemble_model in config.ENSEMBLE_MODELS:
+        if f"{interface.lower()}/{ensemble_model}" not in model_names:
+            model_names.append(f"{interface.lower()}/{ensemble_model}")
+    return model_names
 
-    eval_results = calculate_and_save_fit_scores(
-        input_data, cv_data, job_tuples, job_data
+
+def estimate_input_cost(
+    input_data: InputModel, cv_texts: List[str]
+) -> List[CostEstimate]:
+    """pre-flight estimate of the tokens and cost of evaluating the cvs"""
+    return estimate_run_cost(
+        input_data.text_input,
+        cv_texts,
+        jd_model=f"{input_data.interface.lower()}/{input_data.model}",
+        cv_models=get_cv_model_names(input_data),
+        cvs_per_job=config.PRESCREEN_TOP_K if config.PRESCREEN_ENABLED else None,
     )
 
+
+def write_cost_report(
+    workspace: RunWorkspace, progress: EvaluationProgress, duration: float
+) -> dict:
+    """write the actual usage of the run next to its estimate"""
+    report = {
+        "run_id": workspace.run_id,
+        "duration_seconds": duration,
+        "scored_pairs": progress.scored_pairs,
+        "failed_pairs": progress.failed_pairs,
+        **progress.usage.report(),
+        "estimate": [
+            {**asdict(estimate), "cost": estimate.cost}
+            for estimate in progress.cost_estimates
+        ],
+    }
+    # a resumed run keeps the usage of its earlier attempts
+    if workspace.cost_report_path.exists():
+        previous = json.loads(workspace.cost_report_path.read_text(encoding="utf-8"))
+        report["previous_attempts"] = previous.pop("previous_attempts", []) + [previous]
+    workspace.cost_report_path.parent.mkdir(parents=True, exist_ok=True)
+    workspace.cost_report_path.write_text(
+        json.dumps(report, indent=2), encoding="utf-8"
+    )
     logger.info(
-        f"processing completed. results saved in : {config.CSV_OUTPUT_DIR}, results type: {type(eval_results)}"
+        f"Run {workspace.run_id} cost ${report['total_cost']:.4f} "
+        f"({report['total_input_tokens']} input, "
+        f"{report['total_output_tokens']} output tokens), "
+        f"report saved in {workspace.cost_report_path}"
     )
+    return report
+
+
+def stream_evaluation(
+    input_data: InputModel,
+    file_upload: List[gr.FileData],
+    workspace: RunWorkspace,
+    resume: bool = False,
+    cost_estimates: Optional[List[CostEstimate]] = None,
+) -> Iterator[Tuple[pd.DataFrame, str]]:
+    """run the evaluation pipeline in the given run workspace, yield (partial results, progress message).
+
+    cost_estimates is the pre-flight estimate of the run when the caller already
+    made it, it is then not estimated again.
+    """
+
+    started_at = time.monotonic()
+    progress = EvaluationProgress(
+        total_cvs=count_cvs(input_data, file_upload, workspace),
+        usage=UsageTracker(budget=input_data.budget or config.RUN_BUDGET_USD),
+        cost_estimates=cost_estimates or [],
+    )
+    score_table = open_score_table(workspace.scores_dir)
+    if resume:
+        # the rows of the pairs already done are streamed again from the store
+        score_table.clear()
+    # the results are read from the score table, with the texts of each pair
+    texts = {}
+    last_update = time.monotonic()
+    last_message = progress.describe()
+
+    def results() -> pd.DataFrame:
+        return read_results(
+            score_table, input_data.weights, pd.DataFrame(list(texts.values()))
+        )
+
+    yield pd.DataFrame(), last_message
+
+    for row in iter_async(
+        astream_evaluation(input_data, file_upload, workspace, progress, resume),
+        timeout=config.UI_UPDATE_INTERVAL,
+    ):
+        if row is not None:
+            score_table.append(row)
+            texts[(row["job_id"], row["cv_id"])] = {
+                column: row[column] for column in ["job_id", "cv_id", *TEXT_COLUMNS]
+            }
+        if time.monotonic() - last_update < config.UI_UPDATE_INTERVAL:
+            continue
+
+        # only push an update when something changed
+        last_update = time.monotonic()
+        if row is not None or progress.describe() != last_message:
+            last_message = progress.describe()
+            yield results(), last_message
+
+    score_table.flush()
+    eval_results = results()
+    eval_results.to_csv(f"{workspace.csv_dir}/fit_scores_with_text.csv", index=False)
+
+    if config.LLM_CACHE_ENABLED:
+        logger.info(f"LLM result cache stats: {get_result_cache().stats()}")
+
+    logger.info(
+        f"processing completed. results saved in : {workspace.csv_dir}, results type: {type(eval_results)}"
+    )
+    write_cost_report(workspace, progress, time.monotonic() - started_at)
+    # a run stopped by its budget stays resumable
+    workspace.write_manifest(
+        status="budget_exceeded" if progress.budget_exceeded else "done"
+    )
+    progress.done = True
+    yield eval_results, progress.describe()
+
+
+def rerank_run(
+    run_id: str, results_df: pd.DataFrame, weights: CandidateEvaluationWeights
+) -> pd.DataFrame:
+    """the results of a run with the fit scores recomputed from its score table,
+    results_df gives the texts of the pairs"""
+    score_table = open_score_table(RunWorkspace.open(run_id).scores_dir)
+    texts = results_df.drop_duplicates(["job_id", "cv_id"])
+    return read_results(score_table, weights, texts)
+
+
+def run_evaluation(
+    input_data: InputModel,
+    file_upload: List[gr.FileData],
+    workspace: RunWorkspace,
+    resume: bool = False,
+) -> pd.DataFrame:
+    """run the evaluation pipeline in the given run workspace, returns the final results"""
+
+    eval_results = pd.DataFrame()
+    for eval_results, _ in stream_evaluation(
+        input_data, file_upload, workspace, resume
+    ):
+        pass
     return eval_results
 
 
+async def astream_evaluation(
+    input_data: InputModel,
+    file_upload: List[gr.FileData],
+    workspace: RunWorkspace,
+    progress: Optional[EvaluationProgress] = None,
+    resume: bool = False,
+) -> AsyncIterator[dict]:
+    """stream the scored rows of the results table as each job-cv pair completes.
+
+    The CVs are parsed while the job description is analyzed, and each parsed
+    CV is dispatched for scoring against the analyzed jobs right away. With
+    resume, the stored job analysis and the results of the pairs already done
+    are reused.
+    """
+
+    progress = progress or EvaluationProgress(
+        total_cvs=count_cvs(input_data, file_upload, workspace)
+    )
+    # every model call made from this run's task and the tasks and threads it
+    # starts is recorded by its tracker
+    if progress.usage is not None:
+        usage_tracker_var.set(progress.usage)
+
+    # the models use the key of this run, never one set by another run
+    jd_grader_tuple = get_eval_chain(
+        input_data.interface,
+        input_data.model,
+        input_data.api_key,
+        eval_type="jd",
+    )
+    if config.CV_SCORING_MODE == "local":
+        cv_grader_tuple = get_skill_match_chain()
+    elif config.CASCADE_ENABLED:
+        cv_grader_tuple = get_cascade_chain(
+            input_data.interface,
+            input_data.model,
+            input_data.weights,
+            input_data.api_key,
+        )
+    elif config.ENSEMBLE_MODELS:
+        cv_grader_tuple = get_ensemble_chain(
+            input_data.interface, input_data.model, input_data.api_key
+        )
+    else:
+        cv_grader_tuple = get_eval_chain(
+            input_data.interface,
+            input_data.model,
+            input_data.api_key,
+            eval_type="cv",
+        )
+    cv_batch_grader_tuple = None
+    # batches are scored by a single model
+    if (
+        config.CV_BATCH_SCORING
+        and config.CV_SCORING_MODE != "local"
+        and not config.CASCADE_ENABLED
+        and not config.ENSEMBLE_MODELS
+    ):
+        cv_batch_grader_tuple = get_eval_chain(
+            input_data.interface,
+            input_data.model,
+            input_data.api_key,
+            eval_type="cv_batch",
+        )
+
+    # the job and cv results of the run
+    store = ResultsStore(workspace.results_db)
+
+    # JD EVALUATION, in the background while the CVs are parsed
+    if resume and await asyncio.to_thread(store.get_job_results):
+        logger.info("Reusing the stored JD evaluation.")
+        jd_task = asyncio.create_task(
+            asyncio.to_thread(read_job_tuples, workspace.csv_dir)
+        )
+    else:
+        logger.info("Starting JD evaluation.")
+        jd_task = asyncio.create_task(
+            asyncio.to_thread(
+                process_job_description, input_data, jd_grader_tuple, workspace, store
+            )
+        )
+
+    parsed_cvs = asyncio.Queue()
+    cv_texts = []
+
+    async def parse_cvs():
+        try:
+            cv_data = iter_cv_data(input_data, file_upload, workspace)
+            async for cv in aiter_sync(cv_data):
+                progress.parsed_cvs += 1
+                cv_texts.append(cv[1])
+                await parsed_cvs.put(cv)
+        finally:
+            await parsed_cvs.put(None)
+
+    async def cv_stream():
+        while (cv := await parsed_cvs.get()) is not None:
+            yield cv
+
+    parser_task = asyncio.create_task(parse_cvs())
+
+    try:
+        job_texts = dict(await jd_task)
+        job_data = await asyncio.to_thread(read_job_data, store)
+        progress.total_jobs = len(job_data)
+
+        batcher = None
+        if cv_batch_grader_tuple is not None:
+            batcher = CVBatcher(
+                token_budget=get_batch_token_budget(input_data.model, job_data),
+                output_tokens_per_cv=config.CV_BATCH_OUTPUT_TOKENS_PER_CV,
+                max_batch_size=config.CV_BATCH_MAX_SIZE,
+                max_cv_tokens=config.CV_BATCH_MAX_CV_TOKENS,
+            )
+
+        # with a budget or the pre-screening, all the cvs are parsed before any
+        # is scored, otherwise they are scored as they are parsed
+        cvs = cv_stream()
+        budget = progress.usage.budget if progress.usage is not None else None
+        if budget is not None or config.PRESCREEN_ENABLED:
+            cv_data = [cv async for cv in cvs]
+            cvs = aiter_sync(cv_data)
+
+        # PRE-FLIGHT, a run expected to cost more than its budget is refused
+        # before the first cv call, as in the cli. A resumed run only counts
+        # the cvs it has left to score
+        if budget is not None:
+            if not progress.cost_estimates:
+                done_pairs = (
+                    set(await asyncio.to_thread(store.get_pair_states, "done"))
+                    if resume
+                    else set()
+                )
+                pending_cv_texts = [
+                    cv_text
+                    for cv_id, cv_text in cv_data
+                    if any(
+                        (job_id, cv_id) not in done_pairs for job_id, _ in job_data
+                    )
+                ]
+                progress.cost_estimates = await asyncio.to_thread(
+                    estimate_input_cost, input_data, pending_cv_texts
+                )
+            if progress.estimated_cost > budget:
+                logger.warning(
+                    f"Run {workspace.run_id} not started, its estimated cost "
+                    f"${progress.estimated_cost:.4f} exceeds its budget ${budget:.2f}"
+                )
+                progress.budget_refused = True
+                return
+
+        # PRE-SCREENING, ranking the cvs of a job needs all of them parsed
+        pairs = None
+        if config.PRESCREEN_ENABLED:
+            pairs, prescreen_scores = prescreen_pairs(
+                job_data,
+                cv_data,
+                top_k=config.PRESCREEN_TOP_K,
+                min_score=config.PRESCREEN_MIN_SCORE,
+            )
+            prescreen_scores.to_csv(
+                f"{workspace.csv_dir}/prescreen_scores.csv", index=False
+            )
+            progress.screened_out_pairs = len(job_data) * len(cv_data) - len(pairs)
+
+        # CV EVALUATION, fit scores are computed as the results land
+        logger.info("Starting CV evaluation.")
+        async for job, cv, model_results in astream_all_pairs(
+            cv_grader_tuple,
+            job_data,
+            cvs,
+            store,
+            batch_model_tuples=cv_batch_grader_tuple,
+            batcher=batcher,
+            pairs=pairs,
+            resume=resume,
+        ):
+            job_id, job_analysis = job
+            cv_id, cv_text = cv
+            progress.scored_pairs += 1
+            if not model_results:
+                progress.failed_pairs += 1
+            for model_name, result in (model_results or {}).items():
+                if (result.get("cascade") or {}).get("escalated"):
+                    progress.escalated_pairs += 1
+                try:
+                    row = score_result(
+                        job_id, cv_id, model_name, result, input_data.weights
+                    )
+                except Exception as e:
+                    logger.error(f"Error scoring {job_id}_{cv_id}_{model_name}: {e}")
+                    continue
+
+                row["job_text"] = job_texts.get(job_id)
+                row["cv_text"] = cv_text
+                row["job_analysis"] = job_analysis
+                yield row
+
+        if isinstance(cv_grader_tuple[1], CascadeGrader):
+            cascade_grader = cv_grader_tuple[1]
+            logger.info(
+                f"Cascade escalated {cascade_grader.escalated} of "
+                f"{cascade_grader.scored} job-cv pairs "
+                f"({cascade_grader.escalation_rate:.1%})"
+            )
+
+        # surface errors raised while parsing
+        await parser_task
+
+        # without a budget, the estimate of the whole run is only used to
+        # compare with its actual usage
+        if not progress.cost_estimates:
+            try:
+                progress.cost_estimates = await asyncio.to_thread(
+                    estimate_input_cost, input_data, cv_texts
+                )
+            except Exception as e:
+                logger.warning(f"Could not estimate the cost of the run: {str(e)}")
+    finally:
+        parser_task.cancel()
+        store.close()
+
+
 def process_job_description(
-    input_data: InputModel, jd_grader_tuple: Tuple[str, RunnableSequence]
-) -> None:
-    """process the job description"""
+    input_data: InputModel,
+    jd_grader_tuple: Tuple[str, RunnableSequence],
+    workspace: RunWorkspace,
+    store: ResultsStore,
+) -> List[Tuple[str, str]]:
+    """process the job description, returns the (job_id, job_text) tuples"""
 
     logger.info("Processing all jobs.")
 
-    process_all_jobs(
+    return process_all_jobs(
         model_tuples=jd_grader_tuple,
         job_text=input_data.text_input,
-        output_dir=config.JOBS_OUTPUT_DIR,
+        store=store,
+        csv_output_dir=workspace.csv_dir,
     )
 
 
-def process_cv_data(input_data: InputModel, file_upload: List[gr.FileData]) -> None:
-    """process the cv data"""
+def iter_pdf_dir(pdf_dir: Union[str, Path]) -> Iterator[Tuple[str, str]]:
+    """parse the pdfs of a directory with the configured limits and text cache"""
+    return iter_pdfs(
+        pdf_dir,
+        max_workers=config.PDF_PARSER_MAX_WORKERS,
+        timeout=config.PDF_PARSER_TIMEOUT,
+        max_file_size=config.PDF_MAX_FILE_SIZE_BYTES,
+        max_pages=config.PDF_MAX_PAGES,
+        text_cache=get_parsed_text_cache(),
+    )
+
+
+def read_cv_texts(input_data: InputModel, file_upload: List[gr.FileData]) -> List[str]:
+    """parse the cvs of the inputs outside of a run, the parsed text cache lets
+    the run reuse them"""
+    if input_data.input_type == "Text":
+        return [input_data.additional_text] if input_data.additional_text else []
+
+    with tempfile.TemporaryDirectory() as pdf_dir:
+        for file in file_upload or []:
+            if file.name.endswith(".pdf"):
+                shutil.copy(file, pdf_dir)
+        return [cv_text for _, cv_text in iter_pdf_dir(pdf_dir)]
+
+
+def estimate_evaluation(
+    text_input,
+    additional_text,
+    file_upload,
+    input_type,
+    api_key,
+    interface,
+    model,
+    technical_skills,
+    soft_skills,
+    experience,
+    education,
+    budget=None,
+) -> str:
+    """pre-flight cost estimate of the ui inputs as markdown, with the cost of the
+    same run on the other priced models. Raises a ValueError on invalid input."""
+
+    input_data = validate_input(
+        text_input,
+        additional_text,
+        input_type,
+        api_key,
+        interface,
+        model,
+        technical_skills,
+        soft_skills,
+        experience,
+        education,
+        budget,
+    )
+    cv_texts = read_cv_texts(input_data, file_upload)
+    alternatives = {
+        model_name: sum(
+            estimate.cost
+            for estimate in estimate_run_cost(
+                input_data.text_input, cv_texts, model_name, [model_name]
+            )
+        )
+        for model_name in config.MODEL_PRICES
+        if "/" in model_name
+    }
+    return format_cost_estimate(
+        estimate_input_cost(input_data, cv_texts),
+        budget=input_data.budget or config.RUN_BUDGET_USD,
+        alternatives=alternatives,
+    )
+
+
+def iter_cv_data(
+    input_data: InputModel, file_upload: List[gr.FileData], workspace: RunWorkspace
+) -> Iterator[Tuple[str, str]]:
+    """yield the (cv_id, cv_text) tuples as each cv is parsed"""
 
     logger.info("Processing all CVs.")
 
     if input_data.input_type == "Text" and input_data.additional_text:
-        return [(str(uuid4()), input_data.additional_text)]
-    elif input_data.input_type == "File" and file_upload is not None:
+        yield (text_id(input_data.additional_text), input_data.additional_text)
+    elif input_data.input_type == "File":
         try:
-            for file in file_upload:
+            # a resumed run has no uploads, its files are already in the workspace
+            for file in file_upload or []:
                 if file.name.endswith(".pdf"):
-                    save_upload_file(file)
-            cv_data = process_pdfs(config.PDF_UPLOAD_FOLDER)
-            cv_data = [(str(uuid4()), cv) for cv in cv_data]
-            return cv_data
+                    save_upload_file(file, workspace.pdf_dir)
+            yield from iter_pdf_dir(workspace.pdf_dir)
         except Exception as e:
             logger.error(f"Error processing file: {str(e)}")
             raise e
 
 
-def calculate_and_save_fit_scores(
-    input_data: InputModel,
-    cv_data: List[Tuple[str, str]],
-    job_tuple: List[Tuple[str, dict]],
-    job_data: List[Tuple[str, dict]],
-) -> pd.DataFrame:
-    """Calculate the fit scores"""
-    fit_scores_df = calculate_fit_scores(config.CV_OUTPUT_DIR, input_data.weights)
-
-    cv_df = pd.DataFrame(cv_data, columns=["cv_id", "cv_text"])
-    jd_df = pd.DataFrame(job_tuple, columns=["job_id", "job_text"])
-    job_df = pd.DataFrame(job_data, columns=["job_id", "job_analysis"])
-
-    fit_scores_df = pd.merge(fit_scores_df, jd_df, on="job_id", how="left")
-    fit_scores_df = pd.merge(fit_scores_df, cv_df, on="cv_id", how="left")
-    fit_scores_df = pd.merge(fit_scores_df, job_df, on="job_id", how="left")
-    fit_scores_df.to_csv(
-        f"{config.CSV_OUTPUT_DIR}/fit_scores_with_text.csv", index=False
-    )
-    logger.info("Fit scores calculated and saved.")
-    return fit_scores_df
-
-
-def evaluate_cv(
-    cv_grader_tuple: Tuple[str, RunnableSequence],
-    job_data: List[Tuple[str, dict]],
-    cv_data: List[Tuple[str, str]],
-) -> pd.DataFrame:
-    """Evaluate the CVs"""
-    logger.info("Evaluating all CVs.")
-    process_all_pairs(
-        cv_grader_tuple, job_data, cv_data, output_dir=config.CV_OUTPUT_DIR
-    )
+def process_cv_data(
+    input_data: InputModel, file_upload: List[gr.FileData], workspace: RunWorkspace
+) -> List[Tuple[str, str]]:
+    """process the cv data"""
+    return list(iter_cv_data(input_data, file_upload, workspace))
@@ -1,30 +1,300 @@
 # read all files
+import hashlib
+import multiprocessing
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import time
+from collections import deque
+from multiprocessing import connection
 from pathlib import Path
-from typing import List, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
+import pypdf
 from pypdf import PdfReader
 from tqdm import tqdm
 
+from ...utils.logger import get_logger
 
-def parse_pdf(file_path):
+logger = get_logger(__name__)
+
+# bump when the extraction logic changes so that cached text is re-extracted
+EXTRACTOR_VERSION = f"pypdf-{pypdf.__version__}/1"
+
+
+def file_sha256(file_path: Union[str, Path]) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def content_id(sha256: str) -> str:
+    """stable cv id derived from a content hash"""
+    return sha256[:16]
+
+
+def _parse_pdf_pages(
+    file_path, max_pages: Optional[int] = None, timeout: Optional[float] = None
+) -> Tuple[List[str], bool]:
+    """extract the text page by page, returns the pages and whether the timeout was hit"""
+    deadline = time.monotonic() + timeout if timeout else None
     reader = PdfReader(file_path)
-    return [page.extract_text() for page in reader.pages]
 
+    pages = []
+    for page_number, page in enumerate(reader.pages):
+        if max_pages is not None and page_number >= max_pages:
+            logger.warning(f"{file_path}: truncated to the first {max_pages} pages")
+            break
+        if deadline is not None and time.monotonic() > deadline:
+            logger.warning(f"{file_path}: timed out after {page_number} pages")
+            return pages, True
+        pages.append(page.extract_text())
+    return pages, False
+
+
+def parse_pdf(
+    file_path, max_pages: Optional[int] = None, timeout: Optional[float] = None
+) -> List[str]:
+    """extract the text page by page, stopping at max_pages or once timeout has passed"""
+    pages, _ = _parse_pdf_pages(file_path, max_pages, timeout)
+    return pages
+
+
+# a document still running timeout * HARD_TIMEOUT_FACTOR seconds after its worker
+# picked it up has its worker killed, parse_pdf stops by itself between pages
+HARD_TIMEOUT_FACTOR = 2
+
+
+def _worker_loop(conn) -> None:
+    """run the (func, args) tasks received on conn one at a time, sending back
+    None once a task starts, then (result, error)"""
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+
+        # a new worker takes a while to import, the timeout starts from here
+        conn.send(None)
+        func, args = task
+        try:
+            reply = (func(*args), None)
+        except Exception as e:
+            # the exception itself may not pickle
+            reply = (None, f"{type(e).__name__}: {e}")
+        conn.send(reply)
+
+
+class _Worker:
+    """a parser process and the pipe its tasks are sent on"""
+
+    def __init__(self, context) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_loop, args=(child_conn,), name="pdf-parser", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    """spawn-based worker processes, started on demand up to max_workers and
+    reused across calls. Unlike a ProcessPoolExecutor, a task that exceeds its
+    timeout has its worker killed and replaced, and only the tasks a worker has
+    picked up are timed.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max_workers
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: List[_Worker] = []
+        self._workers = 0
+        self._condition = threading.Condition()
+
+    def _checkout(self, block: bool) -> Optional[_Worker]:
+        """an idle or new worker, None if there is none and not block"""
+        with self._condition:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._workers < self.max_workers:
+                    self._workers += 1
+                    break
+                if not block:
+                    return None
+                self._condition.wait()
+
+        try:
+            return _Worker(self._context)
+        except BaseException:
+            with self._condition:
+                self._workers -= 1
+                self._condition.notify()
+            raise
+
+    def _checkin(self, worker: _Worker) -> None:
+        with self._condition:
+            self._idle.append(worker)
+            self._condition.notify()
+
+    def _discard(self, worker: _Worker) -> None:
+        worker.kill()
+        with self._condition:
+            self._workers -= 1
+            self._condition.notify()
+
+    def imap_unordered(
+        self,
+        func: Callable,
+        tasks: Dict[Any, tuple],
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Tuple[Any, Any, Optional[str]]]:
+        """run func(*args) for each {key: args} of tasks on up to max_workers
+        workers, yield (key, result, error) as each task finishes, fails or
+        times out"""
+        queued = deque(tasks.items())
+        max_workers = min(max_workers or self.max_workers, self.max_workers)
+        # conn: (worker, key, started at, None until the worker picks it up)
+        running: Dict[Any, Tuple[_Worker, Any, Optional[float]]] = {}
+        try:
+            while queued or running:
+                while queued and len(running) < max_workers:
+                    worker = self._checkout(block=not running)
+                    if worker is None:
+                        break
+                    key, args = queued.popleft()
+                    try:
+                        worker.conn.send((func, args))
+                    except (OSError, ValueError):
+                        self._discard(worker)
+                        yield key, None, "the worker exited"
+                        continue
+                    running[worker.conn] = (worker, key, None)
+
+                for conn in connection.wait(list(running), timeout=0.5):
+                    worker, key, _ = running[conn]
+                    try:
+                        reply = conn.recv()
+                    except (EOFError, OSError):
+                        # the worker crashed, e.g. out of memory
+                        del running[conn]
+                        self._discard(worker)
+                        yield key, None, "the worker exited"
+                        continue
+                    if reply is None:
+                        running[conn] = (worker, key, time.monotonic())
+                        continue
+                    del running[conn]
+                    self._checkin(worker)
+                    yield (key, *reply)
+
+                if timeout is None:
+                    continue
+                now = time.monotonic()
+                for conn, (worker, key, started) in list(running.items()):
+                    if started is not None and now - started > timeout:
+                        del running[conn]
+                        self._discard(worker)
+                        yield key, None, f"timed out after {timeout:.0f}s"
+        finally:
+            # the caller stopped early, the tasks still running are killed
+            for worker, _, _ in running.values():
+                self._discard(worker)
+
+    def shutdown(self) -> None:
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._workers -= len(idle)
+        for worker in idle:
+            worker.kill()
+
+
+_worker_pool: Optional[WorkerPool] = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_worker_pool(max_workers: Optional[int] = None) -> WorkerPool:
+    """process-wide parser pool, sized by max_workers (one per cpu if None) when
+    first created"""
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = WorkerPool(max_workers or os.cpu_count() or 1)
+        return _worker_pool
+
+
+def iter_pdfs(
+    pdf_path: Union[str, Path],
+    max_workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    max_file_size: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    text_cache: Optional[Any] = None,
+) -> Iterator[Tuple[str, str]]:
+    """parse the pdfs on the worker pool and yield (cv_id, text) as each document finishes.
+
+    The cv_id is derived from the sha-256 of the file, duplicate files are
+    yielded once. Documents found in text_cache (a ParsedTextCache) are
+    yielded without parsing. Files larger than max_file_size are skipped. A
+    document stops being parsed between pages once timeout seconds have
+    passed, and its worker is killed if it is still running
+    HARD_TIMEOUT_FACTOR times that after it started.
+    """
+    extractor_version = f"{EXTRACTOR_VERSION}/max_pages={max_pages}"
+
+    files = {}
+    seen = set()
+    for file in sorted(Path(pdf_path).glob("*.pdf")):
+        if max_file_size is not None and file.stat().st_size > max_file_size:
+            logger.warning(f"Skipping {file}: larger than {max_file_size} bytes")
+            continue
+
+        sha256 = file_sha256(file)
+        if sha256 in seen:
+            logger.info(f"Skipping {file}: duplicate content")
+            continue
+        seen.add(sha256)
+
+        pages = None
+        if text_cache is not None:
+            pages = text_cache.get(sha256, extractor_version)
+        if pages is not None:
+            yield content_id(sha256), " ".join(pages)
+            continue
+        files[file] = sha256
+
+    if not files:
+        return
+
+    tasks = {file: (str(file), max_pages, timeout) for file in files}
+    results = get_worker_pool(max_workers).imap_unordered(
+        _parse_pdf_pages,
+        tasks,
+        max_workers=max_workers,
+        timeout=timeout * HARD_TIMEOUT_FACTOR if timeout else None,
+    )
+    with tqdm(total=len(files), desc="Parsing PDFs") as progress:
+        for file, result, error in results:
+            progress.update(1)
+            if error is not None:
+                logger.error(f"Error parsing {file}: {error}")
+                continue
 
-def process_pdfs(pdf_path: Union[str, Path]) -> List[str]:
-    cv_data = []
-    total_pdfs = len(list(Path(pdf_path).glob("*.pdf")))
-    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
-        future_to_file = {
-            executor.submit(parse_pdf, file): file for file in pdf_path.glob("*.pdf")
-        }
+            pages, timed_out = result
+            # partial extractions are not cached
+            if text_cache is not None and not timed_out:
+                text_cache.set(files[file], extractor_version, pages)
+            yield content_id(files[file]), " ".join(pages)
 
-        for future in tqdm(
-            as_completed(future_to_file), total=total_pdfs, desc="Parsing PDFs"
-        ):
-            cv_data.append(future.result())
 
-    # Join multi-page CVs into a single string
-    return [" ".join(cv) if len(cv) > 1 else cv[0] for cv in cv_data]
+def process_pdfs(pdf_path: Union[str, Path], **kwargs) -> List[str]:
+    return [text for _, text in iter_pdfs(pdf_path, **kwargs)]
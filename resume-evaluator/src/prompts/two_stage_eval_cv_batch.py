@@ -0,0 +1,75 @@
+from .two_stage_eval_cv import _CV_NOTES, _CV_ROLE, _CV_STEPS
+
+# the batch prompt is the cv prompt with one evaluation per resume
+_CV_BATCH_INSTRUCTIONS = (
+    _CV_ROLE
+    + """
+Evaluate EACH of the resumes below independently against the same job requirements.
+Do not compare the candidates with each other.
+"""
+    + _CV_STEPS
+)
+
+_CV_BATCH_OUTPUT_FORMAT = """
+5. output format:
+
+output only a VALID JSON ARRAY with exactly one object per resume, in the same order,
+copying the cv_id of the resume tag:
+
+```json
+[
+  {{
+    "cv_id": "",
+    "resume_evaluation": {{
+      "original_scores": {{
+                  "technical_skills": int,
+                  "soft_skills": int,
+                  "experience": int,
+                  "education": int
+              }},
+      "missing_skills" : []
+    }},
+    "deeper_analysis": {{
+      "inferred_experience": []
+    }},
+    "recalibrated_scores": {{
+                    "technical_skills": int,
+                    "soft_skills": int,
+                    "experience": int,
+                    "education": int
+                  }},
+    "assessment": {{
+      "suitability": "",
+      "strengths": "",
+      "concerns": ""
+    }}
+  }}
+]
+```
+"""
+
+TWO_STAGE_EVAL_CV_BATCH_SYSTEM_PROMPT = (
+    _CV_BATCH_INSTRUCTIONS + _CV_BATCH_OUTPUT_FORMAT + _CV_NOTES
+)
+
+# structured output mode, the schema is bound to the model instead of described
+_CV_BATCH_STRUCTURED_OUTPUT_FORMAT = """
+5. output format:
+
+submit one evaluation per resume with the provided tool, under "results", each with the
+cv_id of its <resume> tag. every score is an integer between 0 and 100
+"""
+
+TWO_STAGE_EVAL_CV_BATCH_STRUCTURED_SYSTEM_PROMPT = (
+    _CV_BATCH_INSTRUCTIONS + _CV_BATCH_STRUCTURED_OUTPUT_FORMAT + _CV_NOTES
+)
+
+TWO_STAGE_EVAL_CV_BATCH_HUMAN_PROMPT = """
+6. Resumes, each one enclosed in a <resume cv_id="..."> tag
+
+{resumes}
+"""
+
+TWO_STAGE_EVAL_CV_BATCH_PROMPT = (
+    TWO_STAGE_EVAL_CV_BATCH_SYSTEM_PROMPT + TWO_STAGE_EVAL_CV_BATCH_HUMAN_PROMPT
+)
@@ -1,4 +1,4 @@
-TWO_STAGE_EVAL_JD_PROMPT = """ 
+_JD_INSTRUCTIONS = """ 
 You are an experienced recruiter who possesses deep industry knowledge and strong analytical skills. 
 You are familiar with the jargons, know the specific skills and qualifications that are essential for roles within the industry. 
 For example, in tech, a recruiter should understand the difference between a data scientist and a data engineer, 
@@ -20,7 +20,9 @@ such as career progression, project impact, or skill development, that signal a
 2. Job Description: 
 
 {job_description}
+"""
 
+_JD_OUTPUT_FORMAT = """
 3. Output Format:
 
 output only VALID JSON FORMAT:
@@ -36,9 +38,24 @@ output only VALID JSON FORMAT:
   "education": []
 }}
 ```
+"""
 
+_JD_NOTES = """
 Note
 * Ensure that “must-have” qualifications are only placed under “essential.”
 * Ensure that “should-have” qualifications are only placed under “advantageous.”
 * Double-check the categorization to avoid misclassification.”
-"""
\ No newline at end of file
+"""
+
+TWO_STAGE_EVAL_JD_PROMPT = _JD_INSTRUCTIONS + _JD_OUTPUT_FORMAT + _JD_NOTES
+
+# structured output mode, the schema is bound to the model instead of described
+_JD_STRUCTURED_OUTPUT_FORMAT = """
+3. Output Format:
+
+submit the analysis with the provided tool
+"""
+
+TWO_STAGE_EVAL_JD_STRUCTURED_PROMPT = (
+    _JD_INSTRUCTIONS + _JD_STRUCTURED_OUTPUT_FORMAT + _JD_NOTES
+)
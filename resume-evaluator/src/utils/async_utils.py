@@ -0,0 +1,112 @@
+import asyncio
+import queue
+import threading
+import weakref
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Iterable,
+    Iterator,
+    Optional,
+    TypeVar,
+)
+
+from ..config import config
+
+T = TypeVar("T")
+
+_SENTINEL = object()
+
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_event_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """process-wide event loop running on a background thread.
+
+    All the runs share it, so that the pooled clients keep their async
+    connections on the loop that opened them instead of a loop per run.
+    """
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_event_loop.run_forever, name="event-loop", daemon=True
+            ).start()
+        return _event_loop
+
+
+def run_async(awaitable: Awaitable[T]) -> T:
+    """run a coroutine on the shared event loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(awaitable, get_event_loop()).result()
+
+
+# {event loop: {interface or grader mode: semaphore}}
+_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_semaphores_lock = threading.Lock()
+
+
+def get_semaphore(name: str) -> asyncio.Semaphore:
+    """process-wide semaphore bounding the in-flight requests of an interface (or
+    of a grader mode, e.g. "ensemble"), sized by config.MAX_CONCURRENCY.
+
+    The runs share the event loop of get_event_loop, so the bound holds for all
+    of them together rather than for each run.
+    """
+    loop = asyncio.get_running_loop()
+    with _semaphores_lock:
+        semaphores = _semaphores.setdefault(loop, {})
+        if name not in semaphores:
+            semaphores[name] = asyncio.Semaphore(
+                config.MAX_CONCURRENCY.get(name, config.DEFAULT_MAX_CONCURRENCY)
+            )
+        return semaphores[name]
+
+
+async def aiter_sync(iterable: Iterable[T]) -> AsyncIterator[T]:
+    """consume a blocking iterator on the default executor without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    iterator = iter(iterable)
+    while True:
+        item = await loop.run_in_executor(None, next, iterator, _SENTINEL)
+        if item is _SENTINEL:
+            break
+        yield item
+
+
+def iter_async(
+    aiterable: AsyncIterable[T], timeout: Optional[float] = None
+) -> Iterator[Optional[T]]:
+    """consume an async iterable from sync code, running it on the shared event loop.
+
+    With a timeout, None is yielded whenever no item arrived within timeout
+    seconds, so that the caller can report progress in the meantime.
+    """
+    items = queue.Queue()
+
+    async def consume():
+        try:
+            async for item in aiterable:
+                items.put((item, None))
+        except BaseException as e:
+            items.put((_SENTINEL, e))
+        else:
+            items.put((_SENTINEL, None))
+
+    future = asyncio.run_coroutine_threadsafe(consume(), get_event_loop())
+
+    while True:
+        try:
+            item, error = items.get(timeout=timeout)
+        except queue.Empty:
+            yield None
+            continue
+        if item is _SENTINEL:
+            if error is not None:
+                raise error
+            break
+        yield item
+
+    future.result()
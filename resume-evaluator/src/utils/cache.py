@@ -0,0 +1,319 @@
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from ..config import config
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def normalize_text(text: Any) -> str:
+    """normalize an input so that formatting-only differences hit the same entry"""
+    if not isinstance(text, str):
+        text = json.dumps(text, sort_keys=True, ensure_ascii=False)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def text_id(text: str) -> str:
+    """stable id derived from the normalized text, the same text gets the same id"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()[:16]
+
+
+def make_cache_key(
+    prompt_template: str, model_id: str, temperature: float, inputs: Dict[str, Any]
+) -> str:
+    """sha-256 of the prompt template, model, temperature and normalized inputs"""
+    payload = json.dumps(
+        {
+            "prompt_template": prompt_template,
+            "model_id": model_id,
+            "temperature": temperature,
+            "inputs": {k: normalize_text(v) for k, v in sorted(inputs.items())},
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """persistent sqlite cache of llm results with size-based lru eviction.
+
+    Once the cache grows past max_size_bytes, the least recently used entries
+    are evicted down to low_water of it, so that the following inserts do not
+    evict again.
+    """
+
+    # entries deleted per eviction query
+    EVICT_BATCH_SIZE = 256
+
+    def __init__(
+        self, db_path: Union[str, Path], max_size_bytes: int, low_water: float = 0.9
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.max_size_bytes = max_size_bytes
+        self.low_water = low_water
+        self.hits = 0
+        self.misses = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_results_last_accessed ON results (last_accessed)"
+        )
+        self._conn.commit()
+        self._total_size = self._size()
+
+    def _size(self) -> int:
+        (total_size,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        return total_size
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE results SET last_accessed = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        serialized = json.dumps(value, ensure_ascii=False)
+        size = len(serialized.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            replaced = self._conn.execute(
+                "SELECT size FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, serialized, size, now, now),
+            )
+            self._total_size += size - (replaced[0] if replaced else 0)
+            if self._total_size > self.max_size_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """drop the least recently used entries until the cache fits low_water of
+        max_size_bytes"""
+        # other processes may share the cache file, the running size is only
+        # trusted to decide when to evict
+        self._total_size = self._size()
+        target_size = self.max_size_bytes * self.low_water
+
+        evicted = 0
+        while self._total_size > target_size:
+            rows = self._conn.execute(
+                "SELECT key, size FROM results ORDER BY last_accessed LIMIT ?",
+                (self.EVICT_BATCH_SIZE,),
+            ).fetchall()
+            if not rows:
+                break
+
+            keys = []
+            for key, size in rows:
+                if self._total_size <= target_size:
+                    break
+                keys.append((key,))
+                self._total_size -= size
+            self._conn.executemany("DELETE FROM results WHERE key = ?", keys)
+            evicted += len(keys)
+        logger.info(f"Evicted {evicted} entries from the result cache.")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "size_bytes": size,
+        }
+
+
+class CachedGrader(Runnable[Dict[str, Any], Any]):
+    """serve a grader's results from the result cache, invoking it only on a miss"""
+
+    def __init__(
+        self,
+        grader: Runnable,
+        cache: ResultCache,
+        prompt_template: str,
+        model_id: str,
+        temperature: float,
+    ) -> None:
+        self.grader = grader
+        self.cache = cache
+        self.prompt_template = prompt_template
+        self.model_id = model_id
+        self.temperature = temperature
+
+    def _key(self, input: Dict[str, Any]) -> str:
+        return make_cache_key(
+            self.prompt_template, self.model_id, self.temperature, input
+        )
+
+    def invoke(
+        self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs
+    ) -> Any:
+        key = self._key(input)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.grader.invoke(input, config, **kwargs)
+            self.cache.set(key, result)
+        return result
+
+    async def ainvoke(
+        self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs
+    ) -> Any:
+        # the cache reads and writes sqlite, an eviction can take a while
+        key = self._key(input)
+        result = await asyncio.to_thread(self.cache.get, key)
+        if result is None:
+            result = await self.grader.ainvoke(input, config, **kwargs)
+            await asyncio.to_thread(self.cache.set, key, result)
+        return result
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """get the process-wide result cache"""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(
+                config.CACHE_DIR / "llm_results.sqlite", config.LLM_CACHE_MAX_BYTES
+            )
+    return _result_cache
+
+
+class ParsedTextCache:
+    """sqlite cache of extracted pdf text, one entry per page, keyed by the sha-256 of the file"""
+
+    def __init__(self, db_path: Union[str, Path]) -> None:
+        self.db_path = Path(db_path)
+        self.hits = 0
+        self.misses = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                sha256 TEXT NOT NULL,
+                extractor_version TEXT NOT NULL,
+                page_count INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (sha256, extractor_version)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                sha256 TEXT NOT NULL,
+                extractor_version TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (sha256, extractor_version, page_number)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, sha256: str, extractor_version: str) -> Optional[List[str]]:
+        with self._lock:
+            document = self._conn.execute(
+                "SELECT page_count FROM documents WHERE sha256 = ? AND extractor_version = ?",
+                (sha256, extractor_version),
+            ).fetchone()
+            if document is None:
+                self.misses += 1
+                return None
+
+            pages = self._conn.execute(
+                """
+                SELECT text FROM pages WHERE sha256 = ? AND extractor_version = ?
+                ORDER BY page_number
+                """,
+                (sha256, extractor_version),
+            ).fetchall()
+
+        if len(pages) != document[0]:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [text for (text,) in pages]
+
+    def set(self, sha256: str, extractor_version: str, pages: List[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)",
+                (sha256, extractor_version, len(pages), time.time()),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                [
+                    (sha256, extractor_version, page_number, text or "")
+                    for page_number, text in enumerate(pages)
+                ],
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (documents,) = self._conn.execute(
+                "SELECT COUNT(*) FROM documents"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "documents": documents}
+
+
+_parsed_text_cache: Optional[ParsedTextCache] = None
+
+
+def get_parsed_text_cache() -> ParsedTextCache:
+    """get the process-wide parsed text cache"""
+    global _parsed_text_cache
+    with _result_cache_lock:
+        if _parsed_text_cache is None:
+            _parsed_text_cache = ParsedTextCache(config.CACHE_DIR / "pdf_text.sqlite")
+    return _parsed_text_cache
@@ -0,0 +1,152 @@
+import hashlib
+import importlib.util
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+from langchain_core.language_models import BaseChatModel
+
+from ..config import config
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# interfaces whose chat model accepts shared http_client / http_async_client
+HTTP_CLIENT_INTERFACES = ("groq", "openai")
+
+ModelKey = Tuple[str, str, float, int, str]
+
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """short hash identifying an api key, the key itself is never kept"""
+    if not api_key:
+        return ""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def http2_available() -> bool:
+    """http/2 needs the optional h2 package (httpx[http2])"""
+    return importlib.util.find_spec("h2") is not None
+
+
+_http_clients: Optional[Tuple[httpx.Client, httpx.AsyncClient]] = None
+_http_clients_lock = threading.Lock()
+
+
+def get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """process-wide (sync, async) http clients keeping their connections alive.
+
+    The async client is only used from the shared event loop of
+    async_utils.get_event_loop, its connections are bound to that loop.
+    """
+    global _http_clients
+    with _http_clients_lock:
+        if _http_clients is None:
+            http2 = config.HTTP2_ENABLED and http2_available()
+            if config.HTTP2_ENABLED and not http2:
+                logger.warning("h2 is not installed, using http/1.1 keep-alive")
+
+            limits = httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+            )
+            timeout = httpx.Timeout(config.HTTP_TIMEOUT)
+            _http_clients = (
+                httpx.Client(http2=http2, limits=limits, timeout=timeout),
+                httpx.AsyncClient(http2=http2, limits=limits, timeout=timeout),
+            )
+            logger.info(
+                f"Created the shared http clients. HTTP/2: {http2}, limits: {limits}"
+            )
+        return _http_clients
+
+
+class ModelPool:
+    """chat models shared by the chains of all the runs, keyed by interface,
+    model, sampling parameters and api key fingerprint.
+
+    Reusing a model reuses its sdk client and the connections it keeps alive,
+    the least recently used models are dropped beyond max_size.
+    """
+
+    def __init__(self, max_size: int = 32) -> None:
+        self.max_size = max_size
+        self._models: "OrderedDict[ModelKey, BaseChatModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_create(
+        self, key: ModelKey, create: Callable[[], BaseChatModel]
+    ) -> BaseChatModel:
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return model
+
+            model = create()
+            self.misses += 1
+            self._models[key] = model
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+            logger.info(f"Created a pooled client for {key[0]}/{key[1]}")
+            return model
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+
+_model_pool: Optional[ModelPool] = None
+_model_pool_lock = threading.Lock()
+
+
+def get_model_pool() -> ModelPool:
+    """process-wide chat model pool, sized by config.CLIENT_POOL_MAX_SIZE"""
+    global _model_pool
+    with _model_pool_lock:
+        if _model_pool is None:
+            _model_pool = ModelPool(max_size=config.CLIENT_POOL_MAX_SIZE)
+        return _model_pool
+
+
+class VerifiedKeyCache:
+    """remember the api keys that passed verification for ttl seconds"""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._verified_at: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def is_verified(self, interface: str, api_key: str) -> bool:
+        key = (interface, key_fingerprint(api_key))
+        with self._lock:
+            verified_at = self._verified_at.get(key)
+            if verified_at is None:
+                return False
+            if time.monotonic() - verified_at > self.ttl:
+                del self._verified_at[key]
+                return False
+            return True
+
+    def mark_verified(self, interface: str, api_key: str) -> None:
+        with self._lock:
+            self._verified_at[(interface, key_fingerprint(api_key))] = time.monotonic()
+
+
+_verified_keys: Optional[VerifiedKeyCache] = None
+_verified_keys_lock = threading.Lock()
+
+
+def get_verified_key_cache() -> VerifiedKeyCache:
+    """process-wide cache of verified api keys, config.API_KEY_VERIFY_TTL_SECONDS"""
+    global _verified_keys
+    with _verified_keys_lock:
+        if _verified_keys is None:
+            _verified_keys = VerifiedKeyCache(ttl=config.API_KEY_VERIFY_TTL_SECONDS)
+        return _verified_keys
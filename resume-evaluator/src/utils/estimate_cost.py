@@ -1,20 +1,139 @@
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
 import tiktoken
-import anthropic
+from langchain_core.messages import BaseMessage
+
+from ..config import config
+from ..prompts.two_stage_eval_cv import (
+    TWO_STAGE_EVAL_CV_HUMAN_PROMPT,
+    TWO_STAGE_EVAL_CV_SYSTEM_PROMPT,
+)
+from ..prompts.two_stage_eval_jd import TWO_STAGE_EVAL_JD_PROMPT
+
+_tokenizer: Optional[tiktoken.Encoding] = None
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer() -> tiktoken.Encoding:
+    """process-wide tokenizer, loading the encoding is slow so it is done once"""
+    global _tokenizer
+    with _tokenizer_lock:
+        if _tokenizer is None:
+            _tokenizer = tiktoken.get_encoding("cl100k_base")
+        return _tokenizer
 
 
 # estimating the cost
 def count_tokens(input_string: str) -> int:
-    tokenizer = tiktoken.get_encoding("cl100k_base")
-    tokens = tokenizer.encode(input_string)
+    tokens = get_tokenizer().encode(input_string)
     return len(tokens)
 
 
+def count_message_tokens(messages: List[List[BaseMessage]]) -> int:
+    """tokens of the text of chat messages, including the content blocks"""
+    tokens = 0
+    for message in (message for batch in messages for message in batch):
+        content = message.content
+        if isinstance(content, str):
+            tokens += count_tokens(content)
+            continue
+        for block in content:
+            text = block.get("text") if isinstance(block, dict) else block
+            if isinstance(text, str):
+                tokens += count_tokens(text)
+    return tokens
+
+
 def calculate_cost(input_string: str, cost_per_million_tokens: float = 5) -> float:
     num_tokens = count_tokens(input_string)
     total_cost = (num_tokens / 1_000_000) * cost_per_million_tokens
     return total_cost
 
 
+def model_price(model_name: str) -> Tuple[float, float]:
+    """usd per million (input, output) tokens of an "interface/model" name"""
+    interface = model_name.split("/")[0]
+    return config.MODEL_PRICES.get(
+        model_name, config.MODEL_PRICES.get(interface, config.DEFAULT_MODEL_PRICE)
+    )
+
+
+def token_cost(
+    model_name: str,
+    input_tokens: int,
+    output_tokens: int,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0,
+) -> float:
+    """usd cost of a call, the cache tokens are the ones not in input_tokens"""
+    input_price, output_price = model_price(model_name)
+    input_tokens += (
+        cache_read_tokens * config.CACHE_READ_PRICE_FACTOR
+        + cache_write_tokens * config.CACHE_WRITE_PRICE_FACTOR
+    )
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+@dataclass
+class CostEstimate:
+    """expected usage of one model over a run"""
+
+    model_name: str
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def cost(self) -> float:
+        return token_cost(self.model_name, self.input_tokens, self.output_tokens)
+
+    def add(self, calls: int, input_tokens: int, output_tokens: int) -> None:
+        self.calls += calls
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+
+
+def estimate_run_cost(
+    job_text: str,
+    cv_texts: List[str],
+    jd_model: str,
+    cv_models: List[str],
+    cvs_per_job: Optional[int] = None,
+) -> List[CostEstimate]:
+    """estimate the tokens of a run before dispatching it, one entry per model.
+
+    The job description is analyzed by jd_model, then every cv (or the
+    cvs_per_job kept by the pre-screening, taking the longest) is scored by
+    each of cv_models. The job analysis in the cv prompt is counted as
+    config.COST_ESTIMATE_JD_OUTPUT_TOKENS.
+    """
+    estimates = {jd_model: CostEstimate(jd_model)}
+    estimates[jd_model].add(
+        1,
+        count_tokens(TWO_STAGE_EVAL_JD_PROMPT) + count_tokens(job_text),
+        config.COST_ESTIMATE_JD_OUTPUT_TOKENS,
+    )
+
+    cv_tokens = sorted((count_tokens(cv_text) for cv_text in cv_texts), reverse=True)
+    if cvs_per_job is not None:
+        cv_tokens = cv_tokens[:cvs_per_job]
+    prompt_tokens = (
+        count_tokens(TWO_STAGE_EVAL_CV_SYSTEM_PROMPT)
+        + count_tokens(TWO_STAGE_EVAL_CV_HUMAN_PROMPT)
+        + config.COST_ESTIMATE_JD_OUTPUT_TOKENS
+    )
+    for model_name in cv_models:
+        estimate = estimates.setdefault(model_name, CostEstimate(model_name))
+        estimate.add(
+            len(cv_tokens),
+            len(cv_tokens) * prompt_tokens + sum(cv_tokens),
+            len(cv_tokens) * config.CV_BATCH_OUTPUT_TOKENS_PER_CV,
+        )
+    return list(estimates.values())
+
+
 # client = anthropic.Client()
 # token_count = client.count_tokens(complete_template)
 # print(token_count)
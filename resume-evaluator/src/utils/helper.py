@@ -2,25 +2,27 @@ import json
 import os
 import shutil
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
-import gradio as gr
-import requests
+import pandas as pd
 
 from ..config import config
+from ..utils.client_pool import get_http_clients, get_verified_key_cache
+from ..utils.estimate_cost import CostEstimate
 from ..utils.logger import get_logger
+from ..utils.results_store import ResultsStore
 
 logger = get_logger(__name__)
 
 
 def set_and_verify_api_key(api_key: str, interface: str) -> str:
-    """set and verify the api key for the model"""
+    """verify the api key for the model.
 
-    env_var_map = {
-        "groq": "GROQ_API_KEY",
-        "openai": "OPENAI_API_KEY",
-        "anthropic": "ANTHROPIC_API_KEY",
-    }
+    The key is passed to the models with the input of each run, it is not set
+    in the environment, which all the runs of the process share.
+    """
+    # the ui is only imported by the ui handlers, not by the cli
+    import gradio as gr
 
     url_map = {
         "groq": config.GROQ_URL,
@@ -30,13 +32,20 @@ def set_and_verify_api_key(api_key: str, interface: str) -> str:
 
     interface = interface.lower()
 
-    if interface in env_var_map:
-        os.environ[env_var_map[interface]] = api_key
+    if interface in url_map:
+        # skip the round trip for a key verified recently
+        verified_keys = get_verified_key_cache()
+        if verified_keys.is_verified(interface, api_key):
+            logger.info(f"API key already verified for {interface}")
+            return
+
         url = url_map[interface]
         headers = {"Authorization": f"Bearer {api_key}"}
         try:
-            response = requests.get(url, headers=headers)
+            http_client, _ = get_http_clients()
+            response = http_client.get(url, headers=headers)
             if response.status_code == 200:
+                verified_keys.mark_verified(interface, api_key)
                 logger.info(f"API key set successfully for {interface}")
             else:
                 logger.error(f"Error verifying API key: {response.status_code}")
@@ -92,21 +101,55 @@ def format_job_description_analysis(json_data):
     return markdown
 
 
-def save_upload_file(file) -> None:
-    """save the file uploaded by the user to the pdf upload folder PDF_UPLOAD_FOLDER"""
-    if not os.path.exists(config.PDF_UPLOAD_FOLDER):
-        os.makedirs(config.PDF_UPLOAD_FOLDER, exist_ok=True)
-    shutil.copy(file, config.PDF_UPLOAD_FOLDER)
-    gr.Info(f"file is saved to {config.PDF_UPLOAD_FOLDER}{file.name.split('/')[-1]}")
-
-
-# [TODO] to remove?
-def read_job_data() -> List[Tuple[str, dict]]:
-    """Read job data from JOBS_OUTPUT_DIR"""
-    job_data = []
-    for file in Path(config.JOBS_OUTPUT_DIR).glob("*.json"):
-        job_id = file.stem.split("_")[0]
-        with open(file, "r") as f:
-            job_analysis = json.load(f)
-            job_data.append((job_id, job_analysis))
-    return job_data
+def format_cost_estimate(
+    estimates: List[CostEstimate],
+    budget: Optional[float] = None,
+    alternatives: Optional[Dict[str, float]] = None,
+) -> str:
+    """markdown of a pre-flight cost estimate, alternatives maps the other
+    models to the cost of the same run"""
+    total = sum(estimate.cost for estimate in estimates)
+
+    markdown = "### Estimated cost\n\n"
+    markdown += "| Model | Calls | Input tokens | Output tokens | Cost |\n"
+    markdown += "|---|---|---|---|---|\n"
+    for estimate in estimates:
+        markdown += (
+            f"| {estimate.model_name} | {estimate.calls} | {estimate.input_tokens} "
+            f"| {estimate.output_tokens} | ${estimate.cost:.4f} |\n"
+        )
+    markdown += f"\n**Total: ${total:.4f}**"
+    if budget is not None:
+        markdown += f" of a ${budget:.2f} budget"
+        if total > budget:
+            markdown += ", the run will stop once the budget is spent"
+    markdown += "\n"
+
+    if alternatives:
+        markdown += "\n#### Same run with a single model\n\n"
+        for model_name, cost in sorted(alternatives.items(), key=lambda item: item[1]):
+            markdown += f"- {model_name}: ${cost:.4f}\n"
+    return markdown
+
+
+def save_upload_file(file, upload_dir: Union[str, Path]) -> None:
+    """save the file uploaded by the user to the pdf upload folder of the run"""
+    import gradio as gr
+
+    if not os.path.exists(upload_dir):
+        os.makedirs(upload_dir, exist_ok=True)
+    shutil.copy(file, upload_dir)
+    gr.Info(f"file is saved to {upload_dir}/{file.name.split('/')[-1]}")
+
+
+def read_job_data(store: ResultsStore) -> List[Tuple[str, dict]]:
+    """read the (job_id, job_analysis) tuples of the run from the results store"""
+    return [
+        (job_id, job_analysis) for job_id, _, job_analysis in store.get_job_results()
+    ]
+
+
+def read_job_tuples(csv_dir: Union[str, Path]) -> List[Tuple[str, str]]:
+    """read the (job_id, job_text) tuples saved by process_all_jobs"""
+    job_tuples = pd.read_csv(os.path.join(csv_dir, "job_tuples.csv"), dtype=str)
+    return list(job_tuples[["job_id", "job_text"]].itertuples(index=False, name=None))
@@ -0,0 +1,116 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from ..config import config
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+
+@dataclass
+class EvaluationJob:
+    """status and latest results of an evaluation run submitted to the queue"""
+
+    run_id: str
+    status: str = "queued"
+    message: str = "Queued, waiting for a free worker..."
+    results: pd.DataFrame = field(default_factory=pd.DataFrame)
+    # bumped whenever the results change, so that pollers only redraw on change
+    version: int = 0
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+class JobQueue:
+    """in-process queue running the evaluations on a pool of worker threads.
+
+    A submitted evaluation is a callable returning the (partial results,
+    progress message) iterator of the run, the ui polls the job by run id
+    instead of holding a request open for the whole run.
+    """
+
+    def __init__(self, max_workers: int, max_finished_jobs: int = 100) -> None:
+        self.max_finished_jobs = max_finished_jobs
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="evaluation"
+        )
+        self._jobs: Dict[str, EvaluationJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self, run_id: str, run: Callable[[], Iterator[Tuple[pd.DataFrame, str]]]
+    ) -> EvaluationJob:
+        job = EvaluationJob(run_id=run_id)
+        with self._lock:
+            self._jobs[run_id] = job
+            self._prune()
+        self._executor.submit(self._run, job, run)
+        logger.info(f"Queued evaluation run {run_id}")
+        return job
+
+    def get(self, run_id: str) -> Optional[EvaluationJob]:
+        with self._lock:
+            return self._jobs.get(run_id)
+
+    def list_jobs(self) -> List[EvaluationJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.submitted_at)
+
+    def _run(
+        self, job: EvaluationJob, run: Callable[[], Iterator[Tuple[pd.DataFrame, str]]]
+    ) -> None:
+        job.status = "running"
+        job.message = "Starting..."
+        try:
+            for results, message in run():
+                if message.startswith("Error"):
+                    job.status = "failed"
+                if results is not None and not results.empty:
+                    job.results = results
+                    job.version += 1
+                job.message = message
+            if job.status != "failed":
+                job.status = "done"
+        except Exception as e:
+            logger.error(f"Evaluation run {job.run_id} failed. Error: {str(e)}")
+            job.status = "failed"
+            job.message = f"Error: {str(e)}"
+        finally:
+            job.finished_at = time.time()
+            logger.info(f"Evaluation run {job.run_id} {job.status}")
+
+    def _prune(self) -> None:
+        """forget the oldest finished jobs, their results stay in the run workspace"""
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished),
+            key=lambda job: job.finished_at,
+        )
+        for job in finished[: max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job.run_id]
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """process-wide job queue, sized by config.JOB_QUEUE_WORKERS"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(
+                max_workers=config.JOB_QUEUE_WORKERS,
+                max_finished_jobs=config.JOB_QUEUE_MAX_FINISHED_JOBS,
+            )
+        return _job_queue
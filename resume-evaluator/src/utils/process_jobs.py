@@ -1,16 +1,29 @@
+import asyncio
+import contextvars
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Tuple, Union
-from uuid import uuid4
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import pandas as pd
 from langchain_core.runnables.base import RunnableSequence
 from tqdm import tqdm
 
-from ..config import config
-from ..evaluators.two_stage_evaluators import two_stage_eval_cv, two_stage_eval_jd
+from ..evaluators.batch_evaluators import CVBatcher, atwo_stage_eval_cv_batch
+from ..evaluators.two_stage_evaluators import atwo_stage_eval_cv, two_stage_eval_jd
+from ..utils.async_utils import aiter_sync, get_semaphore, run_async
+from ..utils.cache import text_id
 from ..utils.logger import get_logger
+from ..utils.results_store import ResultsStore
 
 logger = get_logger(__name__)
 
@@ -18,28 +31,36 @@ logger = get_logger(__name__)
 def process_all_jobs(
     model_tuples: List[Tuple[str, RunnableSequence]],
     job_text: Union[str, List[str]],
-    output_dir: Union[str, Path],
-):
+    store: ResultsStore,
+    csv_output_dir: Union[str, Path],
+) -> List[Tuple[str, str]]:
 
-    # create the job tuple which consists of job_id and job_text
+    # create the job tuple which consists of job_id and job_text, the ids are
+    # derived from the text so that a resumed run matches its stored results
     if isinstance(job_text, List):
-        job_tuples = [(str(uuid4()), jt) for jt in job_text]
+        job_tuples = [(text_id(jt), jt) for jt in job_text]
     else:
-        job_tuples = [(str(uuid4()), job_text)]
+        job_tuples = [(text_id(job_text), job_text)]
 
     pd.DataFrame(job_tuples, columns=["job_id", "job_text"]).to_csv(
-        os.path.join(config.CSV_OUTPUT_DIR, "job_tuples.csv"), index=False
+        os.path.join(csv_output_dir, "job_tuples.csv"), index=False
     )
     logger.info(f"saved job tuple")
 
     # [TODO] change to the number of cores in the machine (add to config)
     with ThreadPoolExecutor(max_workers=1) as executor:
-
         futures = []
 
         for job_tuple in job_tuples:
+            # the worker threads see the context of the run, e.g. its usage tracker
             futures.append(
-                executor.submit(two_stage_eval_jd, model_tuples, job_tuple, output_dir)
+                executor.submit(
+                    contextvars.copy_context().run,
+                    two_stage_eval_jd,
+                    model_tuples,
+                    job_tuple,
+                    store,
+                )
             )
 
         for future in tqdm(
@@ -50,30 +71,165 @@ def process_all_jobs(
             except Exception as e:
                 print(f"Processing Error: {e}")
 
+    return job_tuples
 
-def process_all_pairs(
+
+def get_semaphores(
     model_tuples: List[Tuple[str, RunnableSequence]],
-    job_data: List[Tuple[str, str]],
-    cv_data: List[Tuple[str, str]],
-    output_dir: str,
-):
+) -> Dict[str, asyncio.Semaphore]:
+    """the process-wide semaphore of each interface, shared by all the runs"""
+    if isinstance(model_tuples, Tuple):
+        model_tuples = [model_tuples]
 
-    total_pairs = len(job_data) * len(cv_data)
+    return {model_name: get_semaphore(model_name) for model_name, _ in model_tuples}
 
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        futures = []
+
+async def astream_all_pairs(
+    model_tuples: List[Tuple[str, RunnableSequence]],
+    job_data: List[Tuple[str, dict]],
+    cv_stream: AsyncIterable[Tuple[str, str]],
+    store: ResultsStore,
+    batch_model_tuples: Optional[List[Tuple[str, RunnableSequence]]] = None,
+    batcher: Optional[CVBatcher] = None,
+    pairs: Optional[Set[Tuple[str, str]]] = None,
+    resume: bool = False,
+) -> AsyncIterator[Tuple[Tuple[str, dict], Tuple[str, str], Optional[Dict[str, dict]]]]:
+    """dispatch each cv against all jobs as soon as it arrives, yield (job, cv, model_results) as pairs complete.
+
+    With batch_model_tuples and a batcher, short cvs are packed into batches
+    scored in a single request per job. With pairs, only the given
+    (job_id, cv_id) pairs are scored. The state of each pair is recorded in
+    the store, with resume the pairs already done are not dispatched again
+    and their stored results are yielded instead.
+    """
+
+    # the store is written from worker threads, a sqlite commit must not hold
+    # up the event loop shared by all the runs
+    semaphores = get_semaphores(model_tuples)
+    completed = asyncio.Queue()
+    done_pairs = (
+        set(await asyncio.to_thread(store.get_pair_states, "done")) if resume else set()
+    )
+
+    async def complete(job, cv, model_results):
+        await asyncio.to_thread(
+            store.set_pair_states,
+            [(job[0], cv[0])],
+            "done" if model_results else "failed",
+        )
+        await completed.put((job, cv, model_results))
+
+    async def evaluate_pair(job, cv):
+        await asyncio.to_thread(store.set_pair_states, [(job[0], cv[0])], "in_flight")
+        try:
+            model_results = await atwo_stage_eval_cv(
+                model_tuples, job, cv, store, semaphores
+            )
+        except Exception as e:
+            logger.error(
+                f"Error evaluating job_id: {job[0]}, cv_id: {cv[0]}. Error: {e}"
+            )
+            model_results = None
+        await complete(job, cv, model_results)
+
+    async def evaluate_batch(job, cvs):
+        await asyncio.to_thread(
+            store.set_pair_states, [(job[0], cv[0]) for cv in cvs], "in_flight"
+        )
+        try:
+            batch_results = await atwo_stage_eval_cv_batch(
+                batch_model_tuples, model_tuples, job, cvs, store, semaphores
+            )
+        except Exception as e:
+            logger.error(f"Error evaluating a batch for job_id: {job[0]}. Error: {e}")
+            batch_results = {}
+        for cv in cvs:
+            await complete(job, cv, batch_results.get(cv[0]))
+
+    def stored_results(job_id, cv_id):
+        return {
+            record["model_name"]: record["result"]
+            for record in store.get_cv_results(job_id, cv_id)
+        }
+
+    tasks = []
+
+    async def schedule(cvs):
         for job in job_data:
-            for cv in cv_data:
-                futures.append(
-                    executor.submit(
-                        two_stage_eval_cv, model_tuples, job, cv, output_dir
-                    )
-                )
+            job_cvs = [cv for cv in cvs if pairs is None or (job[0], cv[0]) in pairs]
 
-        for future in tqdm(
-            as_completed(futures), total=total_pairs, desc="Processing job-cv pairs"
+            finished = [cv for cv in job_cvs if (job[0], cv[0]) in done_pairs]
+            for cv in finished:
+                model_results = await asyncio.to_thread(stored_results, job[0], cv[0])
+                await completed.put((job, cv, model_results))
+            job_cvs = [cv for cv in job_cvs if cv not in finished]
+
+            # the pairs are pending before their tasks can mark them in flight
+            await asyncio.to_thread(
+                store.set_pair_states, [(job[0], cv[0]) for cv in job_cvs], "pending"
+            )
+            if len(job_cvs) == 1:
+                tasks.append(asyncio.create_task(evaluate_pair(job, job_cvs[0])))
+            elif job_cvs:
+                tasks.append(asyncio.create_task(evaluate_batch(job, job_cvs)))
+
+    async def dispatch():
+        try:
+            async for cv in cv_stream:
+                batches = batcher.add(cv) if batcher is not None else [[cv]]
+                for cvs in batches:
+                    await schedule(cvs)
+            if batcher is not None:
+                for cvs in batcher.flush():
+                    await schedule(cvs)
+            await asyncio.gather(*tasks)
+        finally:
+            await completed.put(None)
+
+    dispatcher = asyncio.create_task(dispatch())
+    try:
+        while (pair := await completed.get()) is not None:
+            yield pair
+        # surface errors raised by the cv stream
+        await dispatcher
+    finally:
+        dispatcher.cancel()
+
+
+async def aprocess_all_pairs(
+    model_tuples: List[Tuple[str, RunnableSequence]],
+    job_data: List[Tuple[str, str]],
+    cv_data: List[Tuple[str, str]],
+    store: ResultsStore,
+    pairs: Optional[Set[Tuple[str, str]]] = None,
+    resume: bool = False,
+):
+    """evaluate all job-cv pairs concurrently, bounded per interface"""
+
+    total_pairs = len(pairs) if pairs is not None else len(job_data) * len(cv_data)
+
+    with tqdm(total=total_pairs, desc="Processing job-cv pairs") as progress:
+        async for _ in astream_all_pairs(
+            model_tuples,
+            job_data,
+            aiter_sync(cv_data),
+            store,
+            pairs=pairs,
+            resume=resume,
         ):
-            try:
-                future = future.result()
-            except Exception as e:
-                print(f"Error: {e}")
+            progress.update(1)
+
+
+def process_all_pairs(
+    model_tuples: List[Tuple[str, RunnableSequence]],
+    job_data: List[Tuple[str, str]],
+    cv_data: List[Tuple[str, str]],
+    store: ResultsStore,
+    pairs: Optional[Set[Tuple[str, str]]] = None,
+    resume: bool = False,
+):
+    run_async(
+        aprocess_all_pairs(
+            model_tuples, job_data, cv_data, store, pairs=pairs, resume=resume
+        )
+    )
@@ -0,0 +1,93 @@
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import SystemMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.prompt_values import ChatPromptValue
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# anthropic only honours cache_control blocks with the beta header
+ANTHROPIC_PROMPT_CACHING_HEADERS = {"anthropic-beta": "prompt-caching-2024-07-31"}
+
+
+def mark_system_cacheable(prompt_value: ChatPromptValue) -> ChatPromptValue:
+    """mark the system messages as an anthropic cache breakpoint"""
+    messages = []
+    for message in prompt_value.to_messages():
+        if isinstance(message, SystemMessage) and isinstance(message.content, str):
+            message = SystemMessage(
+                content=[
+                    {
+                        "type": "text",
+                        "text": message.content,
+                        "cache_control": {"type": "ephemeral"},
+                    }
+                ]
+            )
+        messages.append(message)
+    return ChatPromptValue(messages=messages)
+
+
+def get_cache_usage(usage: Dict[str, Any]) -> Optional[Dict[str, int]]:
+    """read the cached input tokens from an anthropic or openai usage block"""
+    if "cache_read_input_tokens" in usage or "cache_creation_input_tokens" in usage:
+        # anthropic reports the cached tokens apart from input_tokens
+        cache_read = usage.get("cache_read_input_tokens") or 0
+        cache_write = usage.get("cache_creation_input_tokens") or 0
+        input_tokens = (usage.get("input_tokens") or 0) + cache_read + cache_write
+    elif isinstance(usage.get("prompt_tokens_details"), dict):
+        cache_read = usage["prompt_tokens_details"].get("cached_tokens") or 0
+        cache_write = 0
+        input_tokens = usage.get("prompt_tokens") or 0
+    else:
+        return None
+
+    return {
+        "input_tokens": input_tokens,
+        "cache_read_tokens": cache_read,
+        "cache_write_tokens": cache_write,
+    }
+
+
+def get_provider_usage(response: LLMResult) -> Optional[Dict[str, Any]]:
+    """the raw provider usage block of a call"""
+    llm_output = response.llm_output or {}
+    usage = llm_output.get("usage") or llm_output.get("token_usage")
+    if usage:
+        return usage
+
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            response_metadata = getattr(message, "response_metadata", {}) or {}
+            usage = response_metadata.get("usage") or response_metadata.get(
+                "token_usage"
+            )
+            if usage:
+                return usage
+    return None
+
+
+class PromptCacheCallbackHandler(BaseCallbackHandler):
+    """log the provider prompt cache hits of every call"""
+
+    def __init__(self, model_name: str) -> None:
+        self.model_name = model_name
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        usage = get_provider_usage(response)
+        if not isinstance(usage, dict):
+            return
+
+        cache_usage = get_cache_usage(usage)
+        if cache_usage is None:
+            return
+
+        logger.info(
+            f"Prompt cache ({self.model_name}): "
+            f"{cache_usage['cache_read_tokens']}/{cache_usage['input_tokens']} input tokens read from cache, "
+            f"{cache_usage['cache_write_tokens']} written"
+        )
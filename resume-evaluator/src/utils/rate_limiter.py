@@ -0,0 +1,401 @@
+import asyncio
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Type
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from ..config import config
+from ..utils.estimate_cost import count_message_tokens
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# header names used by the providers to report the remaining budget
+REMAINING_REQUESTS_HEADERS = (
+    "x-ratelimit-remaining-requests",
+    "anthropic-ratelimit-requests-remaining",
+)
+REMAINING_TOKENS_HEADERS = (
+    "x-ratelimit-remaining-tokens",
+    "anthropic-ratelimit-tokens-remaining",
+)
+RESET_REQUESTS_HEADERS = (
+    "x-ratelimit-reset-requests",
+    "anthropic-ratelimit-requests-reset",
+)
+RESET_TOKENS_HEADERS = (
+    "x-ratelimit-reset-tokens",
+    "anthropic-ratelimit-tokens-reset",
+)
+
+
+def parse_reset(value: str) -> Optional[float]:
+    """parse a reset header into seconds, e.g. "1s", "6m0s", "20ms", "12.5" or a RFC 3339 timestamp"""
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if parts:
+        return sum(float(number) * units[unit] for number, unit in parts)
+
+    try:
+        reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+    except ValueError:
+        return None
+
+
+def _first_header(headers: Mapping[str, str], names: Tuple[str, ...]) -> Optional[str]:
+    lowered = {k.lower(): v for k, v in headers.items()}
+    for name in names:
+        if name in lowered:
+            return lowered[name]
+    return None
+
+
+class AdaptiveRateLimiter(BaseRateLimiter):
+    """token-bucket rate limiter with requests/minute and tokens/minute budgets.
+
+    The request bucket is consumed on acquire. The token bucket is debited on
+    acquire with the tokens reserved for the request, its prompt and a running
+    estimate of the output tokens, and corrected with the difference between
+    the actual usage and that reservation once the response arrives. Provider
+    headers and 429 errors shrink the buckets or block the limiter until the
+    reported reset, and the effective rate is halved on every 429 and recovers
+    gradually on success.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: Optional[float] = None,
+        check_every_n_seconds: float = 0.05,
+        min_rate_scale: float = 0.1,
+    ) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.check_every_n_seconds = check_every_n_seconds
+        self.min_rate_scale = min_rate_scale
+
+        self._lock = threading.Lock()
+        self._available_requests = float(requests_per_minute)
+        self._available_tokens = (
+            float(tokens_per_minute) if tokens_per_minute is not None else None
+        )
+        # running estimates, of the tokens of a request whose prompt is unknown
+        # and of the output tokens of a request
+        self._estimated_tokens = 0.0
+        self._estimated_output_tokens = 0.0
+        self._rate_scale = 1.0
+        self._blocked_until = 0.0
+        self._last = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last
+        self._last = now
+
+        self._available_requests = min(
+            float(self.requests_per_minute),
+            self._available_requests
+            + elapsed * self.requests_per_minute * self._rate_scale / 60.0,
+        )
+        if self._available_tokens is not None:
+            self._available_tokens = min(
+                float(self.tokens_per_minute),
+                self._available_tokens
+                + elapsed * self.tokens_per_minute * self._rate_scale / 60.0,
+            )
+
+    def estimate_tokens(self, prompt_tokens: Optional[int] = None) -> float:
+        """tokens to reserve for a request, its prompt and the expected output"""
+        with self._lock:
+            if prompt_tokens is None:
+                return self._estimated_tokens
+            return prompt_tokens + self._estimated_output_tokens
+
+    def _consume(self, tokens: Optional[float] = None) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            if now < self._blocked_until or self._available_requests < 1:
+                return False
+
+            if self._available_tokens is not None:
+                if tokens is None:
+                    tokens = self._estimated_tokens
+                needed = min(tokens, float(self.tokens_per_minute))
+                if self._available_tokens < needed:
+                    return False
+                self._available_tokens -= tokens
+
+            self._available_requests -= 1
+            return True
+
+    def acquire(self, *, blocking: bool = True, tokens: Optional[float] = None) -> bool:
+        """take a request and tokens (the running estimate if None) from the buckets"""
+        if not blocking:
+            return self._consume(tokens)
+
+        while not self._consume(tokens):
+            time.sleep(self.check_every_n_seconds)
+        return True
+
+    async def aacquire(
+        self, *, blocking: bool = True, tokens: Optional[float] = None
+    ) -> bool:
+        if not blocking:
+            return self._consume(tokens)
+
+        while not self._consume(tokens):
+            await asyncio.sleep(self.check_every_n_seconds)
+        return True
+
+    def record_usage(
+        self,
+        total_tokens: int,
+        reserved: Optional[float] = None,
+        output_tokens: Optional[int] = None,
+    ) -> None:
+        """correct the token bucket with the actual usage of a request, reserved
+        is what its acquire debited (the running estimate if None)"""
+        with self._lock:
+            if reserved is None:
+                reserved = self._estimated_tokens
+            if self._available_tokens is not None:
+                self._available_tokens -= total_tokens - reserved
+
+            # exponential moving averages of the tokens per request
+            self._estimated_tokens = _moving_average(
+                self._estimated_tokens, total_tokens
+            )
+            if output_tokens is not None:
+                self._estimated_output_tokens = _moving_average(
+                    self._estimated_output_tokens, output_tokens
+                )
+
+            self._rate_scale = min(1.0, self._rate_scale + 0.05)
+
+    def release(self, tokens: float) -> None:
+        """give back the tokens reserved for a request that failed"""
+        with self._lock:
+            if self._available_tokens is not None:
+                self._available_tokens = min(
+                    float(self.tokens_per_minute), self._available_tokens + tokens
+                )
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """shrink the buckets to the remaining budget reported by the provider"""
+        remaining_requests = _first_header(headers, REMAINING_REQUESTS_HEADERS)
+        remaining_tokens = _first_header(headers, REMAINING_TOKENS_HEADERS)
+
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            for remaining, resets in (
+                (remaining_requests, RESET_REQUESTS_HEADERS),
+                (remaining_tokens, RESET_TOKENS_HEADERS),
+            ):
+                if remaining is None:
+                    continue
+                try:
+                    remaining = float(remaining)
+                except ValueError:
+                    continue
+
+                if resets is RESET_REQUESTS_HEADERS:
+                    self._available_requests = min(
+                        self._available_requests, remaining
+                    )
+                elif self._available_tokens is not None:
+                    self._available_tokens = min(self._available_tokens, remaining)
+
+                reset = _first_header(headers, resets)
+                if remaining <= 0 and reset is not None:
+                    delay = parse_reset(reset)
+                    if delay is not None:
+                        self._blocked_until = max(self._blocked_until, now + delay)
+
+    def backoff(self, retry_after: Optional[float] = None) -> None:
+        """block the limiter after a 429 and halve the effective rate"""
+        with self._lock:
+            self._rate_scale = max(self.min_rate_scale, self._rate_scale / 2)
+            delay = (
+                retry_after
+                if retry_after is not None
+                else 60.0 / (self.requests_per_minute * self._rate_scale)
+            )
+            self._blocked_until = max(
+                self._blocked_until, time.monotonic() + delay
+            )
+
+        logger.warning(
+            f"Rate limited, backing off for {delay:.2f}s. Rate scale: {self._rate_scale:.2f}"
+        )
+
+
+def _moving_average(average: float, value: float) -> float:
+    if average == 0:
+        return float(value)
+    return 0.8 * average + 0.2 * value
+
+
+def get_rate_limit_errors() -> Tuple[Type[Exception], ...]:
+    """collect the 429 exception types of the imported provider sdks, an sdk that
+    is not imported yet cannot have raised, so it is not imported here"""
+    errors = []
+    for module_name in ("openai", "groq", "anthropic"):
+        error = getattr(sys.modules.get(module_name), "RateLimitError", None)
+        if error is not None:
+            errors.append(error)
+    return tuple(errors)
+
+
+def get_retryable_errors() -> Tuple[Type[Exception], ...]:
+    """the 429, connection and 5xx exception types of the imported provider sdks,
+    retried by the chains since the sdk clients do not retry themselves"""
+    errors = list(get_rate_limit_errors())
+    for module_name in ("openai", "groq", "anthropic"):
+        module = sys.modules.get(module_name)
+        for name in ("APIConnectionError", "InternalServerError"):
+            error = getattr(module, name, None)
+            if error is not None:
+                errors.append(error)
+    return tuple(errors)
+
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    """read retry-after (or the reset headers) from a provider error"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    for names in (("retry-after",), RESET_REQUESTS_HEADERS, RESET_TOKENS_HEADERS):
+        value = _first_header(headers, names)
+        if value is not None:
+            delay = parse_reset(value)
+            if delay is not None:
+                return delay
+    return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    if isinstance(error, get_rate_limit_errors()):
+        return True
+    return getattr(error, "status_code", None) == 429
+
+
+class RateLimitCallbackHandler(AsyncCallbackHandler):
+    """acquire a limiter before each call, with the tokens of its prompt, and feed
+    usage, rate-limit headers and 429 errors back into it.
+
+    The limiter is acquired here rather than through the rate_limiter of the
+    chat model, which is acquired without the prompt and blocks the event loop
+    in async calls.
+    """
+
+    def __init__(self, rate_limiter: AdaptiveRateLimiter) -> None:
+        self.rate_limiter = rate_limiter
+        # tokens reserved by the calls in flight
+        self._reserved: Dict[UUID, float] = {}
+
+    async def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        tokens = self.rate_limiter.estimate_tokens(count_message_tokens(messages))
+        await self.rate_limiter.aacquire(tokens=tokens)
+        self._reserved[run_id] = tokens
+
+    async def on_llm_end(
+        self, response: LLMResult, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        reserved = self._reserved.pop(run_id, None)
+        for generations in response.generations:
+            for generation in generations:
+                generation_info = generation.generation_info or {}
+                message = getattr(generation, "message", None)
+                response_metadata = getattr(message, "response_metadata", {}) or {}
+
+                headers = generation_info.get("headers") or response_metadata.get(
+                    "headers"
+                )
+                if headers:
+                    self.rate_limiter.update_from_headers(headers)
+
+                usage = getattr(message, "usage_metadata", None)
+                if usage:
+                    self.rate_limiter.record_usage(
+                        usage.get("total_tokens", 0),
+                        reserved=reserved,
+                        output_tokens=usage.get("output_tokens"),
+                    )
+                    return
+
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        if token_usage.get("total_tokens"):
+            self.rate_limiter.record_usage(
+                token_usage["total_tokens"],
+                reserved=reserved,
+                output_tokens=token_usage.get("completion_tokens"),
+            )
+
+    async def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        reserved = self._reserved.pop(run_id, None)
+        if reserved is not None:
+            self.rate_limiter.release(reserved)
+        if is_rate_limit_error(error):
+            self.rate_limiter.backoff(get_retry_after(error))
+
+
+_rate_limiters: Dict[str, Optional[AdaptiveRateLimiter]] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(interface: str, model_id: str) -> Optional[AdaptiveRateLimiter]:
+    """get the shared rate limiter for an interface and model, None if unlimited.
+
+    The budgets are read from config.RATE_LIMITS, where a "interface/model" key
+    takes precedence over the interface key. The models without their own key
+    share the limiter, and the budget, of their interface.
+    """
+    interface = interface.lower()
+    key = f"{interface}/{model_id}"
+    if key not in config.RATE_LIMITS:
+        key = interface
+
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            limits = config.RATE_LIMITS.get(key, {})
+            requests_per_minute = limits.get("requests_per_minute")
+
+            if requests_per_minute:
+                _rate_limiters[key] = AdaptiveRateLimiter(
+                    requests_per_minute=requests_per_minute,
+                    tokens_per_minute=limits.get("tokens_per_minute"),
+                )
+                logger.info(f"Created rate limiter for {key}: {limits}")
+            else:
+                _rate_limiters[key] = None
+
+        return _rate_limiters[key]
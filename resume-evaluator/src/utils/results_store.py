@@ -0,0 +1,181 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PAIR_STATES = ("pending", "in_flight", "done", "failed")
+
+
+class ResultsStore:
+    """sqlite store of the job and cv evaluation results of a run, one row per model result"""
+
+    def __init__(self, db_path: Union[str, Path]) -> None:
+        self.db_path = Path(db_path)
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # with WAL, NORMAL only syncs at checkpoints and stays consistent on a crash
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id TEXT NOT NULL,
+                model_name TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (job_id, model_name)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cv_results (
+                job_id TEXT NOT NULL,
+                cv_id TEXT NOT NULL,
+                model_name TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (job_id, cv_id, model_name)
+            )
+            """
+        )
+        # run manifest, the state of each job-cv pair so that a run can be resumed
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pair_states (
+                job_id TEXT NOT NULL,
+                cv_id TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_id, cv_id)
+            )
+            """
+        )
+        # job_id lookups use the primary key
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cv_results_cv_id ON cv_results (cv_id)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cv_results_model_name ON cv_results (model_name)"
+        )
+        self._conn.commit()
+
+    # writer api
+
+    def save_job_result(self, job_id: str, model_name: str, result: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_results VALUES (?, ?, ?, ?)",
+                (job_id, model_name, json.dumps(result), time.time()),
+            )
+            self._conn.commit()
+
+    def save_cv_result(
+        self, job_id: str, cv_id: str, model_name: str, result: Any
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cv_results VALUES (?, ?, ?, ?, ?)",
+                (job_id, cv_id, model_name, json.dumps(result), time.time()),
+            )
+            self._conn.commit()
+
+    def set_pair_states(self, pairs: List[Tuple[str, str]], state: str) -> None:
+        """record the state of (job_id, cv_id) pairs, counting each dispatch"""
+        if state not in PAIR_STATES:
+            raise ValueError(f"Invalid pair state: {state}")
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO pair_states VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (job_id, cv_id) DO UPDATE SET
+                    state = excluded.state,
+                    attempts = attempts + excluded.attempts,
+                    updated_at = excluded.updated_at
+                """,
+                [
+                    (job_id, cv_id, state, int(state == "in_flight"), now)
+                    for job_id, cv_id in pairs
+                ],
+            )
+            self._conn.commit()
+
+    # reader api
+
+    def get_pair_states(
+        self, state: Optional[str] = None
+    ) -> Dict[Tuple[str, str], str]:
+        """{(job_id, cv_id): state} of all pairs, or of the pairs in a state"""
+        query = "SELECT job_id, cv_id, state FROM pair_states"
+        params = ()
+        if state is not None:
+            query += " WHERE state = ?"
+            params = (state,)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return {(job_id, cv_id): state for job_id, cv_id, state in rows}
+
+    def get_job_results(
+        self, job_id: Optional[str] = None
+    ) -> List[Tuple[str, str, Any]]:
+        """(job_id, model_name, result) of all jobs, or of a single job"""
+        query = "SELECT job_id, model_name, result FROM job_results"
+        params = ()
+        if job_id is not None:
+            query += " WHERE job_id = ?"
+            params = (job_id,)
+
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY created_at", params).fetchall()
+        return [
+            (job_id, model_name, json.loads(result))
+            for job_id, model_name, result in rows
+        ]
+
+    def get_cv_results(
+        self,
+        job_id: Optional[str] = None,
+        cv_id: Optional[str] = None,
+        model_name: Optional[str] = None,
+    ) -> List[dict]:
+        """{job_id, cv_id, model_name, result} records, optionally filtered"""
+        filters = {"job_id": job_id, "cv_id": cv_id, "model_name": model_name}
+        conditions = [
+            f"{column} = ?" for column, value in filters.items() if value is not None
+        ]
+        params = [value for value in filters.values() if value is not None]
+
+        query = "SELECT job_id, cv_id, model_name, result FROM cv_results"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY created_at", params).fetchall()
+
+        records = []
+        for job_id, cv_id, model_name, result in rows:
+            records.append(
+                {
+                    "job_id": job_id,
+                    "cv_id": cv_id,
+                    "model_name": model_name,
+                    "result": json.loads(result),
+                }
+            )
+        return records
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
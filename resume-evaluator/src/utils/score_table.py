@@ -0,0 +1,96 @@
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from uuid import uuid4
+
+import pandas as pd
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ScoreTable:
+    """append-only parquet table, rows are buffered and written as one part file per flush.
+
+    The part files are read once, the table is then kept in memory and
+    extended by each flush.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        columns: List[str],
+        numeric_columns: List[str],
+        flush_rows: int = 500,
+    ) -> None:
+        self.path = Path(path)
+        self.columns = columns
+        self.numeric_columns = numeric_columns
+        self.flush_rows = flush_rows
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending: List[Dict] = []
+        self._flushed: Optional[pd.DataFrame] = None
+
+    def _frame(self, rows: List[Dict]) -> pd.DataFrame:
+        """rows with a fixed schema, so that the part files can be read together"""
+        df = pd.DataFrame(rows).reindex(columns=self.columns)
+        for column in self.columns:
+            if column in self.numeric_columns:
+                df[column] = pd.to_numeric(df[column], errors="coerce").astype(
+                    "float64"
+                )
+            else:
+                df[column] = df[column].astype("string")
+        return df
+
+    def append(self, rows: Union[Dict, List[Dict]]) -> None:
+        if isinstance(rows, dict):
+            rows = [rows]
+        with self._lock:
+            self._pending.extend(rows)
+            if len(self._pending) >= self.flush_rows:
+                self._flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        part = self.path / f"part-{uuid4().hex}.parquet"
+        df = self._frame(self._pending)
+        df.to_parquet(part, index=False)
+        if self._flushed is not None:
+            self._flushed = self._concat([self._flushed, df])
+        logger.info(f"Appended {len(self._pending)} rows to the score table: {part}")
+        self._pending = []
+
+    def _concat(self, frames: List[pd.DataFrame]) -> pd.DataFrame:
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return self._frame([])
+        return pd.concat(frames, ignore_index=True)
+
+    def read(self) -> pd.DataFrame:
+        """the whole table, including the rows not flushed yet"""
+        with self._lock:
+            if self._flushed is None:
+                self._flushed = self._concat(
+                    [
+                        pd.read_parquet(part)
+                        for part in sorted(self.path.glob("*.parquet"))
+                    ]
+                )
+            return self._concat([self._flushed, self._frame(self._pending)])
+
+    def clear(self) -> None:
+        """delete the rows of the table"""
+        with self._lock:
+            for part in self.path.glob("*.parquet"):
+                part.unlink()
+            self._pending = []
+            self._flushed = self._frame([])
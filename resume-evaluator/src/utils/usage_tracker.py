@@ -0,0 +1,210 @@
+import statistics
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.context import register_configure_hook
+
+from ..config import config
+from ..utils.estimate_cost import count_message_tokens, count_tokens, token_cost
+from ..utils.logger import get_logger
+from ..utils.prompt_cache import get_provider_usage
+
+logger = get_logger(__name__)
+
+
+class BudgetExceededError(RuntimeError):
+    """raised before a model call that would take the run over its budget"""
+
+
+class UsageTracker(BaseCallbackHandler):
+    """record the token usage, cost and latency of every model call of a run.
+
+    With a budget (usd), each call reserves its estimated cost when it starts,
+    from its prompt tokens and the mean output tokens of the model, and the
+    reservation is replaced by the actual cost when it ends. A call whose
+    estimate does not fit in the budget left, once the calls in flight are
+    accounted for, raises a BudgetExceededError instead of reaching the
+    provider. The pairs it belongs to fail and are scored again when the run
+    is resumed.
+    """
+
+    # the budget check has to run before the call and to stop it
+    raise_error = True
+    run_inline = True
+
+    def __init__(self, budget: Optional[float] = None) -> None:
+        self.budget = budget
+        self.blocked_calls = 0
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._started: Dict[UUID, tuple] = {}
+        self._reserved: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cost(self) -> float:
+        with self._lock:
+            return sum(usage["cost"] for usage in self._models.values())
+
+    @property
+    def reserved_cost(self) -> float:
+        """estimated cost of the calls in flight"""
+        with self._lock:
+            return sum(self._reserved.values())
+
+    @property
+    def budget_exceeded(self) -> bool:
+        """whether the budget stopped any call, the run is then left unfinished"""
+        return self.budget is not None and (
+            self.blocked_calls > 0 or self.cost >= self.budget
+        )
+
+    def _expected_output_tokens(self, model_name: str) -> float:
+        usage = self._models.get(model_name)
+        if usage and usage["calls"]:
+            return usage["output_tokens"] / usage["calls"]
+        return config.CV_BATCH_OUTPUT_TOKENS_PER_CV
+
+    def _start(
+        self, run_id: UUID, metadata: Optional[Dict[str, Any]], prompt_tokens: int
+    ) -> None:
+        metadata = metadata or {}
+        model_name = (
+            f"{metadata.get('ls_provider', 'unknown')}/"
+            f"{metadata.get('ls_model_name', 'unknown')}"
+        )
+        with self._lock:
+            if self.budget is not None:
+                estimate = token_cost(
+                    model_name, prompt_tokens, self._expected_output_tokens(model_name)
+                )
+                spent = sum(usage["cost"] for usage in self._models.values())
+                if spent + sum(self._reserved.values()) + estimate > self.budget:
+                    self.blocked_calls += 1
+                    raise BudgetExceededError(
+                        f"Budget of ${self.budget:.2f} reached, {model_name} not called"
+                    )
+                self._reserved[run_id] = estimate
+            self._started[run_id] = (model_name, time.monotonic())
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(run_id, metadata, count_message_tokens(messages))
+
+    def on_llm_start(
+        self,
+        serialized: Dict[str, Any],
+        prompts: List[str],
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(run_id, metadata, sum(count_tokens(prompt) for prompt in prompts))
+
+    def _usage(self, model_name: str) -> Dict[str, Any]:
+        return self._models.setdefault(
+            model_name,
+            {
+                "calls": 0,
+                "failed_calls": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cache_read_tokens": 0,
+                "cache_write_tokens": 0,
+                "cost": 0.0,
+                "latencies": [],
+            },
+        )
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        input_tokens, output_tokens = 0, 0
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage_metadata = getattr(message, "usage_metadata", None) or {}
+                input_tokens += usage_metadata.get("input_tokens") or 0
+                output_tokens += usage_metadata.get("output_tokens") or 0
+
+        # anthropic reports the prompt cache reads and writes apart from the
+        # input tokens, openai counts its cached tokens in them
+        provider_usage = get_provider_usage(response) or {}
+        cache_read_tokens = provider_usage.get("cache_read_input_tokens") or 0
+        cache_write_tokens = provider_usage.get("cache_creation_input_tokens") or 0
+
+        with self._lock:
+            model_name, started_at = self._started.pop(
+                run_id, ("unknown/unknown", time.monotonic())
+            )
+            self._reserved.pop(run_id, None)
+            usage = self._usage(model_name)
+            usage["calls"] += 1
+            usage["input_tokens"] += input_tokens
+            usage["output_tokens"] += output_tokens
+            usage["cache_read_tokens"] += cache_read_tokens
+            usage["cache_write_tokens"] += cache_write_tokens
+            usage["cost"] += token_cost(
+                model_name,
+                input_tokens,
+                output_tokens,
+                cache_read_tokens,
+                cache_write_tokens,
+            )
+            usage["latencies"].append(time.monotonic() - started_at)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        with self._lock:
+            self._reserved.pop(run_id, None)
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                self._usage(started[0])["failed_calls"] += 1
+
+    def report(self) -> Dict[str, Any]:
+        """per-model usage, cost and latency of the run"""
+        with self._lock:
+            models = {}
+            for model_name, usage in sorted(self._models.items()):
+                latencies = sorted(usage["latencies"])
+                models[model_name] = {
+                    **{k: v for k, v in usage.items() if k != "latencies"},
+                    "mean_latency_seconds": (
+                        statistics.fmean(latencies) if latencies else None
+                    ),
+                    "p95_latency_seconds": (
+                        latencies[int(0.95 * (len(latencies) - 1))]
+                        if latencies
+                        else None
+                    ),
+                }
+
+        return {
+            "models": models,
+            "total_cost": sum(usage["cost"] for usage in models.values()),
+            "total_input_tokens": sum(u["input_tokens"] for u in models.values()),
+            "total_output_tokens": sum(u["output_tokens"] for u in models.values()),
+            "budget": self.budget,
+            "budget_exceeded": self.budget_exceeded,
+            "blocked_calls": self.blocked_calls,
+        }
+
+
+# the tracker of the current run, added to the callbacks of every model call
+# made in its context, so that the pooled models need no per-run callbacks
+usage_tracker_var: ContextVar[Optional[UsageTracker]] = ContextVar(
+    "usage_tracker", default=None
+)
+register_configure_hook(usage_tracker_var, inheritable=True)
@@ -0,0 +1,249 @@
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, List, Optional, Set
+from uuid import uuid4
+
+from ..config import config
+from ..utils.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # windows, the runs of other processes are not detected
+    fcntl = None
+
+logger = get_logger(__name__)
+
+# runs created by this process that are still being processed
+_active_runs: Set[str] = set()
+_active_runs_lock = threading.Lock()
+
+# the runs with another status did not complete and can be resumed
+TERMINAL_STATUSES = ("done",)
+
+
+@dataclass
+class RunWorkspace:
+    """directory layout of a single evaluation run under config.RUNS_DIR"""
+
+    run_id: str
+    root: Path
+    # lock file held while the run is processed, see is_run_active
+    _lock_file: Optional[IO] = field(default=None, repr=False, compare=False)
+
+    @property
+    def pdf_dir(self) -> Path:
+        return self.root / "input/pdf"
+
+    @property
+    def results_db(self) -> Path:
+        return self.root / "output/results.sqlite"
+
+    @property
+    def csv_dir(self) -> Path:
+        return self.root / "output/csv"
+
+    @property
+    def scores_dir(self) -> Path:
+        return self.root / "output/scores"
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / "manifest.json"
+
+    @property
+    def cost_report_path(self) -> Path:
+        return self.root / "output/cost_report.json"
+
+    @property
+    def lock_path(self) -> Path:
+        return self.root / "run.lock"
+
+    def _lock(self) -> None:
+        """hold the lock file of the run, raises a ValueError if another process
+        holds it"""
+        with _active_runs_lock:
+            if self.run_id in _active_runs:
+                raise ValueError(f"Run {self.run_id} is already in progress")
+            if fcntl is not None:
+                lock_file = open(self.lock_path, "a")
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    lock_file.close()
+                    raise ValueError(
+                        f"Run {self.run_id} is in progress in another process"
+                    )
+                self._lock_file = lock_file
+            _active_runs.add(self.run_id)
+
+    def write_manifest(self, **fields: Any) -> None:
+        """update the run manifest, replaced atomically so it is never half written"""
+        manifest = {**self.read_manifest(), **fields, "updated_at": time.time()}
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.manifest_path)
+
+    def read_manifest(self) -> dict:
+        if not self.manifest_path.exists():
+            return {}
+        return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+
+    @staticmethod
+    def new_run_id() -> str:
+        """run ids sort by creation time"""
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid4().hex[:8]}"
+
+    @classmethod
+    def create(cls, run_id: Optional[str] = None) -> "RunWorkspace":
+        """create a new run directory"""
+        run_id = run_id or cls.new_run_id()
+        workspace = cls.open(run_id)
+        for directory in (
+            workspace.pdf_dir,
+            workspace.csv_dir,
+            workspace.scores_dir,
+        ):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        workspace._lock()
+        logger.info(f"Created run workspace: {workspace.root}")
+        return workspace
+
+    @classmethod
+    def open(cls, run_id: str) -> "RunWorkspace":
+        return cls(run_id=run_id, root=Path(config.RUNS_DIR) / run_id)
+
+    @classmethod
+    def resume(cls, run_id: str) -> "RunWorkspace":
+        """reopen an existing run to finish it"""
+        workspace = cls.open(run_id)
+        if not workspace.manifest_path.exists():
+            raise ValueError(f"No resumable run found: {run_id}")
+
+        workspace._lock()
+        logger.info(f"Resuming run workspace: {workspace.root}")
+        return workspace
+
+    def close(self) -> None:
+        """mark the run as finished so that it can be garbage collected"""
+        with _active_runs_lock:
+            _active_runs.discard(self.run_id)
+            if self._lock_file is not None:
+                # closing the file releases the lock
+                self._lock_file.close()
+                self._lock_file = None
+
+
+def is_run_active(run_id: str) -> bool:
+    """whether a run is being processed, by this process or by another one (e.g.
+    the cli and the app) holding its lock file"""
+    with _active_runs_lock:
+        if run_id in _active_runs:
+            return True
+
+    lock_path = RunWorkspace.open(run_id).lock_path
+    if fcntl is None or not lock_path.exists():
+        return False
+    with open(lock_path, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    return False
+
+
+def read_run_status(run: Path) -> Optional[str]:
+    """status in the manifest of a run directory, None without a readable manifest"""
+    try:
+        return RunWorkspace.open(run.name).read_manifest().get("status")
+    except (OSError, ValueError):
+        return None
+
+
+def list_unfinished_runs() -> List[str]:
+    """ids of the runs with a manifest that did not complete, newest first"""
+    runs_dir = Path(config.RUNS_DIR)
+    if not runs_dir.exists():
+        return []
+
+    unfinished = []
+    for run in sorted(runs_dir.iterdir(), reverse=True):
+        if not run.is_dir() or is_run_active(run.name):
+            continue
+        status = read_run_status(run)
+        if status is not None and status not in TERMINAL_STATUSES:
+            unfinished.append(run.name)
+    return unfinished
+
+
+def _directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def cleanup_runs(
+    max_age_seconds: Optional[float] = None, max_bytes: Optional[int] = None
+) -> List[str]:
+    """remove runs older than max_age_seconds, then the oldest finished runs until
+    the total size fits max_bytes.
+
+    The runs in progress, in any process, are kept. The unfinished runs, which
+    can be resumed, are only removed once older than max_age_seconds.
+    """
+    if max_age_seconds is None:
+        max_age_seconds = config.RUN_RETENTION_MAX_AGE_DAYS * 24 * 3600
+    if max_bytes is None:
+        max_bytes = config.RUN_RETENTION_MAX_BYTES
+
+    runs_dir = Path(config.RUNS_DIR)
+    if not runs_dir.exists():
+        return []
+
+    # oldest first
+    runs = sorted(
+        (run for run in runs_dir.iterdir() if run.is_dir()),
+        key=lambda run: run.stat().st_mtime,
+    )
+    sizes = {run: _directory_size(run) for run in runs}
+    total_size = sum(sizes.values())
+
+    removed = []
+    now = time.time()
+    for run in runs:
+        too_old = now - run.stat().st_mtime > max_age_seconds
+        too_big = total_size > max_bytes and read_run_status(run) in TERMINAL_STATUSES
+        if not (too_old or too_big) or is_run_active(run.name):
+            continue
+
+        shutil.rmtree(run, ignore_errors=True)
+        total_size -= sizes[run]
+        removed.append(run.name)
+
+    if removed:
+        logger.info(f"Removed {len(removed)} run workspaces: {removed}")
+    return removed
+
+
+def start_background_cleanup(
+    interval_seconds: Optional[float] = None,
+) -> threading.Thread:
+    """run cleanup_runs periodically on a daemon thread"""
+    if interval_seconds is None:
+        interval_seconds = config.RUN_CLEANUP_INTERVAL_SECONDS
+
+    def _loop():
+        while True:
+            try:
+                cleanup_runs()
+            except Exception as e:
+                logger.error(f"Error cleaning up run workspaces: {e}")
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=_loop, name="run-cleanup", daemon=True)
+    thread.start()
+    return thread
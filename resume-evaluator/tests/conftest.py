@@ -0,0 +1,113 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+# the package is imported as "src", with resume-evaluator on the path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# the runtime data and the logs of the tests are kept out of the tree, the
+# config reads them from the environment when it is first imported
+_data_dir = Path(tempfile.mkdtemp(prefix="resume-evaluator-tests-"))
+(_data_dir / "logs").mkdir()
+os.environ["OUTPUT_DIR"] = str(_data_dir / "output")
+os.environ["RUNS_DIR"] = str(_data_dir / "output" / "runs")
+os.environ["CACHE_DIR"] = str(_data_dir / "output" / "cache")
+os.environ["LOG_FILE"] = str(_data_dir / "logs" / "evaluation_log.txt")
+
+from src.config import config  # noqa: E402
+from src.preprocessing import input_data_processing  # noqa: E402
+from src.utils import estimate_cost  # noqa: E402
+
+
+class WordTokenizer:
+    """one token per word, tiktoken downloads its encodings on first use"""
+
+    def encode(self, text: str) -> list:
+        return text.split()
+
+
+@pytest.fixture(autouse=True)
+def word_tokenizer(monkeypatch):
+    monkeypatch.setattr(estimate_cost, "_tokenizer", WordTokenizer())
+
+
+JOB_ANALYSIS = {
+    "technical_skills": {"essential": ["python", "sql"], "advantageous": ["aws"]},
+    "soft_skills": ["communication"],
+    "level_of_exp": "mid-level",
+    "education": ["bachelor"],
+}
+
+
+def cv_result(score: int = 80, suitability: str = "yes") -> dict:
+    """a valid cv evaluation with the same score in every section"""
+    scores = {
+        "technical_skills": score,
+        "soft_skills": score,
+        "experience": score,
+        "education": score,
+    }
+    return {
+        "resume_evaluation": {"original_scores": scores, "missing_skills": []},
+        "deeper_analysis": {"inferred_experience": []},
+        "recalibrated_scores": scores,
+        "assessment": {
+            "suitability": suitability,
+            "strengths": "relevant experience",
+            "concerns": "none",
+        },
+    }
+
+
+@pytest.fixture
+def fake_chains(monkeypatch):
+    """fake jd and cv graders for the pipeline, the scored resumes are recorded"""
+    scored = []
+
+    def get_eval_chain(model_text, model_id, api_key=None, eval_type="jd"):
+        if eval_type == "jd":
+            return "fake", RunnableLambda(lambda input: JOB_ANALYSIS)
+        return "fake", RunnableLambda(
+            lambda input: scored.append(input["resume"]) or cv_result()
+        )
+
+    monkeypatch.setattr(input_data_processing, "get_eval_chain", get_eval_chain)
+    monkeypatch.setattr(config, "LLM_CACHE_ENABLED", False)
+    return scored
+
+
+def make_pdf(path, pages):
+    """write a minimal pdf with one line of text per page"""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages))), len(pages)
+        ),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    content = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(content))
+        content += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(content)
+    content += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    content += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    content += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    )
+    path.write_bytes(content.encode("latin-1"))
+    return path
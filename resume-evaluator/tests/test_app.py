@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+from conftest import JOB_ANALYSIS, cv_result
+from src import app
+from src.evaluators.post_analysis import flatten_result, open_score_table, read_results
+from src.models.input_models import CandidateEvaluationWeights
+from src.utils.job_queue import EvaluationJob
+from src.utils.workspace import RunWorkspace
+
+SUBMITTED = CandidateEvaluationWeights(
+    technical_skills=60, soft_skills=10, experience=20, education=10
+)
+RERANKED = CandidateEvaluationWeights(
+    technical_skills=10, soft_skills=10, experience=10, education=70
+)
+
+
+def handler(demo, name):
+    return next(f.fn for f in demo.fns.values() if f.fn.__name__ == name)
+
+
+def result(technical_skills, education):
+    result = cv_result()
+    result["recalibrated_scores"]["technical_skills"] = technical_skills
+    result["recalibrated_scores"]["education"] = education
+    return result
+
+
+@pytest.fixture
+def running_job(monkeypatch):
+    """a run still scoring, its strong technical cv ranked first at submit time"""
+    job = EvaluationJob(run_id=RunWorkspace.new_run_id(), status="running")
+    score_table = open_score_table(RunWorkspace.open(job.run_id).scores_dir)
+    score_table.append(
+        [
+            flatten_result("job-1", "cv-0", "groq", result(100, 0)),
+            flatten_result("job-1", "cv-1", "groq", result(0, 100)),
+        ]
+    )
+    texts = pd.DataFrame(
+        [
+            {
+                "job_id": "job-1",
+                "cv_id": f"cv-{i}",
+                "cv_text": "",
+                "job_text": "",
+                "job_analysis": JOB_ANALYSIS,
+            }
+            for i in range(2)
+        ]
+    )
+    job.results = read_results(score_table, SUBMITTED, texts)
+    job.version = 1
+
+    class Queue:
+        def get(self, run_id):
+            return job if run_id == job.run_id else None
+
+    monkeypatch.setattr(app, "get_job_queue", Queue)
+    return job
+
+
+def top_candidates(outputs):
+    results_df = outputs[9]
+    return results_df.sort_values("recalibrated_overall_score", ascending=False)[
+        "cv_id"
+    ].tolist()
+
+
+def test_polling_keeps_the_weights_the_user_reranked_with(running_job):
+    demo = app.create_gradio_app()
+    poll_evaluation = handler(demo, "poll_evaluation")
+    reweight_results = handler(demo, "reweight_results")
+
+    assert top_candidates(poll_evaluation(running_job.run_id, 0, None)) == [
+        "cv-0",
+        "cv-1",
+    ]
+
+    outputs = reweight_results(
+        running_job.run_id, running_job.results, *RERANKED.model_dump().values()
+    )
+    assert top_candidates(outputs) == ["cv-1", "cv-0"]
+    weights = outputs[-1]
+    assert weights == RERANKED
+
+    # new results land while the run is still scoring
+    running_job.version = 2
+    assert top_candidates(poll_evaluation(running_job.run_id, 1, weights)) == [
+        "cv-1",
+        "cv-0",
+    ]
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from conftest import cv_result
+from src.utils.async_utils import aiter_sync, get_event_loop, iter_async, run_async
+from src.utils.process_jobs import astream_all_pairs
+from src.utils.results_store import ResultsStore
+
+
+def test_blocking_iterator_does_not_block_the_event_loop():
+    ticks = []
+
+    def slow_items():
+        for i in range(3):
+            time.sleep(0.05)
+            yield i
+
+    async def tick():
+        while True:
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        ticker = asyncio.create_task(tick())
+        items = [item async for item in aiter_sync(slow_items())]
+        ticker.cancel()
+        return items
+
+    assert asyncio.run(main()) == [0, 1, 2]
+    assert len(ticks) > 5
+
+
+def test_iter_async_reports_idle_periods_and_errors():
+    async def items():
+        yield 1
+        await asyncio.sleep(0.15)
+        yield 2
+        raise ValueError("parse error")
+
+    results = []
+    with pytest.raises(ValueError):
+        for item in iter_async(items(), timeout=0.05):
+            results.append(item)
+
+    assert results[0] == 1 and results[-1] == 2
+    assert None in results
+
+
+def test_runs_share_one_event_loop():
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    assert run_async(current_loop()) is get_event_loop()
+    assert get_event_loop() is get_event_loop()
+
+
+def test_cvs_are_scored_while_the_rest_are_still_parsed(tmp_path):
+    first_scored = threading.Event()
+
+    def parse_cvs():
+        yield ("cv-0", "resume cv-0")
+        # the next cv is only parsed once the first one has been scored
+        assert first_scored.wait(timeout=5), "the first cv waited for the others"
+        yield ("cv-1", "resume cv-1")
+
+    async def main():
+        results = []
+        async for job, cv, model_results in astream_all_pairs(
+            ("fake", RunnableLambda(lambda input: cv_result())),
+            [("job-1", {})],
+            aiter_sync(parse_cvs()),
+            ResultsStore(tmp_path / "results.db"),
+        ):
+            results.append(cv[0])
+            first_scored.set()
+        return results
+
+    assert asyncio.run(main()) == ["cv-0", "cv-1"]
@@ -0,0 +1,112 @@
+import asyncio
+
+from langchain_core.runnables import RunnableLambda
+
+from conftest import cv_result
+from src.evaluators.batch_evaluators import (
+    CVBatcher,
+    atwo_stage_eval_cv_batch,
+    format_resumes,
+    parse_batch_result,
+)
+from src.utils.results_store import ResultsStore
+
+
+def test_resumes_are_tagged_with_their_cv_id():
+    assert format_resumes([("cv-1", "Jane"), ("cv-2", "John")]) == (
+        '<resume cv_id="cv-1">\nJane\n</resume>\n\n'
+        '<resume cv_id="cv-2">\nJohn\n</resume>'
+    )
+
+
+def test_batch_output_is_mapped_by_cv_id():
+    expected = {"cv-1": cv_result(90), "cv-2": cv_result(40, "no")}
+
+    as_list = [
+        {"cv_id": "cv-1", **cv_result(90)},
+        {"cv_id": "cv-2", **cv_result(40, "no")},
+    ]
+    assert parse_batch_result(as_list) == expected
+    assert parse_batch_result({"results": as_list}) == expected
+    assert parse_batch_result({"cv-1": cv_result(90), "cv-2": cv_result(40, "no")}) == (
+        expected
+    )
+
+
+def test_malformed_batch_entries_are_dropped():
+    results = parse_batch_result(
+        [
+            {"cv_id": "cv-1", **cv_result()},
+            {"cv_id": "cv-2", "assessment": "missing scores"},
+            {**cv_result()},
+            "not an object",
+        ]
+    )
+
+    assert list(results) == ["cv-1"]
+
+
+def test_batcher_packs_cvs_up_to_the_token_budget():
+    # one token per word, each cv takes 3 tokens plus 2 of output
+    batcher = CVBatcher(
+        token_budget=10, output_tokens_per_cv=2, max_batch_size=5, max_cv_tokens=5
+    )
+
+    ready = []
+    for i in range(5):
+        ready += batcher.add((f"cv-{i}", "one two three"))
+    ready += batcher.flush()
+
+    assert [[cv_id for cv_id, _ in batch] for batch in ready] == [
+        ["cv-0", "cv-1"],
+        ["cv-2", "cv-3"],
+        ["cv-4"],
+    ]
+
+
+def test_batcher_caps_the_batch_size_and_scores_long_cvs_alone():
+    batcher = CVBatcher(
+        token_budget=1000, output_tokens_per_cv=0, max_batch_size=2, max_cv_tokens=5
+    )
+
+    assert batcher.add(("long", "one two three four five six")) == [
+        [("long", "one two three four five six")]
+    ]
+    assert batcher.add(("cv-0", "short")) == []
+    assert batcher.add(("cv-1", "short")) == []
+    assert batcher.add(("cv-2", "short")) == [[("cv-0", "short"), ("cv-1", "short")]]
+    assert batcher.flush() == [[("cv-2", "short")]]
+    assert batcher.flush() == []
+
+
+def test_cvs_missing_from_the_batch_output_fall_back_to_single_calls(tmp_path):
+    single_calls = []
+
+    def batch_grader(input):
+        # the model skips the second resume
+        return [{"cv_id": "cv-1", **cv_result(90)}]
+
+    def single_grader(input):
+        single_calls.append(input["resume"])
+        return cv_result(50, "kiv")
+
+    store = ResultsStore(tmp_path / "results.db")
+    results = asyncio.run(
+        atwo_stage_eval_cv_batch(
+            ("fake", RunnableLambda(batch_grader)),
+            ("fake", RunnableLambda(single_grader)),
+            ("job-1", "requirements"),
+            [("cv-1", "Jane"), ("cv-2", "John")],
+            store,
+        )
+    )
+
+    assert results == {
+        "cv-1": {"fake": cv_result(90)},
+        "cv-2": {"fake": cv_result(50, "kiv")},
+    }
+    assert single_calls == ["John"]
+    assert {record["cv_id"] for record in store.get_cv_results("job-1")} == {
+        "cv-1",
+        "cv-2",
+    }
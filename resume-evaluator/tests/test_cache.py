@@ -0,0 +1,152 @@
+import asyncio
+import threading
+
+from langchain_core.runnables import RunnableLambda
+
+from src.utils.cache import (
+    CachedGrader,
+    ParsedTextCache,
+    ResultCache,
+    make_cache_key,
+    text_id,
+)
+
+
+def entry(i: int) -> dict:
+    # 100 bytes once serialized
+    return {"id": f"{i:04d}", "text": "x" * 74}
+
+
+def test_cache_key_ignores_formatting_only_differences():
+    key = make_cache_key("prompt", "groq/llama3", 0.0, {"resume": "Python  \n SQL"})
+
+    assert key == make_cache_key("prompt", "groq/llama3", 0.0, {"resume": "Python SQL"})
+    assert key != make_cache_key(
+        "prompt", "openai/gpt-4", 0.0, {"resume": "Python SQL"}
+    )
+    assert key != make_cache_key("prompt", "groq/llama3", 0.5, {"resume": "Python SQL"})
+
+
+def test_text_id_is_stable_across_whitespace():
+    assert text_id("Jane Doe\n\nPython") == text_id("Jane Doe Python")
+
+
+def test_full_cache_is_evicted_to_the_low_water_mark(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path / "cache.sqlite", max_size_bytes=1000)
+    evictions = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, "_evict", lambda: evictions.append(1) or evict())
+
+    for i in range(11):
+        cache.set(f"key-{i}", entry(i))
+
+    assert len(evictions) == 1
+    assert cache.stats()["size_bytes"] <= 900
+    assert cache.get("key-0") is None
+    assert cache.get("key-10") == entry(10)
+
+    # the room made by the eviction takes the next insert without evicting again
+    cache.set("key-11", entry(11))
+    assert len(evictions) == 1
+
+
+def test_recently_read_entries_are_kept(tmp_path):
+    cache = ResultCache(tmp_path / "cache.sqlite", max_size_bytes=1000)
+    for i in range(10):
+        cache.set(f"key-{i}", entry(i))
+
+    cache.get("key-0")
+    cache.set("key-10", entry(10))
+
+    assert cache.get("key-0") == entry(0)
+    assert cache.get("key-1") is None
+
+
+def test_running_size_follows_replaced_entries(tmp_path):
+    cache = ResultCache(tmp_path / "cache.sqlite", max_size_bytes=10_000)
+
+    cache.set("key", entry(0))
+    cache.set("key", {"short": 1})
+    cache.set("other", entry(1))
+
+    assert cache._total_size == cache.stats()["size_bytes"]
+    assert ResultCache(tmp_path / "cache.sqlite", 10_000)._total_size == (
+        cache._total_size
+    )
+
+
+def test_cached_grader_invokes_the_grader_on_a_miss_only(tmp_path):
+    calls = []
+
+    async def grade(input):
+        calls.append(input)
+        return {"score": len(calls)}
+
+    grader = CachedGrader(
+        RunnableLambda(lambda input: None, afunc=grade),
+        cache=ResultCache(tmp_path / "cache.sqlite", max_size_bytes=10_000),
+        prompt_template="prompt",
+        model_id="groq/llama3",
+        temperature=0.0,
+    )
+
+    first = asyncio.run(grader.ainvoke({"resume": "Python SQL"}))
+    second = asyncio.run(grader.ainvoke({"resume": "Python  SQL "}))
+
+    assert first == second == {"score": 1}
+    assert len(calls) == 1
+    assert grader.cache.stats()["hits"] == 1
+
+
+def test_cached_grader_reads_and_writes_the_cache_off_the_event_loop(tmp_path):
+    threads = []
+
+    class RecordingCache(ResultCache):
+        def get(self, key):
+            threads.append(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key, value):
+            threads.append(threading.get_ident())
+            super().set(key, value)
+
+    grader = CachedGrader(
+        RunnableLambda(lambda input: {"score": 1}),
+        cache=RecordingCache(tmp_path / "cache.sqlite", max_size_bytes=10_000),
+        prompt_template="prompt",
+        model_id="groq/llama3",
+        temperature=0.0,
+    )
+
+    asyncio.run(grader.ainvoke({"resume": "Python SQL"}))
+
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+
+
+def test_parsed_text_is_keyed_by_hash_and_extractor_version(tmp_path):
+    text_cache = ParsedTextCache(tmp_path / "pdf_text.sqlite")
+
+    text_cache.set("abc", "pypdf-4/1", ["page one", None, "page three"])
+
+    assert text_cache.get("abc", "pypdf-4/1") == ["page one", "", "page three"]
+    assert text_cache.get("abc", "pypdf-5/1") is None
+    assert text_cache.get("def", "pypdf-4/1") is None
+    assert text_cache.stats() == {"hits": 1, "misses": 2, "documents": 1}
+
+
+def test_parsed_text_survives_a_restart(tmp_path):
+    ParsedTextCache(tmp_path / "pdf_text.sqlite").set("abc", "v1", ["Jane Doe"])
+
+    assert ParsedTextCache(tmp_path / "pdf_text.sqlite").get("abc", "v1") == [
+        "Jane Doe"
+    ]
+
+
+def test_a_document_with_missing_pages_is_a_miss(tmp_path):
+    text_cache = ParsedTextCache(tmp_path / "pdf_text.sqlite")
+    text_cache.set("abc", "v1", ["one", "two"])
+    with text_cache._lock:
+        text_cache._conn.execute("DELETE FROM pages WHERE page_number = 1")
+
+    assert text_cache.get("abc", "v1") is None
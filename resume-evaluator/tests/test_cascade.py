@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from conftest import cv_result
+from src.config import config
+from src.evaluators.cascade import CascadeGrader, overall_score
+from src.models.input_models import CandidateEvaluationWeights
+
+WEIGHTS = CandidateEvaluationWeights(
+    technical_skills=60, soft_skills=10, experience=20, education=10
+)
+
+
+def grader(result, calls):
+    def evaluate(input):
+        calls.append(input)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return RunnableLambda(evaluate)
+
+
+def cascade(screening_result, **kwargs):
+    screening_calls, strong_calls = [], []
+    grader_ = CascadeGrader(
+        ("groq/cheap", grader(screening_result, screening_calls)),
+        ("openai/strong", grader(cv_result(95, "yes"), strong_calls)),
+        WEIGHTS,
+        **kwargs,
+    )
+    return grader_, strong_calls
+
+
+def test_overall_score_is_the_weighted_recalibrated_score():
+    result = cv_result(80)
+    result["recalibrated_scores"]["technical_skills"] = 50
+
+    assert overall_score(result, WEIGHTS) == pytest.approx(62)
+    assert overall_score({"recalibrated_scores": {}}, WEIGHTS) is None
+
+
+def test_confident_results_are_kept():
+    grader_, strong_calls = cascade(cv_result(90, "yes"))
+
+    result = grader_.invoke({})
+
+    assert strong_calls == []
+    assert result["recalibrated_scores"]["technical_skills"] == 90
+    assert result["cascade"] == {
+        "screening_model": "groq/cheap",
+        "escalated": False,
+        "reason": None,
+        "screening_result": None,
+    }
+
+
+@pytest.mark.parametrize(
+    "screening_result, reason",
+    [
+        (cv_result(90, "kiv"), "kiv"),
+        (cv_result(65, "yes"), "boundary"),
+        ({"assessment": {}}, "invalid"),
+        (RuntimeError("unparseable output"), "invalid"),
+    ],
+)
+def test_uncertain_results_are_escalated(screening_result, reason):
+    grader_, strong_calls = cascade(screening_result)
+
+    result = asyncio.run(grader_.ainvoke({"resume": "Jane Doe"}))
+
+    assert strong_calls == [{"resume": "Jane Doe"}]
+    assert result["recalibrated_scores"]["technical_skills"] == 95
+    assert result["cascade"]["escalated"]
+    assert result["cascade"]["reason"] == reason
+
+
+def test_escalation_reasons_can_be_switched_off():
+    grader_, strong_calls = cascade(cv_result(65, "kiv"), escalate_on=["invalid"])
+    grader_.invoke({})
+    assert strong_calls == []
+
+    grader_, _ = cascade(RuntimeError("rate limited"), escalate_on=["kiv"])
+    with pytest.raises(RuntimeError):
+        grader_.invoke({})
+
+
+def test_escalation_rate_is_counted():
+    grader_, _ = cascade(cv_result(65, "yes"), boundary_score=60, boundary_margin=2)
+    for _ in range(3):
+        grader_.invoke({})
+    grader_.screening_tuple = ("groq/cheap", grader(cv_result(61, "yes"), []))
+    grader_.invoke({})
+
+    assert (grader_.scored, grader_.escalated) == (4, 1)
+    assert grader_.escalation_rate == 0.25
+
+
+def test_unknown_escalation_reason_is_rejected():
+    with pytest.raises(ValueError):
+        cascade(cv_result(), escalate_on=["low_score"])
+
+
+def test_calls_are_bounded_per_interface(monkeypatch):
+    monkeypatch.setitem(config.MAX_CONCURRENCY, "groq", 2)
+    in_flight, peak = [], []
+
+    def tracked(result):
+        async def evaluate(input):
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.02)
+            in_flight.pop()
+            return result
+
+        return RunnableLambda(lambda input: result, afunc=evaluate)
+
+    grader_ = CascadeGrader(
+        ("groq/cheap", tracked(cv_result(90, "kiv"))),
+        ("groq/strong", tracked(cv_result(95, "yes"))),
+        WEIGHTS,
+    )
+
+    async def score_all():
+        return await asyncio.gather(*(grader_.ainvoke({}) for _ in range(8)))
+
+    results = asyncio.run(score_all())
+
+    assert all(result["cascade"]["escalated"] for result in results)
+    assert max(peak) == 2
@@ -0,0 +1,67 @@
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.config import config
+from src.evaluators import chains
+from src.evaluators.chains import get_ensemble_chain, get_model
+from src.utils import helper
+from src.utils.helper import set_and_verify_api_key
+
+MODEL_ID = "llama3-70b-8192"
+
+
+@pytest.fixture(autouse=True)
+def environment_key(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "gsk-environment")
+
+
+def test_model_uses_the_key_of_the_run():
+    model = get_model("groq", MODEL_ID, api_key="gsk-run")
+
+    assert model.groq_api_key.get_secret_value() == "gsk-run"
+
+
+def test_model_falls_back_to_the_key_in_the_environment():
+    model = get_model("groq", MODEL_ID, api_key="")
+
+    assert model.groq_api_key.get_secret_value() == "gsk-environment"
+
+
+def test_runs_with_different_keys_do_not_share_a_model():
+    first = get_model("Groq", MODEL_ID, api_key="gsk-first")
+    second = get_model("Groq", MODEL_ID, api_key="gsk-second")
+
+    assert first is not second
+    assert second.groq_api_key.get_secret_value() == "gsk-second"
+    assert get_model("Groq", MODEL_ID, api_key="gsk-first").groq_api_key is (
+        first.groq_api_key
+    )
+
+
+def test_ensemble_only_passes_the_run_key_to_its_interface(monkeypatch):
+    keys = {}
+
+    def get_eval_chain(interface, model_id, api_key=None, eval_type="jd"):
+        keys[f"{interface}/{model_id}"] = api_key
+        return model_id, RunnableLambda(lambda input: input)
+
+    monkeypatch.setattr(chains, "get_eval_chain", get_eval_chain)
+    monkeypatch.setattr(config, "ENSEMBLE_MODELS", [("OpenAI", "gpt-4")])
+
+    get_ensemble_chain("Groq", MODEL_ID, "gsk-run")
+
+    assert keys == {f"groq/{MODEL_ID}": "gsk-run", "openai/gpt-4": None}
+
+
+def test_verifying_a_key_leaves_the_environment_alone(monkeypatch):
+    class VerifiedKeys:
+        def is_verified(self, interface, api_key):
+            return True
+
+    monkeypatch.setattr(helper, "get_verified_key_cache", VerifiedKeys)
+
+    set_and_verify_api_key("gsk-other-recruiter", "Groq")
+
+    assert get_model("groq", MODEL_ID).groq_api_key.get_secret_value() == (
+        "gsk-environment"
+    )
@@ -0,0 +1,113 @@
+import pandas as pd
+import pytest
+
+from conftest import make_pdf
+from src import cli
+from src.cli import in_shard, main, parse_args, print_progress, shard_pdfs
+from src.preprocessing import input_data_processing
+from src.utils.workspace import RunWorkspace
+
+NAMES = ["Jane Doe", "John Roe", "Max Moe", "Ann Poe", "Tom Low", "Kim Fay"]
+
+
+@pytest.fixture
+def pdf_dir(tmp_path):
+    pdf_dir = tmp_path / "cvs"
+    pdf_dir.mkdir()
+    for i, name in enumerate(NAMES):
+        make_pdf(pdf_dir / f"cv-{i}.pdf", [f"{name} Python SQL"])
+    return pdf_dir
+
+
+@pytest.fixture
+def job_file(tmp_path):
+    job_file = tmp_path / "job.txt"
+    job_file.write_text("Python developer, 3 years", encoding="utf-8")
+    return job_file
+
+
+def test_shards_split_the_cvs_without_overlap(pdf_dir):
+    shards = [set(shard_pdfs(pdf_dir, index, 3)) for index in range(3)]
+
+    assert set.union(*shards) == set(pdf_dir.glob("*.pdf"))
+    assert sum(len(shard) for shard in shards) == len(NAMES)
+    # every process computes the same shards
+    assert shards == [set(shard_pdfs(pdf_dir, index, 3)) for index in range(3)]
+
+
+def test_cv_ids_are_assigned_by_their_hash():
+    assert in_shard("0a", 1, 3)
+    assert not in_shard("0a", 0, 3)
+    assert in_shard("ff", 0, 1)
+
+
+def test_shard_index_must_be_in_range(pdf_dir, job_file):
+    argv = ["--pdf-dir", str(pdf_dir), "--jd", str(job_file), "--shard-count", "2"]
+
+    assert parse_args([*argv, "--shard-index", "1"]).shard_index == 1
+    with pytest.raises(SystemExit):
+        parse_args([*argv, "--shard-index", "2"])
+    with pytest.raises(SystemExit):
+        parse_args(["--jd", str(job_file)])
+
+
+def test_progress_is_printed_once_per_message(tmp_path, capsys):
+    results = pd.DataFrame([{"cv_id": "cv-0"}])
+    updates = [(None, "Parsing"), (None, "Parsing"), (results, "Done")]
+
+    assert print_progress(updates, tmp_path / "out" / "results.csv")
+    assert capsys.readouterr().out.splitlines()[:2] == ["Parsing", "Done"]
+    assert pd.read_csv(tmp_path / "out" / "results.csv")["cv_id"].tolist() == ["cv-0"]
+
+    assert not print_progress([(None, "Error: invalid api key")])
+    assert "invalid api key" in capsys.readouterr().err
+
+
+def test_each_shard_scores_its_own_cvs(fake_chains, pdf_dir, job_file, tmp_path):
+    output_dir = tmp_path / "results"
+    for index in range(2):
+        argv = ["--pdf-dir", str(pdf_dir), "--jd", str(job_file)]
+        argv += ["--shard-index", str(index), "--shard-count", "2"]
+        assert main([*argv, "--output-dir", str(output_dir)]) == 0
+
+    assert sorted(name.split()[0] for name in fake_chains) == sorted(
+        name.split()[0] for name in NAMES
+    )
+    # runs started in the same second sort by their random suffix
+    outputs = sorted(output_dir.glob("*.csv"), key=lambda path: path.stem[-4:])
+    assert [output.stem.split("-shard")[1] for output in outputs] == ["0of2", "1of2"]
+    assert sum(len(pd.read_csv(output)) for output in outputs) == len(NAMES)
+
+    manifest = RunWorkspace.open(outputs[0].stem).read_manifest()
+    assert manifest["shard"] == [0, 2]
+    assert manifest["status"] == "done"
+
+
+def test_run_over_budget_is_not_started(fake_chains, pdf_dir, job_file, capsys):
+    argv = ["--pdf-dir", str(pdf_dir), "--jd", str(job_file), "--budget", "0.0001"]
+
+    assert main(argv) == 1
+    assert fake_chains == []
+    assert "exceeds the budget" in capsys.readouterr().err
+
+
+def test_budgeted_run_is_estimated_once(
+    fake_chains, pdf_dir, job_file, monkeypatch, capsys
+):
+    estimates = []
+    estimate = input_data_processing.estimate_input_cost
+
+    def estimate_input_cost(*args):
+        estimates.append(args)
+        return estimate(*args)
+
+    monkeypatch.setattr(cli, "estimate_input_cost", estimate_input_cost)
+    monkeypatch.setattr(
+        input_data_processing, "estimate_input_cost", estimate_input_cost
+    )
+    argv = ["--pdf-dir", str(pdf_dir), "--jd", str(job_file), "--budget", "100"]
+
+    assert main(argv) == 0
+    assert len(fake_chains) == len(NAMES)
+    assert len(estimates) == 1
+    assert capsys.readouterr().out.count("Estimated cost") == 1
@@ -0,0 +1,134 @@
+import httpx
+import pytest
+
+from src.config import config
+from src.evaluators.chains import get_model
+from src.utils import client_pool, helper
+from src.utils.client_pool import (
+    ModelPool,
+    VerifiedKeyCache,
+    get_http_clients,
+    key_fingerprint,
+)
+from src.utils.helper import set_and_verify_api_key
+
+MODEL_ID = "llama3-70b-8192"
+
+
+def key(model_id):
+    return ("groq", model_id, 0, 2048, "")
+
+
+def test_key_fingerprint_does_not_keep_the_key():
+    fingerprint = key_fingerprint("gsk-secret")
+
+    assert fingerprint == key_fingerprint("gsk-secret")
+    assert fingerprint != key_fingerprint("gsk-other")
+    assert "secret" not in fingerprint and len(fingerprint) == 16
+    assert key_fingerprint("") == key_fingerprint(None) == ""
+
+
+def test_pool_reuses_models_and_drops_the_least_recently_used():
+    pool = ModelPool(max_size=2)
+    first = pool.get_or_create(key("a"), object)
+
+    assert pool.get_or_create(key("a"), object) is first
+    pool.get_or_create(key("b"), object)
+    pool.get_or_create(key("a"), object)
+    pool.get_or_create(key("c"), object)
+
+    assert (pool.hits, pool.misses) == (2, 3)
+    assert pool.get_or_create(key("a"), object) is first
+    assert list(pool._models) == [key("c"), key("a")]
+
+
+def test_chains_share_the_pooled_model_and_http_clients(monkeypatch):
+    monkeypatch.setattr(client_pool, "_model_pool", ModelPool())
+
+    model = get_model("groq", MODEL_ID, api_key="gsk-run")
+
+    assert get_model("Groq", MODEL_ID, api_key="gsk-run") is model
+    assert get_model("groq", MODEL_ID, temperature=0.5, api_key="gsk-run") is not (
+        model
+    )
+    assert model.http_client is get_http_clients()[0]
+    assert model.max_retries == 0
+
+
+def test_models_are_not_shared_with_the_pool_disabled(monkeypatch):
+    monkeypatch.setattr(config, "CLIENT_POOL_ENABLED", False)
+
+    assert get_model("groq", MODEL_ID, api_key="gsk-run") is not get_model(
+        "groq", MODEL_ID, api_key="gsk-run"
+    )
+
+
+def test_http_clients_fall_back_to_http1_without_h2(monkeypatch, caplog):
+    monkeypatch.setattr(client_pool, "_http_clients", None)
+    monkeypatch.setattr(client_pool, "http2_available", lambda: False)
+
+    http_client, http_async_client = get_http_clients()
+    try:
+        assert get_http_clients() == (http_client, http_async_client)
+        assert isinstance(http_async_client, httpx.AsyncClient)
+        assert "using http/1.1 keep-alive" in caplog.text
+    finally:
+        http_client.close()
+
+
+def test_verified_keys_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(client_pool.time, "monotonic", lambda: now[0])
+    verified_keys = VerifiedKeyCache(ttl=60)
+
+    verified_keys.mark_verified("groq", "gsk-run")
+    assert verified_keys.is_verified("groq", "gsk-run")
+    assert not verified_keys.is_verified("openai", "gsk-run")
+    assert not verified_keys.is_verified("groq", "gsk-other")
+
+    now[0] += 61
+    assert not verified_keys.is_verified("groq", "gsk-run")
+
+
+class FakeHttpClient:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.calls = 0
+
+    def get(self, url, headers):
+        self.calls += 1
+        return httpx.Response(self.status_code)
+
+
+@pytest.fixture
+def verify(monkeypatch):
+    verified_keys = VerifiedKeyCache(ttl=60)
+    monkeypatch.setattr(helper, "get_verified_key_cache", lambda: verified_keys)
+
+    def verify(http_client):
+        monkeypatch.setattr(helper, "get_http_clients", lambda: (http_client, None))
+
+    return verify
+
+
+def test_a_verified_key_is_not_checked_again(verify):
+    http_client = FakeHttpClient(200)
+    verify(http_client)
+
+    set_and_verify_api_key("gsk-run", "Groq")
+    set_and_verify_api_key("gsk-run", "Groq")
+
+    assert http_client.calls == 1
+
+
+def test_a_rejected_key_is_checked_every_time(verify):
+    import gradio as gr
+
+    http_client = FakeHttpClient(401)
+    verify(http_client)
+
+    for _ in range(2):
+        with pytest.raises(gr.Error):
+            set_and_verify_api_key("gsk-wrong", "Groq")
+
+    assert http_client.calls == 2
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from conftest import cv_result
+from src.evaluators.ensemble import EnsembleGrader, aggregate_results, majority_vote
+
+
+def grader(result, delay=0.0):
+    def evaluate(input):
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def aevaluate(input):
+        await asyncio.sleep(delay)
+        return evaluate(input)
+
+    return RunnableLambda(evaluate, afunc=aevaluate)
+
+
+def test_majority_vote_keeps_ties_for_review():
+    assert majority_vote(["yes", "yes", "no"]) == "yes"
+    assert majority_vote(["yes", "no"]) == "kiv"
+    assert majority_vote([]) == ""
+
+
+def test_results_are_aggregated_into_the_same_schema():
+    first = cv_result(60, "yes")
+    first["resume_evaluation"]["missing_skills"] = ["aws"]
+    first["assessment"]["strengths"] = "python"
+    second = cv_result(70, "yes")
+    second["resume_evaluation"]["missing_skills"] = ["aws", "docker"]
+    third = cv_result(100, "no")
+    results = {"groq/a": first, "openai/b": second, "ollama/c": third}
+
+    mean = aggregate_results(results)
+    median = aggregate_results(results, "median")
+
+    assert mean["recalibrated_scores"]["technical_skills"] == pytest.approx(76.7)
+    assert median["recalibrated_scores"]["technical_skills"] == 70
+    assert mean["assessment"]["suitability"] == "yes"
+    assert mean["resume_evaluation"]["missing_skills"] == ["aws", "docker"]
+    assert mean["assessment"]["strengths"].startswith("[groq/a] python")
+
+
+def test_models_are_called_concurrently_with_their_latencies():
+    ensemble = EnsembleGrader(
+        [
+            ("groq/a", grader(cv_result(60), 0.3)),
+            ("openai/b", grader(cv_result(80), 0.3)),
+            ("ollama/c", grader(cv_result(100), 0.3)),
+        ]
+    )
+
+    start = time.monotonic()
+    result = asyncio.run(ensemble.ainvoke({}))
+
+    assert time.monotonic() - start < 0.6
+    assert result["recalibrated_scores"]["technical_skills"] == 80
+    models = result["ensemble"]["models"]
+    assert set(models) == {"groq/a", "openai/b", "ollama/c"}
+    assert all(model["latency_seconds"] >= 0.3 for model in models.values())
+    assert not result["ensemble"]["early_exit"]
+
+
+def test_agreeing_models_cancel_the_slow_one():
+    ensemble = EnsembleGrader(
+        [
+            ("groq/a", grader(cv_result(60, "no"), 0.0)),
+            ("openai/b", grader(cv_result(80, "no"), 0.05)),
+            ("ollama/c", grader(cv_result(100, "yes"), 5)),
+        ],
+        early_exit_agreement=2,
+    )
+
+    start = time.monotonic()
+    result = asyncio.run(ensemble.ainvoke({}))
+
+    assert time.monotonic() - start < 1
+    assert result["ensemble"]["early_exit"]
+    assert result["ensemble"]["votes"] == {"no": 2}
+    assert set(result["ensemble"]["models"]) == {"groq/a", "openai/b"}
+
+
+def test_failed_models_are_left_out():
+    ensemble = EnsembleGrader(
+        [
+            ("groq/a", grader(RuntimeError("rate limited"))),
+            ("openai/b", grader(cv_result(80))),
+        ]
+    )
+
+    for result in (asyncio.run(ensemble.ainvoke({})), ensemble.invoke({})):
+        assert result["ensemble"]["votes"] == {"yes": 1}
+        assert result["ensemble"]["models"]["groq/a"]["result"] is None
+        assert result["recalibrated_scores"]["technical_skills"] == 80
+
+
+def test_all_models_failing_is_an_error():
+    ensemble = EnsembleGrader([("groq/a", grader(RuntimeError("rate limited")))])
+
+    with pytest.raises(RuntimeError, match="All ensemble models failed"):
+        asyncio.run(ensemble.ainvoke({}))
+
+
+def test_unknown_aggregation_is_rejected():
+    with pytest.raises(ValueError):
+        EnsembleGrader([], aggregation="mode")
@@ -0,0 +1,135 @@
+import time
+
+import pandas as pd
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from conftest import make_pdf
+from src.config import config
+from src.models.input_models import CandidateEvaluationWeights, InputModel
+from src.preprocessing import input_data_processing
+from src.preprocessing.input_data_processing import (
+    EvaluationProgress,
+    create_run,
+    rerank_run,
+    stream_evaluation,
+)
+from src.utils.results_store import ResultsStore
+
+WEIGHTS = CandidateEvaluationWeights(
+    technical_skills=60, soft_skills=10, experience=20, education=10
+)
+
+
+def file_input(**kwargs):
+    return InputModel(
+        text_input="Python developer, 3 years",
+        input_type="File",
+        api_key="",
+        interface="Groq",
+        model="llama3-70b-8192",
+        weights=WEIGHTS,
+        **kwargs,
+    )
+
+
+def test_progress_is_described_per_phase():
+    progress = EvaluationProgress(total_cvs=4, parsed_cvs=2)
+    assert progress.describe() == "Parsed 2/4 CVs. Analyzing the job description..."
+
+    progress.total_jobs = 1
+    progress.scored_pairs = 1
+    assert progress.describe() == "Parsed 2/4 CVs. Scored 1/2 job-cv pairs."
+
+    progress.done = True
+    progress.failed_pairs = 1
+    assert progress.describe() == "Done. Scored 1 job-cv pairs, 1 failed."
+
+
+@pytest.fixture
+def slow_cv_grader(fake_chains, monkeypatch):
+    """a cv grader taking longer for each resume, with partial results pushed in
+    between"""
+    get_eval_chain = input_data_processing.get_eval_chain
+    delays = {"Jane": 0.0, "John": 0.3, "Max": 0.6}
+
+    def slow_eval_chain(*args, eval_type="jd", **kwargs):
+        model_name, grader = get_eval_chain(*args, eval_type=eval_type, **kwargs)
+        if eval_type == "jd":
+            return model_name, grader
+
+        def wait(input):
+            time.sleep(delays[input["resume"].split()[0]])
+            return input
+
+        return model_name, RunnableLambda(wait) | grader
+
+    monkeypatch.setattr(input_data_processing, "get_eval_chain", slow_eval_chain)
+    monkeypatch.setattr(config, "UI_UPDATE_INTERVAL", 0.05)
+    return fake_chains
+
+
+def test_results_are_pushed_as_the_pairs_complete(slow_cv_grader):
+    input_data = file_input()
+    workspace = create_run(input_data)
+    for i, name in enumerate(["Jane Doe", "John Roe", "Max Moe"]):
+        make_pdf(workspace.pdf_dir / f"cv-{i}.pdf", [f"{name} Python SQL"])
+
+    try:
+        updates = list(stream_evaluation(input_data, None, workspace))
+    finally:
+        workspace.close()
+
+    row_counts = [len(results) for results, _ in updates]
+    assert row_counts[0] == 0
+    assert row_counts == sorted(row_counts)
+    # some of the rows were shown before the run was done
+    assert set(row_counts[1:-1]) & {1, 2}
+    assert row_counts[-1] == 3
+    assert updates[-1][1].startswith("Done. Scored 3 job-cv pairs.")
+
+
+def test_prescreened_out_pairs_are_not_scored(fake_chains, monkeypatch):
+    monkeypatch.setattr(config, "PRESCREEN_ENABLED", True)
+    monkeypatch.setattr(config, "PRESCREEN_TOP_K", 1)
+    input_data = file_input()
+    workspace = create_run(input_data)
+    make_pdf(workspace.pdf_dir / "match.pdf", ["Jane Doe Python SQL AWS"])
+    make_pdf(workspace.pdf_dir / "other.pdf", ["John Roe pottery"])
+
+    try:
+        results, message = list(stream_evaluation(input_data, None, workspace))[-1]
+    finally:
+        workspace.close()
+
+    assert fake_chains == ["Jane Doe Python SQL AWS"]
+    assert len(results) == 1
+    assert "1 screened out" in message
+    assert (workspace.csv_dir / "prescreen_scores.csv").exists()
+
+
+def test_finished_run_is_reranked_from_its_score_table(fake_chains, monkeypatch):
+    input_data = file_input()
+    workspace = create_run(input_data)
+    make_pdf(workspace.pdf_dir / "cv-0.pdf", ["Jane Doe Python SQL"])
+    make_pdf(workspace.pdf_dir / "cv-1.pdf", ["John Roe Python"])
+    try:
+        results, _ = list(stream_evaluation(input_data, None, workspace))[-1]
+    finally:
+        workspace.close()
+    assert list(workspace.scores_dir.glob("*.parquet"))
+
+    # re-ranking reads neither the results store nor the part files
+    monkeypatch.setattr(ResultsStore, "get_cv_results", lambda *args: pytest.fail())
+    monkeypatch.setattr(pd, "read_parquet", lambda *args: pytest.fail())
+    reranked = rerank_run(
+        workspace.run_id,
+        results,
+        CandidateEvaluationWeights(
+            technical_skills=25, soft_skills=25, experience=25, education=25
+        ),
+    )
+
+    assert len(reranked) == 2
+    assert sorted(reranked["cv_text"].str.split().str[0]) == ["Jane", "John"]
+    assert reranked["recalibrated_overall_score"].tolist() == pytest.approx([80, 80])
@@ -0,0 +1,166 @@
+import json
+
+import pytest
+from langchain_core.exceptions import OutputParserException
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.runnables import RunnableLambda
+
+from conftest import cv_result
+from src.config import config
+from src.evaluators import chains
+from src.evaluators.chains import get_eval_chain
+from src.evaluators.output_parsers import (
+    TolerantJsonOutputParser,
+    extract_json_text,
+    get_json_schema,
+    parse_json,
+    validate_output,
+)
+from src.models.output_models import CVEvaluation
+
+CV_INPUT = {"job_requirements": "Python developer", "resume": "Jane Doe"}
+
+
+def test_json_is_extracted_from_the_surrounding_text():
+    assert extract_json_text('Here you go:\n```json\n{"a": 1}\n```\nDone') == (
+        '{"a": 1}'
+    )
+    assert extract_json_text('The result is {"a": [1]} as asked.') == '{"a": [1]}'
+    assert extract_json_text('[{"a": 1}] and {"b": 2}') == '[{"a": 1}]'
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "{'suitability': 'yes', 'skills': ['python',]}",
+        '{“suitability”: “yes”, "skills": ["python"],}',
+        "```\n{\"suitability\": 'yes', \"skills\": ['python']}\n```",
+    ],
+)
+def test_common_mistakes_are_repaired(text):
+    assert parse_json(text) == {"suitability": "yes", "skills": ["python"]}
+
+
+def test_python_literals_are_repaired_outside_strings():
+    assert parse_json('{"remote": True, "note": "None, True", "visa": None}') == {
+        "remote": True,
+        "note": "None, True",
+        "visa": None,
+    }
+
+
+def test_apostrophes_in_strings_are_kept():
+    assert parse_json('{"strengths": "Jane\'s Python, 5 years",}') == {
+        "strengths": "Jane's Python, 5 years"
+    }
+
+
+def test_unrepairable_output_raises():
+    with pytest.raises(OutputParserException):
+        parse_json('{"suitability": "yes"')
+
+
+def test_parsed_output_is_validated():
+    parser = TolerantJsonOutputParser(result_model=CVEvaluation)
+
+    result = cv_result()
+    result["assessment"]["suitability"] = " YES "
+    assert parser.parse(json.dumps(result))["assessment"]["suitability"] == "yes"
+
+    del result["recalibrated_scores"]
+    with pytest.raises(OutputParserException):
+        parser.parse(json.dumps(result))
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """a model answering with the given responses in order"""
+    models = []
+
+    def get_model(*args, **kwargs):
+        return models[-1]
+
+    monkeypatch.setattr(chains, "get_model", get_model)
+    monkeypatch.setattr(config, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "STRUCTURED_OUTPUT_ENABLED", False)
+    return lambda responses: models.append(FakeListChatModel(responses=responses))
+
+
+def test_only_outputs_invalid_after_repair_are_retried(fake_model):
+    fake_model(["not json at all", "{'assessment': {}}", json.dumps(cv_result())])
+    _, grader = get_eval_chain("groq", "llama3-70b-8192", eval_type="cv")
+
+    assert (
+        grader.invoke(CV_INPUT) == CVEvaluation.model_validate(cv_result()).model_dump()
+    )
+
+    fake_model([repr(cv_result()), "not json at all"])
+    _, grader = get_eval_chain("groq", "llama3-70b-8192", eval_type="cv")
+
+    # the python dict is repaired without another call
+    assert grader.invoke(CV_INPUT)["assessment"]["suitability"] == "yes"
+
+
+def test_retries_are_bounded(fake_model, monkeypatch):
+    monkeypatch.setattr(config, "PARSE_MAX_RETRIES", 1)
+    fake_model(["not json", "still not json", json.dumps(cv_result())])
+    _, grader = get_eval_chain("groq", "llama3-70b-8192", eval_type="cv")
+
+    with pytest.raises(OutputParserException):
+        grader.invoke(CV_INPUT)
+
+
+class StructuredModel:
+    """a tool-calling model answering with the given dicts in order"""
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.schemas = []
+
+    def with_structured_output(self, schema):
+        self.schemas.append(schema)
+        return RunnableLambda(lambda prompt: self.outputs.pop(0))
+
+
+def test_json_schema_is_inlined():
+    schema = get_json_schema(CVEvaluation)
+
+    assert "$defs" not in schema
+    assert "$ref" not in json.dumps(schema)
+    assessment = schema["properties"]["assessment"]
+    assert assessment["properties"]["suitability"]["enum"] == ["yes", "no", "kiv"]
+
+
+def test_structured_output_binds_the_schema_and_validates(monkeypatch):
+    invalid = cv_result()
+    invalid["assessment"]["suitability"] = "maybe"
+    valid = cv_result()
+    valid["assessment"]["suitability"] = "Yes"
+    model = StructuredModel([invalid, valid])
+    monkeypatch.setattr(chains, "get_model", lambda *args, **kwargs: model)
+    monkeypatch.setattr(config, "LLM_CACHE_ENABLED", False)
+
+    _, grader = get_eval_chain(
+        "groq", "llama3-70b-8192", eval_type="cv", structured_output=True
+    )
+
+    assert model.schemas == [get_json_schema(CVEvaluation)]
+    # the output failing validation is retried like an unparseable one
+    assert grader.invoke(CV_INPUT)["assessment"]["suitability"] == "yes"
+    assert model.outputs == []
+
+
+def test_validation_errors_are_parser_errors():
+    with pytest.raises(OutputParserException, match="CVEvaluation"):
+        validate_output({"assessment": {}}, CVEvaluation)
+    assert validate_output({"anything": 1}, None) == {"anything": 1}
+
+
+def test_interfaces_without_tool_calling_use_the_json_prompt(fake_model):
+    fake_model([json.dumps(cv_result())])
+
+    _, grader = get_eval_chain(
+        "ollama", "llama3", eval_type="cv", structured_output=True
+    )
+
+    assert grader.invoke(CV_INPUT)["assessment"]["suitability"] == "yes"
@@ -0,0 +1,123 @@
+import os
+import time
+
+import pytest
+
+from conftest import make_pdf
+from src.preprocessing.parsers.pdf_parser import (
+    WorkerPool,
+    content_id,
+    file_sha256,
+    get_worker_pool,
+    iter_pdfs,
+)
+from src.utils.cache import ParsedTextCache
+
+
+# tasks run in the spawned workers, which import them from this module
+
+
+def sleep_then_pid(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def fail():
+    raise ValueError("not a pdf")
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(max_workers=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_pdfs_are_parsed_and_identified_by_content(tmp_path):
+    make_pdf(tmp_path / "a.pdf", ["Jane Doe", "Python developer"])
+    make_pdf(tmp_path / "b.pdf", ["John Roe"])
+    # the same content under another name is yielded once
+    (tmp_path / "c.pdf").write_bytes((tmp_path / "a.pdf").read_bytes())
+
+    texts = dict(iter_pdfs(tmp_path, max_workers=2, timeout=30))
+
+    assert texts == {
+        content_id(file_sha256(tmp_path / "a.pdf")): "Jane Doe Python developer",
+        content_id(file_sha256(tmp_path / "b.pdf")): "John Roe",
+    }
+
+
+def test_cached_text_is_not_parsed_again(tmp_path):
+    pdf_dir = tmp_path / "pdf"
+    pdf_dir.mkdir()
+    make_pdf(pdf_dir / "a.pdf", ["Jane Doe"])
+    text_cache = ParsedTextCache(tmp_path / "pdf_text.sqlite")
+
+    first = list(iter_pdfs(pdf_dir, max_workers=1, text_cache=text_cache))
+    second = list(iter_pdfs(pdf_dir, max_workers=1, text_cache=text_cache))
+
+    assert first == second
+    assert text_cache.stats() == {"hits": 1, "misses": 1, "documents": 1}
+
+
+def test_max_pages_truncates_the_text(tmp_path):
+    make_pdf(tmp_path / "a.pdf", ["one", "two", "three"])
+
+    [(_, text)] = iter_pdfs(tmp_path, max_workers=1, max_pages=2)
+
+    assert text == "one two"
+
+
+def test_stuck_task_is_killed_and_its_worker_replaced(pool):
+    results = {
+        key: (result, error)
+        for key, result, error in pool.imap_unordered(
+            sleep_then_pid, {"stuck": (60,), "quick": (0,)}, timeout=1
+        )
+    }
+
+    assert results["stuck"][0] is None
+    assert "timed out" in results["stuck"][1]
+    assert results["quick"][1] is None
+    assert pool._workers == 1
+
+    # the pool keeps working with a new worker
+    [(_, pid, error)] = pool.imap_unordered(sleep_then_pid, {"next": (0,)})
+    assert error is None and pid != os.getpid()
+
+
+def test_queued_tasks_are_not_timed(pool):
+    # three tasks of 0.6s on one worker take longer than the timeout together
+    tasks = {i: (0.6,) for i in range(3)}
+
+    results = list(pool.imap_unordered(sleep_then_pid, tasks, max_workers=1, timeout=1))
+
+    assert [error for _, _, error in results] == [None, None, None]
+
+
+def test_workers_are_reused_across_calls(pool):
+    first = {pid for _, pid, _ in pool.imap_unordered(sleep_then_pid, {0: (0,)})}
+    second = {pid for _, pid, _ in pool.imap_unordered(sleep_then_pid, {0: (0,)})}
+
+    assert first == second
+
+
+def test_errors_are_reported_per_task(pool):
+    [(key, result, error)] = pool.imap_unordered(fail, {"bad.pdf": ()})
+
+    assert (key, result) == ("bad.pdf", None)
+    assert error == "ValueError: not a pdf"
+    assert pool._workers == 1 and len(pool._idle) == 1
+
+
+def test_closing_early_kills_the_running_tasks(pool):
+    results = pool.imap_unordered(sleep_then_pid, {"quick": (0,), "slow": (60,)})
+
+    next(results)
+    results.close()
+
+    assert pool._workers == 1
+
+
+def test_the_pool_is_created_once_per_process():
+    assert get_worker_pool(2) is get_worker_pool(4)
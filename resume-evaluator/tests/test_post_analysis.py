@@ -0,0 +1,176 @@
+import pandas as pd
+import pytest
+
+from conftest import cv_result
+from src.evaluators.post_analysis import (
+    SCORE_TABLE_COLUMNS,
+    add_fit_scores,
+    calculate_fit_scores,
+    flatten_result,
+    normalize_results,
+    open_score_table,
+    read_results,
+    resume_evaluation,
+    score_result,
+)
+from src.models.input_models import CandidateEvaluationWeights
+from src.utils.results_store import ResultsStore
+
+WEIGHTS = CandidateEvaluationWeights(
+    technical_skills=60, soft_skills=10, experience=20, education=10
+)
+
+
+def scored(technical_skills, soft_skills, experience, education):
+    result = cv_result()
+    result["recalibrated_scores"] = {
+        "technical_skills": technical_skills,
+        "soft_skills": soft_skills,
+        "experience": experience,
+        "education": education,
+    }
+    result["deeper_analysis"]["inferred_experience"] = ["airflow", "dbt"]
+    return result
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(tmp_path / "results.db")
+    store.save_cv_result("job-1", "cv-0", "groq", scored(100, 50, 80, 100))
+    store.save_cv_result("job-1", "cv-1", "groq", cv_result(40, "no"))
+    # results missing a section are left out of the table
+    store.save_cv_result("job-1", "cv-2", "groq", {"assessment": {}})
+    store.save_cv_result("job-2", "cv-0", "groq", cv_result(70, "kiv"))
+    return store
+
+
+def test_columnar_loading_matches_the_per_result_rows(store):
+    records = [record for record in store.get_cv_results() if record["cv_id"] != "cv-2"]
+
+    table = normalize_results(records)
+    rows = pd.DataFrame(
+        [
+            flatten_result(r["job_id"], r["cv_id"], r["model_name"], r["result"])
+            for r in records
+        ]
+    )
+
+    assert list(table.columns) == SCORE_TABLE_COLUMNS
+    pd.testing.assert_frame_equal(table, rows[SCORE_TABLE_COLUMNS])
+    assert table.loc[0, "inferred_experience"] == "airflow, dbt"
+
+
+def test_results_table_skips_invalid_results_and_filters_by_job(store):
+    assert list(resume_evaluation(store)["cv_id"]) == ["cv-0", "cv-1", "cv-0"]
+    assert list(resume_evaluation(store, job_id="job-2")["cv_id"]) == ["cv-0"]
+
+
+def test_empty_store_gives_an_empty_table(tmp_path):
+    table = resume_evaluation(ResultsStore(tmp_path / "results.db"))
+
+    assert table.empty
+    assert list(table.columns) == SCORE_TABLE_COLUMNS
+
+
+def test_fit_scores_are_the_weighted_sums(store):
+    df = add_fit_scores(resume_evaluation(store), WEIGHTS)
+
+    assert df["recalibrated_overall_score"].tolist() == pytest.approx(
+        [0.6 * 100 + 0.1 * 50 + 0.2 * 80 + 0.1 * 100, 40, 70]
+    )
+    assert df["original_overall_score"].tolist() == pytest.approx([80, 40, 70])
+
+
+def test_score_result_matches_the_table(store):
+    row = score_result("job-1", "cv-0", "groq", scored(100, 50, 80, 100), WEIGHTS)
+
+    assert row["recalibrated_overall_score"] == pytest.approx(91)
+    assert row["suitability"] == "yes"
+
+
+def test_fit_scores_are_read_from_the_score_table(store, tmp_path):
+    score_table = open_score_table(tmp_path / "scores")
+    score_table.append(
+        [
+            flatten_result("job-1", "cv-0", "groq", scored(100, 50, 80, 100)),
+            flatten_result("job-1", "cv-1", "groq", cv_result(40, "no")),
+        ]
+    )
+    score_table.flush()
+    score_table.append(flatten_result("job-2", "cv-0", "groq", cv_result(70, "kiv")))
+
+    from_table = calculate_fit_scores(store, WEIGHTS, score_table)
+    from_store = calculate_fit_scores(store, WEIGHTS)
+
+    assert from_table["recalibrated_overall_score"].tolist() == pytest.approx(
+        from_store["recalibrated_overall_score"].tolist()
+    )
+    assert from_table["cv_id"].tolist() == ["cv-0", "cv-1", "cv-0"]
+
+
+def test_new_weights_rerank_without_rereading_the_results(store, monkeypatch):
+    df = add_fit_scores(resume_evaluation(store), WEIGHTS)
+    df.loc[1, "recalibrated_technical_skills"] = 0
+    df.loc[1, "recalibrated_education"] = 100
+    monkeypatch.setattr(
+        ResultsStore, "get_cv_results", lambda *args, **kwargs: pytest.fail()
+    )
+
+    technical = add_fit_scores(df.copy(), WEIGHTS)
+    education = add_fit_scores(
+        df.copy(),
+        CandidateEvaluationWeights(
+            technical_skills=10, soft_skills=10, experience=10, education=70
+        ),
+    )
+
+    ranked = technical.sort_values("recalibrated_overall_score", ascending=False)
+    assert ranked.index.tolist() == [0, 2, 1]
+    ranked = education.sort_values("recalibrated_overall_score", ascending=False)
+    assert ranked.index.tolist() == [0, 1, 2]
+    # only the overall scores change
+    assert education.drop(
+        columns=["original_overall_score", "recalibrated_overall_score"]
+    ).equals(df.drop(columns=["original_overall_score", "recalibrated_overall_score"]))
+
+
+def test_score_table_reads_its_part_files_once(tmp_path, monkeypatch):
+    score_table = open_score_table(tmp_path / "scores")
+    score_table.append(flatten_result("job-1", "cv-0", "groq", cv_result(80)))
+    score_table.flush()
+    assert open_score_table(tmp_path / "scores") is score_table
+
+    reads = []
+    read_parquet = pd.read_parquet
+    monkeypatch.setattr(
+        pd, "read_parquet", lambda path: reads.append(path) or read_parquet(path)
+    )
+    score_table.read()
+    score_table.append(flatten_result("job-1", "cv-1", "groq", cv_result(40)))
+    score_table.flush()
+
+    assert score_table.read()["cv_id"].tolist() == ["cv-0", "cv-1"]
+    assert len(reads) == 1
+
+    score_table.clear()
+    assert score_table.read().empty
+    assert not list((tmp_path / "scores").glob("*.parquet"))
+
+
+def test_results_are_joined_with_their_texts(tmp_path):
+    score_table = open_score_table(tmp_path / "scores")
+    score_table.append(
+        [
+            flatten_result("job-1", "cv-0", "groq", scored(100, 50, 80, 100)),
+            flatten_result("job-1", "cv-0", "openai", cv_result(40)),
+        ]
+    )
+    texts = pd.DataFrame(
+        [{"job_id": "job-1", "cv_id": "cv-0", "cv_text": "Jane Doe", "job_text": "x"}]
+    )
+
+    df = read_results(score_table, WEIGHTS, texts)
+
+    assert df["recalibrated_overall_score"].tolist() == pytest.approx([91, 40])
+    assert df["cv_text"].tolist() == ["Jane Doe", "Jane Doe"]
+    assert df["job_analysis"].isna().all()
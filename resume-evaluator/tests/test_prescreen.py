@@ -0,0 +1,74 @@
+import numpy as np
+
+from conftest import JOB_ANALYSIS
+from src.evaluators.prescreen import (
+    bm25_similarity,
+    job_query,
+    prescreen_pairs,
+    select_pairs,
+    tokenize,
+)
+
+CVS = [
+    ("cv-0", "Python and SQL on AWS, clear communication"),
+    ("cv-1", "Python scripts"),
+    ("cv-2", "Watercolour painting and pottery"),
+]
+
+
+def test_skill_tokens_are_kept_whole():
+    assert tokenize("C++, C#, Node.js and .NET.") == [
+        "c++",
+        "c#",
+        "node.js",
+        "and",
+        ".net",
+    ]
+
+
+def test_essential_skills_weigh_twice():
+    assert job_query(JOB_ANALYSIS) == [
+        "python",
+        "python",
+        "sql",
+        "sql",
+        "aws",
+        "communication",
+    ]
+
+
+def test_relevant_cvs_score_higher():
+    scores = bm25_similarity(
+        [job_query(JOB_ANALYSIS)], [tokenize(cv_text) for _, cv_text in CVS]
+    )
+
+    assert scores.shape == (1, 3)
+    assert scores[0, 0] > scores[0, 1] > scores[0, 2] == 0
+    assert ((scores >= 0) & (scores <= 1)).all()
+
+
+def test_no_query_terms_score_zero():
+    assert bm25_similarity([[]], [["python"]]).tolist() == [[0.0]]
+
+
+def test_top_k_and_min_score_select_the_pairs():
+    scores = np.array([[0.9, 0.5, 0.5, 0.1], [0.0, 0.2, 0.8, 0.3]])
+
+    assert select_pairs(scores, top_k=2).tolist() == [
+        [True, True, False, False],
+        [False, False, True, True],
+    ]
+    assert select_pairs(scores, min_score=0.3).tolist() == [
+        [True, True, True, False],
+        [False, False, True, True],
+    ]
+
+
+def test_prescreen_keeps_the_top_cvs_of_each_job():
+    jobs = [("job-1", JOB_ANALYSIS), ("job-2", {"soft_skills": ["pottery"]})]
+
+    pairs, prescreen_scores = prescreen_pairs(jobs, CVS, top_k=1)
+
+    assert pairs == {("job-1", "cv-0"), ("job-2", "cv-2")}
+    assert len(prescreen_scores) == 6
+    assert prescreen_scores["selected"].sum() == 2
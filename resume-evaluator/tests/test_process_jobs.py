@@ -0,0 +1,157 @@
+import asyncio
+import threading
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from conftest import cv_result
+from src.config import config
+from src.utils.async_utils import aiter_sync, get_semaphore
+from src.utils.process_jobs import astream_all_pairs
+from src.utils.results_store import ResultsStore
+
+
+class ConcurrencyProbe:
+    """fake grader recording the peak number of calls in flight"""
+
+    def __init__(self, delay: float = 0.02, fail_on: str = None) -> None:
+        self.delay = delay
+        self.fail_on = fail_on
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def ainvoke(self, input):
+        self.in_flight += 1
+        self.calls += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail_on and self.fail_on in input["resume"]:
+                raise RuntimeError("provider error")
+            return cv_result()
+        finally:
+            self.in_flight -= 1
+
+    def grader(self):
+        return RunnableLambda(lambda input: cv_result(), afunc=self.ainvoke)
+
+
+@pytest.fixture
+def max_concurrency(monkeypatch):
+    monkeypatch.setattr(config, "MAX_CONCURRENCY", {"fake": 3})
+
+
+JOBS = [("job-1", {"technical_skills": {"essential": ["python"]}})]
+
+
+def cvs(count, prefix="cv"):
+    return [(f"{prefix}-{i}", f"resume {prefix}-{i}") for i in range(count)]
+
+
+async def collect(model_tuples, job_data, cv_data, store, **kwargs):
+    return [
+        pair
+        async for pair in astream_all_pairs(
+            model_tuples, job_data, aiter_sync(cv_data), store, **kwargs
+        )
+    ]
+
+
+def test_pairs_are_scored_concurrently_up_to_the_interface_limit(
+    tmp_path, max_concurrency
+):
+    probe = ConcurrencyProbe()
+    store = ResultsStore(tmp_path / "results.db")
+
+    results = asyncio.run(collect(("fake", probe.grader()), JOBS, cvs(10), store))
+
+    assert len(results) == 10
+    assert all(model_results for _, _, model_results in results)
+    assert probe.peak == 3
+
+
+def test_concurrent_runs_share_the_interface_limit(tmp_path, max_concurrency):
+    probe = ConcurrencyProbe()
+    stores = [ResultsStore(tmp_path / f"results-{i}.db") for i in range(3)]
+
+    async def main():
+        return await asyncio.gather(
+            *(
+                collect(("fake", probe.grader()), JOBS, cvs(6, f"run{i}"), store)
+                for i, store in enumerate(stores)
+            )
+        )
+
+    runs = asyncio.run(main())
+
+    assert [len(results) for results in runs] == [6, 6, 6]
+    assert probe.peak == 3
+
+
+def test_get_semaphore_is_shared_within_an_event_loop(max_concurrency):
+    async def semaphores():
+        return get_semaphore("fake"), get_semaphore("fake"), get_semaphore("other")
+
+    fake, same, other = asyncio.run(semaphores())
+
+    assert fake is same
+    assert other is not fake
+    assert other._value == config.DEFAULT_MAX_CONCURRENCY
+
+
+def test_failed_pair_is_reported_and_recorded(tmp_path, max_concurrency):
+    probe = ConcurrencyProbe(fail_on="cv-1")
+    store = ResultsStore(tmp_path / "results.db")
+
+    results = asyncio.run(collect(("fake", probe.grader()), JOBS, cvs(3), store))
+
+    by_cv = {cv[0]: model_results for _, cv, model_results in results}
+    assert by_cv["cv-1"] is None
+    assert by_cv["cv-0"] == {"fake": cv_result()}
+    assert store.get_pair_states("failed") == {("job-1", "cv-1"): "failed"}
+
+
+def test_resumed_run_only_scores_the_pairs_not_done(tmp_path, max_concurrency):
+    store = ResultsStore(tmp_path / "results.db")
+    store.set_pair_states([("job-1", "cv-0"), ("job-1", "cv-1")], "done")
+    store.save_cv_result("job-1", "cv-0", "fake", cv_result(10, "no"))
+    store.save_cv_result("job-1", "cv-1", "fake", cv_result(20, "no"))
+    store.set_pair_states([("job-1", "cv-2")], "in_flight")
+    probe = ConcurrencyProbe()
+
+    results = asyncio.run(
+        collect(("fake", probe.grader()), JOBS, cvs(4), store, resume=True)
+    )
+
+    by_cv = {cv[0]: model_results for _, cv, model_results in results}
+    assert probe.calls == 2
+    assert by_cv == {
+        "cv-0": {"fake": cv_result(10, "no")},
+        "cv-1": {"fake": cv_result(20, "no")},
+        "cv-2": {"fake": cv_result()},
+        "cv-3": {"fake": cv_result()},
+    }
+    assert set(store.get_pair_states("done")) == {
+        ("job-1", f"cv-{i}") for i in range(4)
+    }
+
+
+def test_store_is_written_off_the_event_loop(tmp_path, max_concurrency, monkeypatch):
+    store = ResultsStore(tmp_path / "results.db")
+    threads = set()
+
+    def record_thread(method):
+        def wrapper(*args, **kwargs):
+            threads.add(threading.get_ident())
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(store, "set_pair_states", record_thread(store.set_pair_states))
+    monkeypatch.setattr(store, "save_cv_result", record_thread(store.save_cv_result))
+
+    asyncio.run(collect(("fake", ConcurrencyProbe().grader()), JOBS, cvs(3), store))
+
+    assert threads and threading.get_ident() not in threads
+    assert len(store.get_pair_states("done")) == 3
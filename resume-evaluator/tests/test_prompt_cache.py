@@ -0,0 +1,70 @@
+import pytest
+from langchain_core.messages import SystemMessage
+
+from src.evaluators.chains import get_eval_prompt
+from src.prompts.two_stage_eval_cv import _CV_NOTES, _CV_STEPS
+from src.utils.prompt_cache import get_cache_usage, mark_system_cacheable
+
+
+@pytest.mark.parametrize("eval_type", ["cv", "cv_batch"])
+@pytest.mark.parametrize("structured_output", [False, True])
+def test_system_prompt_is_the_same_for_every_resume_of_a_job(
+    eval_type, structured_output
+):
+    prompt = get_eval_prompt(eval_type, structured_output)
+    resume = "resumes" if eval_type == "cv_batch" else "resume"
+
+    first, second = (
+        prompt.format_prompt(job_requirements="python, sql", **{resume: text})
+        for text in ("Jane Doe", "John Roe")
+    )
+
+    assert first.messages[0] == second.messages[0]
+    assert isinstance(first.messages[0], SystemMessage)
+    assert "Jane Doe" in first.messages[1].content
+
+
+def test_batch_prompt_shares_the_cv_instructions():
+    system_prompt = get_eval_prompt("cv_batch").messages[0].prompt.template
+
+    assert _CV_STEPS in system_prompt
+    assert _CV_NOTES in system_prompt
+    assert "Evaluate EACH of the resumes" in system_prompt
+
+
+def test_system_messages_are_marked_as_a_cache_breakpoint():
+    prompt_value = get_eval_prompt("cv").format_prompt(
+        job_requirements="python", resume="Jane Doe"
+    )
+
+    system, human = mark_system_cacheable(prompt_value).to_messages()
+
+    assert system.content[0]["cache_control"] == {"type": "ephemeral"}
+    assert system.content[0]["text"] == prompt_value.messages[0].content
+    assert human.content == prompt_value.messages[1].content
+
+
+def test_anthropic_cache_usage_is_added_to_the_input_tokens():
+    usage = {
+        "input_tokens": 50,
+        "output_tokens": 200,
+        "cache_read_input_tokens": 1000,
+        "cache_creation_input_tokens": 0,
+    }
+
+    assert get_cache_usage(usage) == {
+        "input_tokens": 1050,
+        "cache_read_tokens": 1000,
+        "cache_write_tokens": 0,
+    }
+
+
+def test_openai_cache_usage_is_read_from_the_prompt_details():
+    usage = {"prompt_tokens": 1200, "prompt_tokens_details": {"cached_tokens": 1024}}
+
+    assert get_cache_usage(usage) == {
+        "input_tokens": 1200,
+        "cache_read_tokens": 1024,
+        "cache_write_tokens": 0,
+    }
+    assert get_cache_usage({"prompt_tokens": 1200}) is None
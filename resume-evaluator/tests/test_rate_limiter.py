@@ -0,0 +1,158 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from src.config import config
+from src.evaluators.chains import build_model, get_model_class
+from src.utils import rate_limiter
+from src.utils.rate_limiter import (
+    AdaptiveRateLimiter,
+    RateLimitCallbackHandler,
+    get_rate_limiter,
+    parse_reset,
+)
+
+
+@pytest.fixture
+def rate_limits(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_rate_limiters", {})
+    monkeypatch.setattr(
+        config,
+        "RATE_LIMITS",
+        {
+            "groq": {"requests_per_minute": 30, "tokens_per_minute": 6000},
+            "groq/llama3-8b-8192": {"requests_per_minute": 60},
+            "ollama": {"requests_per_minute": None},
+        },
+    )
+
+
+def test_models_share_the_limiter_of_their_interface(rate_limits):
+    limiter = get_rate_limiter("Groq", "llama3-70b-8192")
+
+    assert limiter is get_rate_limiter("groq", "mixtral-8x7b-32768")
+    assert limiter.requests_per_minute == 30
+
+
+def test_model_with_its_own_limits_gets_its_own_limiter(rate_limits):
+    limiter = get_rate_limiter("groq", "llama3-8b-8192")
+
+    assert limiter is not get_rate_limiter("groq", "llama3-70b-8192")
+    assert limiter.requests_per_minute == 60
+    assert limiter.tokens_per_minute is None
+
+
+def test_unlimited_interface_has_no_limiter(rate_limits):
+    assert get_rate_limiter("ollama", "llama3") is None
+
+
+def make_limiter(tokens_per_minute=1000, requests_per_minute=600):
+    return AdaptiveRateLimiter(
+        requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute
+    )
+
+
+def chat_result(total_tokens, output_tokens):
+    message = AIMessage(
+        content="{}",
+        usage_metadata={
+            "input_tokens": total_tokens - output_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": total_tokens,
+        },
+    )
+    return LLMResult(generations=[[ChatGeneration(message=message)]])
+
+
+def test_first_burst_is_bounded_by_the_prompt_tokens():
+    limiter = make_limiter(tokens_per_minute=1000)
+
+    tokens = limiter.estimate_tokens(prompt_tokens=400)
+
+    assert tokens == 400
+    assert limiter.acquire(blocking=False, tokens=tokens)
+    assert limiter.acquire(blocking=False, tokens=tokens)
+    assert not limiter.acquire(blocking=False, tokens=tokens)
+
+
+def test_usage_is_reconciled_with_the_reserved_tokens():
+    limiter = make_limiter(tokens_per_minute=10000)
+
+    # the running estimate moves between the acquires and the responses
+    reservations = [400, 900, 250]
+    for reserved in reservations:
+        limiter.acquire(blocking=False, tokens=reserved)
+    limiter.record_usage(500, reserved=400, output_tokens=100)
+    limiter.record_usage(700, reserved=900, output_tokens=300)
+    limiter.record_usage(300, reserved=250, output_tokens=50)
+
+    assert limiter._available_tokens == pytest.approx(10000 - 1500, abs=5)
+
+
+def test_output_estimate_is_added_to_the_prompt_tokens():
+    limiter = make_limiter()
+
+    limiter.record_usage(500, reserved=500, output_tokens=100)
+    limiter.record_usage(500, reserved=500, output_tokens=200)
+
+    assert limiter.estimate_tokens(prompt_tokens=300) == pytest.approx(420)
+    assert limiter.estimate_tokens() == pytest.approx(500)
+
+
+def test_failed_call_gives_back_its_tokens():
+    limiter = make_limiter(tokens_per_minute=1000)
+
+    limiter.acquire(blocking=False, tokens=600)
+    limiter.release(600)
+
+    assert limiter._available_tokens == pytest.approx(1000)
+
+
+def test_callback_handler_reserves_the_prompt_and_reconciles_the_usage():
+    limiter = make_limiter(tokens_per_minute=10000)
+    handler = RateLimitCallbackHandler(limiter)
+    run_id = uuid4()
+    messages = [[SystemMessage(content="one two three"), HumanMessage(content="four")]]
+
+    async def call():
+        await handler.on_chat_model_start({}, messages, run_id=run_id)
+        reserved = handler._reserved[run_id]
+        await handler.on_llm_end(chat_result(10, 6), run_id=run_id)
+        return reserved
+
+    assert asyncio.run(call()) == 4
+    assert limiter._available_tokens == pytest.approx(10000 - 10, abs=5)
+    assert handler._reserved == {}
+
+
+def test_callback_handler_backs_off_on_429():
+    limiter = make_limiter()
+    handler = RateLimitCallbackHandler(limiter)
+    error = RuntimeError("rate limited")
+    error.status_code = 429
+
+    asyncio.run(handler.on_llm_error(error, run_id=uuid4()))
+
+    assert limiter._rate_scale == 0.5
+    assert not limiter.acquire(blocking=False)
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [("1s", 1.0), ("6m0s", 360.0), ("20ms", 0.02), ("12.5", 12.5), ("soon", None)],
+)
+def test_parse_reset(value, seconds):
+    assert parse_reset(value) == seconds
+
+
+def test_sdk_clients_do_not_retry_under_the_chain_retry(rate_limits):
+    model_class = get_model_class("groq")
+
+    model = build_model(model_class, "groq", "llama3-70b-8192", 0, 256, "gsk-test")
+
+    assert model.max_retries == 0
+    assert model.rate_limiter is None
+    assert any(isinstance(c, RateLimitCallbackHandler) for c in model.callbacks)
@@ -0,0 +1,79 @@
+import pytest
+
+from conftest import JOB_ANALYSIS, cv_result
+from src.utils.results_store import ResultsStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(tmp_path / "results.db")
+    yield store
+    store.close()
+
+
+def test_results_are_read_back_per_job_cv_and_model(store):
+    store.save_job_result("job-1", "llama_3_70b", JOB_ANALYSIS)
+    store.save_cv_result("job-1", "cv-0", "llama_3_70b", cv_result(80))
+    store.save_cv_result("job-1", "cv-0", "gpt-4", cv_result(60))
+    store.save_cv_result("job-2", "cv-1", "gpt-4", cv_result(40))
+
+    assert store.get_job_results() == [("job-1", "llama_3_70b", JOB_ANALYSIS)]
+    assert len(store.get_cv_results()) == 3
+    # model names with underscores are kept whole
+    assert store.get_cv_results(model_name="llama_3_70b") == [
+        {
+            "job_id": "job-1",
+            "cv_id": "cv-0",
+            "model_name": "llama_3_70b",
+            "result": cv_result(80),
+        }
+    ]
+    assert [r["cv_id"] for r in store.get_cv_results(job_id="job-2")] == ["cv-1"]
+    assert [r["model_name"] for r in store.get_cv_results(cv_id="cv-0")] == [
+        "llama_3_70b",
+        "gpt-4",
+    ]
+
+
+def test_saving_a_result_again_replaces_it(store):
+    store.save_cv_result("job-1", "cv-0", "gpt-4", cv_result(60))
+    store.save_cv_result("job-1", "cv-0", "gpt-4", cv_result(90))
+
+    [record] = store.get_cv_results()
+    assert record["result"] == cv_result(90)
+
+
+def test_results_survive_reopening_the_store(store, tmp_path):
+    store.save_cv_result("job-1", "cv-0", "gpt-4", cv_result(60))
+    store.close()
+
+    reopened = ResultsStore(tmp_path / "results.db")
+    try:
+        assert len(reopened.get_cv_results()) == 1
+        journal_mode = reopened._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert journal_mode == "wal"
+    finally:
+        reopened.close()
+
+
+def test_pair_states_count_the_dispatches(store):
+    pairs = [("job-1", "cv-0"), ("job-1", "cv-1")]
+    store.set_pair_states(pairs, "pending")
+    store.set_pair_states(pairs, "in_flight")
+    store.set_pair_states(pairs[:1], "done")
+    store.set_pair_states(pairs[1:], "in_flight")
+
+    assert store.get_pair_states() == {
+        ("job-1", "cv-0"): "done",
+        ("job-1", "cv-1"): "in_flight",
+    }
+    assert store.get_pair_states("done") == {("job-1", "cv-0"): "done"}
+    attempts = dict(
+        store._conn.execute("SELECT cv_id, attempts FROM pair_states").fetchall()
+    )
+    assert attempts == {"cv-0": 1, "cv-1": 2}
+
+
+def test_unknown_pair_state_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.set_pair_states([("job-1", "cv-0")], "running")
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from conftest import JOB_ANALYSIS
+from src.evaluators.skill_matcher import (
+    SkillMatchGrader,
+    candidate_years,
+    degree_level,
+    has_skill,
+    required_years,
+    score_resume,
+)
+
+
+@pytest.mark.parametrize(
+    "skill, resume",
+    [
+        ("Python", "5 years of python3 scripting"),
+        ("Node.js", "apis in nodejs and express"),
+        ("Docker", "docker images for every service"),
+        ("Leadership", "mentored two junior engineers"),
+        ("SQL", "schemas in postgres"),
+        ("NoSQL", "event store on dynamodb"),
+        ("Data visualization", "dashboards in tableau"),
+        ("Power BI", "powerbi reports"),
+        ("AWS or GCP", "deployed on google cloud"),
+        ("CI/CD", "continuous integration with jenkins"),
+        ("Python and Airflow", "python etl pipelines orchestrated by airflow"),
+        ("Communication skills", "communicating with stakeholders"),
+        # the skills listed in parentheses are alternatives
+        ("Cloud platforms (AWS, GCP, Azure)", "deployed on azure"),
+        ("Python (Django or Flask)", "python apis in flask"),
+        ("Python (3+ years)", "python scripting"),
+    ],
+)
+def test_skill_is_found_by_its_aliases_and_tools(skill, resume):
+    assert has_skill(skill, resume)
+
+
+@pytest.mark.parametrize(
+    "skill, resume",
+    [
+        # generic words are not the skill
+        ("Node.js", "built a graph node index"),
+        ("Docker", "deployed containers on ecs"),
+        ("Leadership", "led the migration to python 3"),
+        # a tool does not stand for another tool of the same kind
+        ("Tableau", "dashboards in power bi"),
+        ("MySQL", "schemas in sqlite and postgres"),
+        ("MongoDB", "clusters of cassandra"),
+        ("GitHub", "version history in git"),
+        # nor a broader skill for one of its tools
+        ("ASP.NET", "desktop apps on dotnet"),
+        # aliases are whole words
+        ("JavaScript", "frontend in react.js"),
+        ("Java", "frontend in javascript"),
+        ("Python and Airflow", "python etl pipelines"),
+        ("Cloud platforms (AWS, GCP, Azure)", "cloud platforms experience"),
+        ("Python (Django or Flask)", "apis in flask"),
+    ],
+)
+def test_skill_is_not_found_in_unrelated_words(skill, resume):
+    assert not has_skill(skill, resume)
+
+
+def test_required_and_candidate_years():
+    assert required_years("Senior, 5+ years") == 5
+    assert required_years("mid-level") == 3
+    assert required_years("not stated") is None
+
+    # overlapping periods are counted once
+    assert candidate_years("acme 2015 - 2019\nglobex 2018 to 2021") == 6
+    assert candidate_years("over 8 years in data engineering") == 8
+
+
+def test_degree_levels():
+    assert degree_level("phd in physics") == 4
+    assert degree_level("msc computer science, bsc maths") == 3
+    assert degree_level("self-taught") is None
+
+
+def test_matching_resume_is_a_fit():
+    resume = (
+        "Data engineer 2018 - 2024. Python and PostgreSQL pipelines on AWS, "
+        "communicating results to stakeholders. BSc Computer Science."
+    )
+
+    result = score_resume(JOB_ANALYSIS, resume)
+
+    assert result["recalibrated_scores"] == {
+        "technical_skills": 100,
+        "soft_skills": 100,
+        "experience": 100,
+        "education": 100,
+    }
+    assert result["resume_evaluation"]["missing_skills"] == []
+    assert result["assessment"]["suitability"] == "yes"
+
+
+def test_missing_essential_skills_rule_the_resume_out():
+    resume = "Frontend developer 2020 - 2022, react.js and css. BSc Design."
+
+    result = score_resume(JOB_ANALYSIS, resume)
+
+    assert result["resume_evaluation"]["missing_skills"] == ["python", "sql"]
+    assert result["recalibrated_scores"]["technical_skills"] == 0
+    assert result["assessment"]["suitability"] == "no"
+    assert "python, sql" in result["assessment"]["concerns"]
+
+
+def test_grader_scores_without_a_model():
+    grader = SkillMatchGrader()
+    input = {"job_requirements": JOB_ANALYSIS, "resume": "Python, SQL, AWS"}
+
+    assert asyncio.run(grader.ainvoke(input)) == grader.invoke(input)
@@ -0,0 +1,93 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.benchmark_startup import import_time_report
+from src.evaluators.chains import get_eval_prompt, get_model_class
+from src.utils import estimate_cost
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+PROVIDERS = [
+    "langchain_groq",
+    "langchain_openai",
+    "langchain_anthropic",
+    "langchain_ollama",
+]
+
+
+def loaded_modules(code, tmp_path):
+    """the provider and ui modules loaded by running code in a fresh interpreter"""
+    env = {
+        **os.environ,
+        "OUTPUT_DIR": str(tmp_path / "output"),
+        "RUNS_DIR": str(tmp_path / "output" / "runs"),
+        "CACHE_DIR": str(tmp_path / "output" / "cache"),
+        "LOG_FILE": str(tmp_path / "evaluation_log.txt"),
+    }
+    modules = [*PROVIDERS, "gradio"]
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys\n{code}\n"
+            f"print(__import__('json').dumps([m for m in {modules!r} if m in sys.modules]))",
+        ],
+        cwd=PACKAGE_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert process.returncode == 0, process.stderr
+    return json.loads(process.stdout.splitlines()[-1])
+
+
+def test_cli_loads_no_provider_sdk_or_ui(tmp_path):
+    assert loaded_modules("import src.cli", tmp_path) == []
+    # importing the config leaves the filesystem alone
+    assert not (tmp_path / "output").exists()
+
+
+def test_only_the_selected_provider_is_imported(tmp_path):
+    code = (
+        "from src.evaluators.chains import get_model_class\n"
+        "assert get_model_class('Groq').__name__ == 'ChatGroq'"
+    )
+
+    assert loaded_modules(code, tmp_path) == ["langchain_groq"]
+
+
+def test_unknown_interface_is_rejected():
+    with pytest.raises(ValueError, match="Invalid model text"):
+        get_model_class("bard")
+
+
+def test_tokenizer_is_loaded_once(monkeypatch):
+    loads = []
+
+    def get_encoding(name):
+        loads.append(name)
+        return object()
+
+    monkeypatch.setattr(estimate_cost, "_tokenizer", None)
+    monkeypatch.setattr(estimate_cost.tiktoken, "get_encoding", get_encoding)
+
+    assert estimate_cost.get_tokenizer() is estimate_cost.get_tokenizer()
+    assert loads == ["cl100k_base"]
+
+
+def test_eval_prompts_are_built_once():
+    assert get_eval_prompt("cv") is get_eval_prompt("cv")
+    assert get_eval_prompt("cv") is not get_eval_prompt("cv", True)
+
+
+def test_import_time_report_lists_the_slowest_imports():
+    report = import_time_report("json", top=3, repeat=1)
+
+    assert report["module"] == "json"
+    assert report["total_ms"] > 0
+    assert len(report["slowest"]) <= 3
+    assert all(name != "json" for name, _ in report["slowest"])
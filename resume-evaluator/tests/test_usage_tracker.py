@@ -0,0 +1,142 @@
+from uuid import uuid4
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from src.config import config
+from src.models.input_models import CandidateEvaluationWeights, InputModel
+from src.preprocessing.input_data_processing import create_run, stream_evaluation
+from src.utils.estimate_cost import token_cost
+from src.utils.usage_tracker import BudgetExceededError, UsageTracker
+
+METADATA = {"ls_provider": "groq", "ls_model_name": "test-model"}
+
+
+@pytest.fixture(autouse=True)
+def prices(monkeypatch):
+    # a dollar per input token, output tokens are free and none are expected
+    monkeypatch.setitem(config.MODEL_PRICES, "groq/test-model", (1_000_000, 0))
+    monkeypatch.setattr(config, "CV_BATCH_OUTPUT_TOKENS_PER_CV", 0)
+
+
+def start(tracker, words):
+    run_id = uuid4()
+    messages = [[HumanMessage(content=" ".join(["word"] * words))]]
+    tracker.on_chat_model_start({}, messages, run_id=run_id, metadata=METADATA)
+    return run_id
+
+
+def response(input_tokens, llm_output=None):
+    message = AIMessage(
+        content="{}",
+        usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": 0,
+            "total_tokens": input_tokens,
+        },
+    )
+    return LLMResult(
+        generations=[[ChatGeneration(message=message)]], llm_output=llm_output
+    )
+
+
+def test_calls_in_flight_count_against_the_budget():
+    tracker = UsageTracker(budget=5)
+
+    first = start(tracker, 3)
+    with pytest.raises(BudgetExceededError):
+        start(tracker, 3)
+    assert tracker.reserved_cost == 3
+
+    # the actual cost replaces the reservation
+    tracker.on_llm_end(response(2), run_id=first)
+    assert (tracker.cost, tracker.reserved_cost) == (2, 0)
+    start(tracker, 3)
+
+    assert tracker.blocked_calls == 1
+    assert tracker.budget_exceeded
+
+
+def test_failed_call_releases_its_reservation():
+    tracker = UsageTracker(budget=5)
+
+    run_id = start(tracker, 4)
+    tracker.on_llm_error(RuntimeError("provider error"), run_id=run_id)
+
+    assert tracker.reserved_cost == 0
+    assert tracker.report()["models"]["groq/test-model"]["failed_calls"] == 1
+    start(tracker, 4)
+    assert not tracker.budget_exceeded
+
+
+def test_calls_are_not_reserved_without_a_budget():
+    tracker = UsageTracker()
+
+    for _ in range(3):
+        start(tracker, 1000)
+
+    assert tracker.reserved_cost == 0
+    assert not tracker.budget_exceeded
+
+
+def test_anthropic_cache_tokens_are_billed():
+    tracker = UsageTracker()
+    run_id = start(tracker, 1)
+    usage = {
+        "input_tokens": 10,
+        "output_tokens": 0,
+        "cache_read_input_tokens": 1000,
+        "cache_creation_input_tokens": 200,
+    }
+
+    tracker.on_llm_end(response(10, {"usage": usage}), run_id=run_id)
+
+    model_usage = tracker.report()["models"]["groq/test-model"]
+    assert (model_usage["cache_read_tokens"], model_usage["cache_write_tokens"]) == (
+        1000,
+        200,
+    )
+    assert tracker.cost == pytest.approx(10 + 1000 * 0.1 + 200 * 1.25)
+    assert tracker.cost == pytest.approx(
+        token_cost("groq/test-model", 10, 0, 1000, 200)
+    )
+
+
+def run(budget):
+    input_data = InputModel(
+        text_input="Python developer, 3 years",
+        additional_text="Jane Doe, Python and SQL, 2019 - 2024",
+        input_type="Text",
+        api_key="",
+        interface="Groq",
+        model="llama3-70b-8192",
+        weights=CandidateEvaluationWeights(
+            technical_skills=60, soft_skills=10, experience=20, education=10
+        ),
+        budget=budget,
+    )
+    workspace = create_run(input_data)
+    try:
+        updates = list(stream_evaluation(input_data, None, workspace))
+    finally:
+        workspace.close()
+    return workspace, updates[-1]
+
+
+def test_run_over_budget_is_refused_before_scoring(fake_chains):
+    workspace, (results, message) = run(budget=0.0001)
+
+    assert fake_chains == []
+    assert results.empty
+    assert "the estimate exceeds the budget" in message
+    assert workspace.read_manifest()["status"] == "budget_exceeded"
+
+
+def test_run_within_budget_is_scored(fake_chains):
+    workspace, (results, message) = run(budget=100)
+
+    assert len(fake_chains) == 1
+    assert len(results) == 1
+    assert "estimated $" in message
+    assert workspace.read_manifest()["status"] == "done"
@@ -0,0 +1,124 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from src.config import config
+from src.utils.workspace import (
+    RunWorkspace,
+    cleanup_runs,
+    is_run_active,
+    list_unfinished_runs,
+)
+
+DAY = 24 * 3600
+
+
+@pytest.fixture(autouse=True)
+def runs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RUNS_DIR", tmp_path / "runs")
+    return tmp_path / "runs"
+
+
+def make_run(run_id, status, size=0, age_days=0):
+    """a closed run with a manifest, size bytes of output and an age"""
+    workspace = RunWorkspace.create(run_id)
+    workspace.write_manifest(run_id=run_id, status=status)
+    (workspace.csv_dir / "results.csv").write_bytes(b"x" * size)
+    workspace.close()
+    mtime = time.time() - age_days * DAY
+    os.utime(workspace.root, (mtime, mtime))
+    return workspace
+
+
+@pytest.fixture
+def locked_by_another_process():
+    """hold the lock file of a run from a child process"""
+    processes = []
+
+    def lock(workspace):
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "import fcntl, sys, time\n"
+                "f = open(sys.argv[1], 'a')\n"
+                "fcntl.flock(f, fcntl.LOCK_EX)\n"
+                "print('locked', flush=True)\n"
+                "time.sleep(60)\n",
+                str(workspace.lock_path),
+            ],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        processes.append(process)
+        assert process.stdout.readline().strip() == "locked"
+
+    yield lock
+    for process in processes:
+        process.kill()
+        process.wait()
+
+
+def test_old_runs_are_removed_unless_in_progress(runs_dir):
+    make_run("old-done", "done", age_days=10)
+    make_run("old-unfinished", "running", age_days=10)
+    active = RunWorkspace.create("old-active")
+    os.utime(active.root, (time.time() - 10 * DAY,) * 2)
+
+    removed = cleanup_runs(max_age_seconds=7 * DAY, max_bytes=10**9)
+
+    assert sorted(removed) == ["old-done", "old-unfinished"]
+    assert active.root.exists()
+    active.close()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="no fcntl")
+def test_runs_in_progress_in_another_process_are_kept(
+    runs_dir, locked_by_another_process
+):
+    workspace = make_run("other-process", "running", age_days=10)
+    locked_by_another_process(workspace)
+
+    assert is_run_active("other-process")
+    assert cleanup_runs(max_age_seconds=7 * DAY, max_bytes=0) == []
+    assert "other-process" not in list_unfinished_runs()
+    with pytest.raises(ValueError):
+        RunWorkspace.resume("other-process")
+
+
+def test_size_cap_only_removes_finished_runs(runs_dir):
+    make_run("a-done", "done", size=1000, age_days=3)
+    make_run("b-budget", "budget_exceeded", size=1000, age_days=2)
+    make_run("c-done", "done", size=1000, age_days=1)
+
+    removed = cleanup_runs(max_age_seconds=7 * DAY, max_bytes=1500)
+
+    assert removed == ["a-done", "c-done"]
+    assert (runs_dir / "b-budget").exists()
+
+
+def test_unfinished_runs_are_listed_newest_first(runs_dir):
+    make_run("20260101-000000-a", "running")
+    make_run("20260102-000000-b", "done")
+    make_run("20260103-000000-c", "budget_exceeded")
+    active = RunWorkspace.create("20260104-000000-d")
+    active.write_manifest(status="running")
+
+    assert list_unfinished_runs() == ["20260103-000000-c", "20260101-000000-a"]
+    active.close()
+    assert list_unfinished_runs()[0] == "20260104-000000-d"
+
+
+def test_closed_run_can_be_resumed(runs_dir):
+    make_run("interrupted", "running")
+
+    workspace = RunWorkspace.resume("interrupted")
+
+    assert is_run_active("interrupted")
+    with pytest.raises(ValueError):
+        RunWorkspace.resume("interrupted")
+    workspace.close()
+    assert not is_run_active("interrupted")